@@ -1,13 +1,11 @@
-import itertools as it
 import os
 import pandas as pd
+import shutil
 import sys
-import time
 import zipfile
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from tqdm import tqdm
 
 # Add the source subdirectory to the system path to allow import config from settings.py
 try:
@@ -47,8 +45,9 @@ from analyze_trades import analyze_trades
 from backtest_rsi_multi_asset_strategy import backtest_rsi_multi_asset_strategy
 from compute_daily_performance import compute_daily_performance
 from create_signals import create_signals
-from load_crypto_data import load_crypto_data
+from load_crypto_data_cached import load_crypto_data_cached
 from plot_multi_asset_equity_and_drawdown import plot_multi_asset_equity_and_drawdown
+from run_parameter_grid import run_parameter_grid
 from summary_stats import summary_stats
 
 # Variables
@@ -65,6 +64,7 @@ USE_MA = True
 # TRADING_FEES = True
 TRADE_TAKER_FEE = 0.0020  # 0.20% or 20 bps
 TRADE_MAKER_FEE = 0.0010  # 0.10% or 10 bps
+MAX_WORKERS = os.cpu_count()  # 1 = run serially in this process
 
 # Parameter grid
 param_grid = {
@@ -139,41 +139,28 @@ param_grid = {
 def _stringify_list(x):
     return ", ".join(map(str, x)) if isinstance(x, (list, tuple)) else str(x)
 
-def _fmt_duration(seconds: float) -> str:
-    seconds = int(round(seconds))
-    h, rem = divmod(seconds, 3600)
-    m, s = divmod(rem, 60)
-    return f"{h}:{m:02d}:{s:02d}"
-
-# Build parameter combinations
-keys = list(param_grid.keys())
-combos = list(it.product(*[param_grid[k] for k in keys]))
-total_combos = len(combos)
-
-results_list = []
-overall_start = time.time()
-
-# Runtime tracking
-ema_runtime = None  # all runs
-alpha = 0.2
-success_count = 0
-success_elapsed = 0.0
-success_ema_runtime = None
-
-# Print details - no progress bar
-# iterator = enumerate(combos, start=1)  # or tqdm(enumerate(...), total=total_combos)
-
-# Progress bar
-iterator = tqdm(enumerate(combos, start=1), total=total_combos, desc="Backtesting", ncols=100)
-
-for idx, combo in iterator:
-    combo_start_time = time.time()
-    params = dict(zip(keys, combo))
+def _combo_key_value(x) -> str:
+    # Missing values and "" map to "", and numbers compare by value, so the
+    # rows read back from the CSV (NaN, 20.0) match the JSON lines (None, 20)
+    if pd.isna(x) or x == "":
+        return ""
+    try:
+        return repr(float(x))
+    except (TypeError, ValueError):
+        return str(x)
+
+def run_combo(params: dict) -> list:
+    """
+    Run one combination of the non-stop parameters for every trailing stop in
+    params["trailing_stop_pct"]. The prices, indicators, signals, and trades
+    are shared by the stop levels (the backtest simulates all of them in one
+    pass), and one result is returned per stop level.
+    """
     tickers         = params["tickers"]
     ma_days         = params["ma_days"]
     rsi_period      = params["rsi_period"]
     rsi_threshold   = params["rsi_threshold"]
-    trailing_stop   = params["trailing_stop_pct"]
+    trailing_stops  = params["trailing_stop_pct"]
     order_entry     = params["order_entry"]
     use_bbands      = params["use_bbands"]
     bb_window       = params["bb_window"]
@@ -181,49 +168,14 @@ for idx, combo in iterator:
     bb_rule         = params["bb_rule"]
     trading_fees    = params["trading_fees"]
 
-    # Print details - no progress bar
-    # print(f"\n[{idx}/{total_combos}] TICKERS={tickers}, MA_DAYS={ma_days}, "
-    #       f"RSI_PERIOD={rsi_period}, RSI_THRESHOLD={rsi_threshold}, STOP={trailing_stop}")
-
+    crypto_prices_technical_df = None
     signals_df = None
     trades_df = None
-    daily_perf_df = None
-    sum_stats_df = None
     error_msg = None
-    success = True
 
     try:
-        # Create MA_Days string for filename
-        if ma_days == []:
-            temp_ma_days = "[0]"
-        else:
-            temp_ma_days = ma_days
-
-        # Create trailing stop string for filename
-        temp_trailing_stop = f"{trailing_stop:.3f}"
-
-        # Base title name
-        base_title_name = f"{START_DATE}_{END_DATE}_{tickers}_MA-{temp_ma_days}_RP-{rsi_period}_RT-{rsi_threshold}_TS-{temp_trailing_stop}_{order_entry}"
-
-        # Create title name
-        if use_bbands == True:
-            bb_part = f"BBR-{bb_rule}_BBW-{bb_window}_BBS-{bb_num_std}"
-            if trading_fees == True:
-                title_name = f"{base_title_name}_{bb_part}_TF"
-            else:
-                title_name = f"{base_title_name}_{bb_part}"
-        else:
-            if trading_fees == True:
-                title_name = f"{base_title_name}_TF"
-            else:
-                title_name = f"{base_title_name}"
-
-        
-        
-        # Create ZIP file name
-        zip_name = f"{title_name}.zip"
-
-        crypto_prices_df = load_crypto_data(
+        # Memory-mapped price cache; the pickle is only read on the first combo
+        crypto_prices_df = load_crypto_data_cached(
             tickers=tickers,
             base_directory=DATA_DIR,
             start_date=START_DATE,
@@ -237,6 +189,9 @@ for idx, combo in iterator:
             ma_days=ma_days,
             bb_window=bb_window,
             bb_num_std=bb_num_std,
+            use_cache=True,
+            cache_directory=DATA_DIR / "Cache" / "Indicator_Cache",
+            rsi_batch_periods=param_grid["rsi_period"],
         )
 
         signals_df = create_signals(
@@ -250,13 +205,14 @@ for idx, combo in iterator:
             bb_rule=bb_rule,
         )
 
+        # Every trailing stop level in one pass; trades are tagged with their level
         trades_df = backtest_rsi_multi_asset_strategy(
             tickers=tickers,
             prices=crypto_prices_technical_df,
             signals=signals_df,
             initial_capital=INITIAL_CAPITAL,
             rsi_threshold=rsi_threshold,
-            trailing_stop_pct=trailing_stop,
+            trailing_stop_pct=list(trailing_stops),
             ma_days=ma_days,
             order_entry=order_entry,
             trading_fees=trading_fees,
@@ -264,11 +220,94 @@ for idx, combo in iterator:
             trade_maker_fee=TRADE_MAKER_FEE,
         )
 
+    except Exception as e:
+        error_msg = str(e)
+
+    return [
+        run_stop(
+            params=params,
+            trailing_stop=trailing_stop,
+            data=crypto_prices_technical_df,
+            signals_df=signals_df,
+            trades_df=trades_df,
+            error_msg=error_msg,
+        )
+        for trailing_stop in trailing_stops
+    ]
+
+def run_stop(
+    params: dict,
+    trailing_stop: float,
+    data: pd.DataFrame,
+    signals_df: pd.DataFrame,
+    trades_df: pd.DataFrame,
+    error_msg: str,
+) -> dict:
+    """Performance, plot, and ZIP export of one trailing stop level of a combo."""
+    tickers         = params["tickers"]
+    ma_days         = params["ma_days"]
+    rsi_period      = params["rsi_period"]
+    rsi_threshold   = params["rsi_threshold"]
+    order_entry     = params["order_entry"]
+    use_bbands      = params["use_bbands"]
+    bb_window       = params["bb_window"]
+    bb_num_std      = params["bb_num_std"]
+    bb_rule         = params["bb_rule"]
+    trading_fees    = params["trading_fees"]
+
+    stop_trades_df = None
+    daily_perf_df = None
+    sum_stats_df = None
+    success = True
+
+    # Create MA_Days string for filename
+    if ma_days == []:
+        temp_ma_days = "[0]"
+    else:
+        temp_ma_days = ma_days
+
+    # Create trailing stop string for filename
+    temp_trailing_stop = f"{trailing_stop:.3f}"
+
+    # Base title name
+    base_title_name = f"{START_DATE}_{END_DATE}_{tickers}_MA-{temp_ma_days}_RP-{rsi_period}_RT-{rsi_threshold}_TS-{temp_trailing_stop}_{order_entry}"
+
+    # Create title name
+    if use_bbands == True:
+        bb_part = f"BBR-{bb_rule}_BBW-{bb_window}_BBS-{bb_num_std}"
+        if trading_fees == True:
+            title_name = f"{base_title_name}_{bb_part}_TF"
+        else:
+            title_name = f"{base_title_name}_{bb_part}"
+    else:
+        if trading_fees == True:
+            title_name = f"{base_title_name}_TF"
+        else:
+            title_name = f"{base_title_name}"
+
+    # Create ZIP file name
+    zip_name = f"{title_name}.zip"
+
+    # Per-combo scratch directory so that parallel workers do not overwrite
+    # each other's pickles and plots
+    scratch_dir = current_directory / "Scratch" / title_name
+    os.makedirs(scratch_dir, exist_ok=True)
+
+    try:
+        if error_msg is not None:
+            raise RuntimeError(error_msg)
+
+        # Trades of this stop level
+        stop_trades_df = trades_df[
+            trades_df["trailing_stop_pct"] == trailing_stop
+        ].reset_index(drop=True)
+
         daily_perf_df = compute_daily_performance(
             tickers=tickers,
-            data=crypto_prices_technical_df,
-            trades=trades_df,
+            data=data,
+            trades=stop_trades_df,
             initial_capital=INITIAL_CAPITAL,
+            trailing_stop_pct=trailing_stop,
         )
 
         sum_stats_df = summary_stats(
@@ -284,12 +323,12 @@ for idx, combo in iterator:
         plot_multi_asset_equity_and_drawdown(
             tickers=tickers,
             daily_perf=daily_perf_df,
-            trades=trades_df,
-            data=crypto_prices_technical_df,
+            trades=stop_trades_df,
+            data=data,
             title=title_name,
             show_plot=False,
             export_plot=True,
-            export_dir=current_directory,
+            export_dir=scratch_dir,
         )
 
         (
@@ -305,7 +344,7 @@ for idx, combo in iterator:
             max_trade_loss_pnl,
             max_drawdown,
         ) = analyze_trades(
-            trades_df=trades_df,
+            trades_df=stop_trades_df,
             daily_perf_df=daily_perf_df,
             print_summary=False,
         )
@@ -319,56 +358,8 @@ for idx, combo in iterator:
         max_trade_gain_pnl = max_trade_loss_pnl = None
         max_drawdown = None
 
-    # Timing updates
-    combo_runtime = time.time() - combo_start_time
-    ema_runtime = combo_runtime if ema_runtime is None else alpha * combo_runtime + (1 - alpha) * ema_runtime
-    elapsed = time.time() - overall_start
-    avg_runtime_all = elapsed / idx
-
-    # Update success-only metrics
-    if success:
-        success_count += 1
-        success_elapsed += combo_runtime
-        success_ema_runtime = (
-            combo_runtime if success_ema_runtime is None
-            else alpha * combo_runtime + (1 - alpha) * success_ema_runtime
-        )
-
-    # --- ETA calculation preferring success-only data ---
-    remaining = total_combos - idx
-    if success_count > 0:
-        avg_success = success_elapsed / success_count
-        # Prefer EMA of successful runs if we have multiple; else use simple mean
-        basis = "EMA(success)" if success_count > 1 and success_ema_runtime is not None else "Avg(success)"
-        eta_sec = remaining * (success_ema_runtime if basis.startswith("EMA") else avg_success)
-    else:
-        # Fallback to overall EMA/avg (includes errors)
-        basis = "EMA(all)" if idx > 1 and ema_runtime is not None else "Avg(all)"
-        eta_sec = remaining * (ema_runtime if basis.startswith("EMA") else avg_runtime_all)
-
-    finish_time = datetime.now() + timedelta(seconds=eta_sec)
-
-     # Progress bar
-    iterator.set_postfix({
-        # "last": _fmt_duration(combo_runtime),
-        # "elapsed": _fmt_duration(elapsed),
-        # "eta": _fmt_duration(eta_sec),
-        # "basis": basis,
-        "finish": finish_time.strftime("%H:%M:%S")
-    })
-
-    # Print details - no progress bar
-    # print(
-    #     f"   Elapsed: {_fmt_duration(elapsed)} | "
-    #     f"Last: {_fmt_duration(combo_runtime)} | "
-    #     f"ETA: {_fmt_duration(eta_sec)} via {basis} "
-    #     f"(finish ~ {finish_time.strftime('%Y-%m-%d %H:%M:%S')})"
-    # )
-
-    # print(combo)
-
     # Store results
-    results_list.append({
+    result = {
         # --- parameter fields ---
         "TICKERS": _stringify_list(tickers),
         "MA_DAYS": _stringify_list(ma_days),
@@ -405,12 +396,7 @@ for idx, combo in iterator:
         "Days to Recover": sum_stats_df.loc['Return']['Days to Recover'] if sum_stats_df is not None else None,
         "MAR Ratio": sum_stats_df.loc['Return']['MAR Ratio'] if sum_stats_df is not None else None,
 
-        # --- runtime & metadata ---
-        "Total Runtime (s)": round(elapsed, 2),
-        "Average Runtime (s)": round(avg_runtime_all, 2),
-        "Runtime (s)": round(combo_runtime, 2),
-        "Runtime EMA (s)": round(ema_runtime, 2) if ema_runtime is not None else None,
-        "Success-only Runtime EMA (s)": round(success_ema_runtime, 2) if success_ema_runtime is not None else None,
+        # --- metadata (runtime fields are added by run_parameter_grid) ---
         "Success": success,
         "Error": error_msg,
         "Order Entry": order_entry,
@@ -419,19 +405,19 @@ for idx, combo in iterator:
         "BB Num Std": bb_num_std if use_bbands else None,
         "Trade Taker Fee": TRADE_TAKER_FEE if trading_fees else 0,
         "Trade Maker Fee": TRADE_MAKER_FEE if trading_fees else 0,
-    })
+    }
 
-    if signals_df is not None and trades_df is not None and daily_perf_df is not None and sum_stats_df is not None:
+    if signals_df is not None and stop_trades_df is not None and daily_perf_df is not None and sum_stats_df is not None:
 
-        # Export DataFrames to Pickles (save inside current_directory)
-        signals_path      = current_directory / "signals_df.pkl"
-        trades_path       = current_directory / "trades_df.pkl"
-        daily_perf_path   = current_directory / "daily_perf_df.pkl"
-        sum_stats_path    = current_directory / "sum_stats_df.pkl"
-        plot_path         = current_directory / "multi_asset_strategy.png"
+        # Export DataFrames to Pickles (save inside the scratch directory)
+        signals_path      = scratch_dir / "signals_df.pkl"
+        trades_path       = scratch_dir / "trades_df.pkl"
+        daily_perf_path   = scratch_dir / "daily_perf_df.pkl"
+        sum_stats_path    = scratch_dir / "sum_stats_df.pkl"
+        plot_path         = scratch_dir / "multi_asset_strategy.png"
 
         signals_df.to_pickle(signals_path)
-        trades_df.to_pickle(trades_path)
+        stop_trades_df.to_pickle(trades_path)
         daily_perf_df.to_pickle(daily_perf_path)
         sum_stats_df.to_pickle(sum_stats_path)
 
@@ -453,30 +439,63 @@ for idx, combo in iterator:
             zf.write(sum_stats_path, arcname="sum_stats_df.pkl")
             zf.write(plot_path, arcname="multi_asset_strategy.png")
 
-        # Delete pickle files after zipping
-        for path in [signals_path, trades_path, daily_perf_path, sum_stats_path, plot_path]:
-            try:
-                # path.unlink()  # same as os.remove(path)
-                os.remove(path)  # just to be sure
-            except FileNotFoundError:
-                pass  # already deleted or never created
-        
     else:
         pass
 
-    # Delete all DataFrames to free up memory
-    del crypto_prices_df, crypto_prices_technical_df, signals_df, trades_df, daily_perf_df, sum_stats_df
+    # Delete pickle files and plot after zipping
+    shutil.rmtree(scratch_dir, ignore_errors=True)
 
-    # print(f"Created {START_DATE}_{END_DATE}_{tickers}_{ma_days}_{rsi_period}_{rsi_threshold}_{trailing_stop}.zip")
+    return result
 
-# Final DataFrame of results
-results_df = pd.DataFrame(results_list)
-results_df["MA_DAYS"] = results_df["MA_DAYS"].fillna(0.0)
 
-results_csv = current_directory / f"multi_asset_strategy_results_{START_DATE}_{END_DATE}.csv"
-try:
-    existing_results_df = pd.read_csv(results_csv)
-    combined_df = pd.concat([existing_results_df, results_df], ignore_index=True)
-    combined_df.to_csv(results_csv, index=False)
-except FileNotFoundError:
-    results_df.to_csv(results_csv, index=False)
\ No newline at end of file
+if __name__ == "__main__":
+
+    results_jsonl = current_directory / f"multi_asset_strategy_results_{START_DATE}_{END_DATE}.jsonl"
+
+    # Run the grid over a process pool; completed combos are appended to the
+    # JSON lines file so an interrupted sweep resumes where it stopped
+    # The trailing stop levels are simulated together, so each combo of the
+    # other parameters gets the whole list of stops
+    combo_grid = {**param_grid, "trailing_stop_pct": [param_grid["trailing_stop_pct"]]}
+
+    results_df = run_parameter_grid(
+        param_grid=combo_grid,
+        run_combo=run_combo,
+        results_path=results_jsonl,
+        max_workers=MAX_WORKERS,
+        desc="Backtesting",
+    )
+    results_df = results_df.drop(columns=["Combo Key"])
+
+    # Merge with the results already in the CSV (e.g. from runs before the
+    # JSON lines file existed), keeping the latest result of each combination
+    results_csv = current_directory / f"multi_asset_strategy_results_{START_DATE}_{END_DATE}.csv"
+    if results_csv.exists():
+        existing_results_df = pd.read_csv(results_csv)
+        results_df = pd.concat([existing_results_df, results_df], ignore_index=True)
+    else:
+        pass
+    # No MA is "" in the JSON lines and NaN in the CSV; store both as 0.0
+    results_df["MA_DAYS"] = results_df["MA_DAYS"].replace("", None).fillna(0.0)
+
+    param_columns = [
+        "TICKERS",
+        "MA_DAYS",
+        "INITIAL_CAPITAL",
+        "RSI_PERIOD",
+        "RSI_THRESHOLD",
+        "TRAILING_STOP_PCT",
+        "START_DATE",
+        "END_DATE",
+        "Order Entry",
+        "BB Rule",
+        "BB Window",
+        "BB Num Std",
+        "Trade Taker Fee",
+        "Trade Maker Fee",
+    ]
+    combo_keys = (
+        results_df[param_columns].map(_combo_key_value).agg("|".join, axis=1)
+    )
+    results_df = results_df[~combo_keys.duplicated(keep="last")]
+    results_df.to_csv(results_csv, index=False)
@@ -1,13 +1,14 @@
+import asyncio
 import logging
-import numpy as np
 import pandas as pd
-import time
-import threading
 
 from coinbase.rest import RESTClient
-from coinbase.websocket import WSClient
-from datetime import datetime
+from coinbase_rsi_pipeline import RSIOrderPipeline
+from datetime import datetime, timedelta, timezone
 from load_api_keys import load_api_keys
+from order_book import OrderBook
+from settings import config
+from streaming_rsi import StreamingRSI
 
 # Load API keys from the environment
 api_keys = load_api_keys()
@@ -19,8 +20,10 @@ PRODUCT_ID = "BTC-USD"  # Trading pair
 RSI_PERIOD = 14  # RSI calculation period
 RSI_OVERSOLD = 30  # RSI threshold for buy
 STOP_LOSS_PERCENT = 0.02  # 2% stop loss
+MAX_SEED_GAP = timedelta(minutes=5)  # Max age of the stored data used to seed the RSI
 LIMIT_ORDER_SIZE = "0.001"  # BTC amount per order (as string for API)
 SANDBOX = True  # Set to False for production
+DATA_DIR = config("DATA_DIR")  # Stored minute data used to seed the RSI
 
 # --- LOGGING ---
 logging.basicConfig(
@@ -37,172 +40,71 @@ api_url = (
 client = RESTClient(api_key=API_KEY, api_secret=API_SECRET, base_url=api_url)
 
 # --- STATE ---
-price_data = []
-orders = []
+# RSI state updated with each candle, keeping the last 100 closes
+rsi_state = StreamingRSI(period=RSI_PERIOD, history=100)
 
 
 # --- INDICATOR CALCULATION ---
-def calculate_rsi(prices, period=RSI_PERIOD):
-    if len(prices) < period + 1:
-        return None
-    df = pd.DataFrame(prices, columns=["close"])
-    delta = df["close"].diff()
-    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
-    loss = -delta.where(delta < 0, 0).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi.iloc[-1]
-
-
-# --- ORDER PLACEMENT ---
-def place_buy_limit_order(price, size):
+def seed_rsi_state():
+    """
+    Seed the RSI state from the stored minute data, if any.
+
+    The stored candles are only used if they end within MAX_SEED_GAP of the
+    current time. Older data would leave a gap before the first live candle,
+    so the RSI then starts without history instead.
+    """
     try:
-        order = client.limit_order_buy(
-            client_order_id=f"buy_{int(time.time())}",
-            product_id=PRODUCT_ID,
-            price=str(round(price, 2)),
-            size=size,
+        df = pd.read_pickle(
+            f"{DATA_DIR}/Coinbase/Cryptocurrencies/Minute/{PRODUCT_ID}.pkl"
         )
-        logger.info(f"Placed buy limit order: {order}")
-        return order
-    except Exception as e:
-        logger.error(f"Error placing buy order: {e}")
-        return None
-
-
-def place_stop_limit_sell_order(buy_price, size):
-    stop_price = buy_price * (1 - STOP_LOSS_PERCENT)
-    try:
-        order = client.stop_limit_order_sell(
-            client_order_id=f"sell_{int(time.time())}",
-            product_id=PRODUCT_ID,
-            base_size=size,
-            limit_price=str(round(stop_price, 2)),
-            stop_price=str(round(stop_price, 2)),
+    except FileNotFoundError:
+        logger.info("No stored minute data found. RSI starts without history.")
+        return
+
+    # Reset index if 'Date' is column is the index
+    if "Date" not in df.columns:
+        df = df.reset_index()
+
+    # Stored dates are naive UTC
+    last_date = pd.Timestamp(df["Date"].max())
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if now - last_date > MAX_SEED_GAP:
+        logger.info(
+            f"Stored minute data ends at {last_date}, {now - last_date} ago. RSI starts without history."
         )
-        logger.info(f"Placed stop limit sell order: {order}")
-        return order
-    except Exception as e:
-        logger.error(f"Error placing stop sell order: {e}")
-        return None
+        return
 
+    rsi = rsi_state.seed(df["close"], df["Date"])
+    logger.info(f"Seeded RSI from {len(df)} stored candles: {rsi:.2f}")
 
-# --- WEBSOCKET CALLBACKS ---
-def handle_ws_message(ws, message):
-    try:
-        if message.get("channel") == "candles" and message.get("events"):
-            candle = message["events"][0]["candle"]
-            price = float(candle["close"])
-            timestamp = datetime.fromisoformat(candle["start"][:-1])  # remove 'Z'
-
-            price_data.append({"time": timestamp, "close": price})
-            if len(price_data) > 100:
-                price_data.pop(0)
-
-            prices = [p["close"] for p in price_data]
-            rsi = calculate_rsi(prices)
-
-            print(f"Price: {price}, Timestamp: {timestamp}")
-
-            if rsi is not None and not np.isnan(rsi):
-                logger.info(f"RSI: {rsi:.2f}, Price: {price}")
-
-                if rsi < RSI_OVERSOLD:
-                    logger.info(f"RSI below {RSI_OVERSOLD}. Placing buy order.")
-                    buy_order = place_buy_limit_order(price, LIMIT_ORDER_SIZE)
-                    if buy_order and "order_id" in buy_order:
-                        orders.append(
-                            {
-                                "order_id": buy_order["order_id"],
-                                "type": "buy",
-                                "price": price,
-                                "size": LIMIT_ORDER_SIZE,
-                                "timestamp": timestamp,
-                            }
-                        )
-
-                        stop_price = price * (1 - STOP_LOSS_PERCENT)
-                        sell_order = place_stop_limit_sell_order(
-                            price, LIMIT_ORDER_SIZE
-                        )
-                        if sell_order and "order_id" in sell_order:
-                            orders.append(
-                                {
-                                    "order_id": sell_order["order_id"],
-                                    "type": "sell",
-                                    "price": stop_price,
-                                    "size": LIMIT_ORDER_SIZE,
-                                    "timestamp": timestamp,
-                                }
-                            )
-
-            logger.info(f"Market Data - Time: {timestamp}, Price: {price}")
-            logger.info(f"Active Orders: {len(orders)}")
-
-    except Exception as e:
-        logger.error(f"Error in WebSocket message handler: {e}")
-
-
-def handle_ws_error(ws, error):
-    logger.error(f"WebSocket error: {error}")
-
-
-def handle_ws_close(ws):
-    logger.info("WebSocket closed")
-
-
-def handle_ws_open(ws):
-    logger.info("WebSocket opened")
-    ws.subscribe([PRODUCT_ID], channel="candles", granularity="ONE_MINUTE")
-
-
-# --- RUN WEBSOCKET ---
-def run_websocket():
+
+# --- EVENT LOOP ---
+async def run_pipeline():
     ws_url = (
         "wss://ws-direct.sandbox.cdp.coinbase.com"
         if SANDBOX
         else "wss://ws-direct.cdp.coinbase.com"
     )
 
-    ws = WSClient(
-        api_key=API_KEY,
-        api_secret=API_SECRET,
-        base_url=ws_url,
-        on_open=lambda: handle_ws_open(ws),
-        on_message=lambda message: handle_ws_message(ws, message),
-        on_close=lambda: handle_ws_close(ws),
+    # Websocket ingest -> RSI -> signal -> orders, with order statuses
+    # from the user channel
+    pipeline = RSIOrderPipeline(
+        client=client,
+        product_id=PRODUCT_ID,
+        rsi_state=rsi_state,
+        rsi_oversold=RSI_OVERSOLD,
+        stop_loss_percent=STOP_LOSS_PERCENT,
+        order_size=LIMIT_ORDER_SIZE,
+        order_book=OrderBook(PRODUCT_ID),
     )
-
-    ws.run_forever_with_exception_check()
-
-
-# --- ORDER MONITORING LOOP ---
-def monitor_orders():
-    while True:
-        try:
-            for order in orders[:]:  # Copy to avoid modification while iterating
-                order_status = client.get_order(order["order_id"])
-                logger.info(
-                    f"Order {order['order_id']} status: {order_status['status']}"
-                )
-                if order_status["status"] in ["FILLED", "CANCELLED"]:
-                    orders.remove(order)
-            time.sleep(60)
-        except Exception as e:
-            logger.error(f"Error monitoring orders: {e}")
-            time.sleep(60)
+    await pipeline.run(ws_url=ws_url, api_key=API_KEY, api_secret=API_SECRET)
 
 
 # --- MAIN LOOP ---
 if __name__ == "__main__":
-    ws_thread = threading.Thread(target=run_websocket, daemon=True)
-    monitor_thread = threading.Thread(target=monitor_orders, daemon=True)
-
-    ws_thread.start()
-    monitor_thread.start()
+    seed_rsi_state()
 
     try:
-        while True:
-            time.sleep(1)
+        asyncio.run(run_pipeline())
     except KeyboardInterrupt:
         logger.info("Shutting down...")
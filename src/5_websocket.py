@@ -14,6 +14,8 @@ from coinbase.rest import RESTClient
 from coinbase.websocket import WSClient
 from datetime import datetime, timedelta
 from load_api_keys import load_api_keys
+from settings import config
+from tick_recorder import TickRecorder
 
 # Load API keys from the environment
 api_keys = load_api_keys()
@@ -41,6 +43,15 @@ CHANNEL_NAMES = {
 
 WS_API_URL = "wss://advanced-trade-ws.coinbase.com"
 
+# Record the raw messages in hourly files, written in batches
+RECORD_DIR = f"{config('DATA_DIR')}/Coinbase/Websocket"
+recorder = TickRecorder(
+    directory=RECORD_DIR,
+    prefix=CHANNEL_NAMES["level2"],
+    rotate_seconds=3600,
+    compress=True,
+)
+
 
 def sign_with_jwt(message, channel, products=[]):
     payload = {
@@ -56,9 +67,11 @@ def sign_with_jwt(message, channel, products=[]):
 
 
 def on_message(ws, message):
-    data = json.loads(message)
-    with open("Output1.txt", "a") as f:
-        f.write(json.dumps(data) + "\n")
+    recorder.record(message)
+
+
+def on_close(ws, close_status_code, close_msg):
+    recorder.close()
 
 
 def subscribe_to_products(ws, products, channel_name):
@@ -81,7 +94,9 @@ def on_open(ws):
 
 
 def start_websocket():
-    ws = websocket.WebSocketApp(WS_API_URL, on_open=on_open, on_message=on_message)
+    ws = websocket.WebSocketApp(
+        WS_API_URL, on_open=on_open, on_message=on_message, on_close=on_close
+    )
     ws.run_forever()
 
 
@@ -1,6 +1,17 @@
+import hashlib
+import numpy as np
 import pandas as pd
 
+from cached_indicator import cached_indicator
+from calculate_ma_bank import calculate_ma_bank
 from calculate_rsi import calculate_rsi
+from calculate_rsi_batch import calculate_rsi_batch
+
+
+def _fingerprint(values: pd.Series) -> str:
+    """Hash of a column's values, so edited data does not hit stale cache entries."""
+    array = np.ascontiguousarray(values.to_numpy(dtype="float64"))
+    return hashlib.blake2b(array.view(np.uint8), digest_size=16).hexdigest()
 
 
 def add_rsi_ma_bb(
@@ -10,6 +21,9 @@ def add_rsi_ma_bb(
     ma_days: list,
     bb_window: int,
     bb_num_std: float,
+    use_cache: bool = False,
+    cache_directory=None,
+    rsi_batch_periods: list = None,
 ) -> pd.DataFrame:
     """
     Adds RSI, moving averages,and Bollinger bands for each crypto asset.
@@ -24,6 +38,20 @@ def add_rsi_ma_bb(
         RSI lookback period.
     ma_days : list
         List of moving average durations in days.
+    use_cache : bool, optional
+        If True, memoize each indicator by (ticker, date range, hash of the
+        close prices, indicator, parameters) with `cached_indicator`, so that each distinct RSI period,
+        MA window, and Bollinger band setting is computed once per ticker and
+        date range and reused across calls (default is False).
+    cache_directory : optional
+        Directory for the on-disk tier of the indicator cache. Only used if
+        use_cache is True.
+    rsi_batch_periods : list, optional
+        List of every RSI period that will be requested for this data, e.g.,
+        the RSI periods of a parameter grid. If given and use_cache is True, a
+        cache miss computes all of these periods in one pass with
+        `calculate_rsi_batch` and caches each of them, so later calls with a
+        different rsi_period are cache hits.
 
     Returns
     -------
@@ -35,32 +63,93 @@ def add_rsi_ma_bb(
     # Copy the data dataframe
     df = data.copy()
 
+    # Date range of the data, used to key the indicator cache
+    if len(df) > 0:
+        data_range = (str(df["Date"].iloc[0]), str(df["Date"].iloc[-1]), len(df))
+    else:
+        data_range = (None, None, 0)
+
+    # Hash of each ticker's close prices, so that a revised value with the
+    # same date range does not reuse indicators computed from the old data
+    close_hashes = {}
+    if use_cache:
+        for ticker in tickers:
+            close_hashes[ticker] = _fingerprint(df[f"{ticker}_close"])
+
+    def _indicator(ticker, name, params, compute):
+        if use_cache:
+            return cached_indicator(
+                key=(ticker, *data_range, close_hashes[ticker], name, *params),
+                compute=compute,
+                cache_directory=cache_directory,
+            )
+        return compute()
+
     for ticker in tickers:
         # Shift close by 1 row
         df[f"{ticker}_close_prev"] = df[f"{ticker}_close"].shift(1)
 
         # ----- RSI -----
 
+        # Fill the cache with every RSI period of the batch in one pass
+        if use_cache and rsi_batch_periods:
+            batch_periods = sorted(set(rsi_batch_periods) | {rsi_period})
+            batch = {}
+
+            def _batch_column(period, ticker=ticker):
+                if not batch:
+                    rsi_values = calculate_rsi_batch(
+                        df[f"{ticker}_close"], periods=batch_periods
+                    )
+                    batch.update(zip(batch_periods, rsi_values.T))
+                return batch[period]
+
+            for period in batch_periods:
+                cached_indicator(
+                    key=(ticker, *data_range, close_hashes[ticker], "RSI", period),
+                    compute=lambda period=period: _batch_column(period),
+                    cache_directory=cache_directory,
+                )
+
         # Calc RSI and shift by 1 row
-        df[f"{ticker}_RSI"] = calculate_rsi(df[f"{ticker}_close"], period=rsi_period)
+        df[f"{ticker}_RSI"] = _indicator(
+            ticker,
+            "RSI",
+            (rsi_period,),
+            lambda: calculate_rsi(df[f"{ticker}_close"], period=rsi_period),
+        )
         df[f"{ticker}_RSI_prev"] = df[f"{ticker}_RSI"].shift(1)
 
         # ----- Moving Averages -----
 
-        # Calc moving averages and shift by 1 row
-        for day in ma_days:
-            window = 1440 * day  # 1440 minutes in a day
-            df[f"{ticker}_MA_{day}d"] = (
-                df[f"{ticker}_close"].rolling(window=window, min_periods=1).mean()
+        # Calc moving averages and their 1 row lags for every window from one
+        # prefix sum; computed lazily so that cache hits skip it entirely
+        windows = [1440 * day for day in ma_days]  # 1440 minutes in a day
+        ma_bank = {}
+
+        def _ma(window, lagged, ticker=ticker):
+            if not ma_bank:
+                ma_bank.update(calculate_ma_bank(df[f"{ticker}_close"], windows))
+            return ma_bank[window][1 if lagged else 0]
+
+        for day, window in zip(ma_days, windows):
+            df[f"{ticker}_MA_{day}d"] = _indicator(
+                ticker, "MA", (window,), lambda window=window: _ma(window, False)
+            )
+            df[f"{ticker}_MA_{day}d_prev"] = _indicator(
+                ticker, "MA_prev", (window,), lambda window=window: _ma(window, True)
             )
-            df[f"{ticker}_MA_{day}d_prev"] = df[f"{ticker}_MA_{day}d"].shift(1)
 
         # ----- Bollinger Bands -----
         rolling = df[f"{ticker}_close_prev"].rolling(
             window=bb_window, min_periods=bb_window
         )
-        df[f"{ticker}_BB_MID_prev"] = rolling.mean()
-        df[f"{ticker}_BB_STD_prev"] = rolling.std()
+        df[f"{ticker}_BB_MID_prev"] = _indicator(
+            ticker, "BB_MID_prev", (bb_window,), rolling.mean
+        )
+        df[f"{ticker}_BB_STD_prev"] = _indicator(
+            ticker, "BB_STD_prev", (bb_window,), rolling.std
+        )
         df[f"{ticker}_BB_UPPER_prev"] = df[f"{ticker}_BB_MID_prev"] + (
             bb_num_std * df[f"{ticker}_BB_STD_prev"]
         )
@@ -0,0 +1,440 @@
+import numpy as np
+import os
+import pandas as pd
+
+from settings import config
+
+# Get the environment variable for where data is stored
+DATA_DIR = config("DATA_DIR")
+
+HOUR_NS = 3_600 * 1_000_000_000
+DAY_NS = 24 * HOUR_NS
+
+# Columns aggregated with a specific function; any other column takes the last
+# value of each bar
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+SUM_COLUMNS = ["volume", "transactions"]
+
+
+def _reduce_bars(arrays: dict, key: np.ndarray) -> dict:
+    """Aggregate consecutive rows with the same key into one bar."""
+
+    n = len(key)
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    bars = {}
+    for col, values in arrays.items():
+        if col == "open":
+            bars[col] = values[starts]
+        elif col == "high":
+            bars[col] = np.maximum.reduceat(values, starts)
+        elif col == "low":
+            bars[col] = np.minimum.reduceat(values, starts)
+        elif col in SUM_COLUMNS or col == "notional":
+            bars[col] = np.add.reduceat(values, starts)
+        else:
+            bars[col] = values[ends]
+
+    return bars
+
+
+def _time_of_day_ns(value: str) -> int:
+    """Nanoseconds since midnight of a time string such as '09:30'."""
+
+    return pd.Timedelta(
+        pd.Timestamp(f"1970-01-01 {value}") - pd.Timestamp("1970-01-01")
+    ).value
+
+
+def aggregate_ohlcv(
+    df: pd.DataFrame,
+    timespans: list = None,
+    timezone: str = None,
+    session_start: str = None,
+    session_end: str = None,
+) -> dict:
+    """
+    Aggregate minute OHLCV bars into hour and day bars in one vectorized pass.
+
+    Bars are formed with `reduceat` over the boundaries of sorted int64
+    timestamps, and each coarser timespan is built from the bars of the
+    previous one (minute -> hour -> day), so the minute data is read once.
+    Open is the first value of each bar, high the maximum, low the minimum,
+    close the last value, volume and transactions the sum, and vwap the
+    volume-weighted average of the minute vwaps. Any other column (e.g., 'otc')
+    takes its last value.
+
+    Timestamps are UTC bar start times, as stored by the Polygon and DataBento
+    pull functions. Hour bars start on the hour. Day bars start at midnight in
+    `timezone` and are labeled with that time in UTC, e.g., 05:00 UTC for New
+    York in winter, which matches the labels of Polygon day bars; without a
+    timezone they start at midnight UTC, like DataBento `ohlcv-1d` bars.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Minute bars with a 'Date' column or index and 'open', 'high', 'low',
+        'close', 'volume' columns, plus optional 'vwap' and 'transactions'.
+    timespans : list, optional
+        Timespans to build, out of 'hour' and 'day'. If None, both are built
+        (default is None).
+    timezone : str, optional
+        Time zone of the trading day, e.g., "America/New_York" (default is UTC).
+    session_start : str, optional
+        If given with session_end, only minute bars from this local time of
+        day (inclusive) are aggregated, e.g., "09:30".
+    session_end : str, optional
+        Local time of day (exclusive) at which the session ends, e.g., "16:00".
+
+    Returns:
+    --------
+    dict
+        Dictionary of timespan -> DataFrame of bars with a 'Date' column and
+        the same columns as the input.
+
+    Example:
+    --------
+    >>> bars = aggregate_ohlcv(df_minute, timezone="America/New_York")
+    >>> df_hour, df_day = bars["hour"], bars["day"]
+    """
+
+    if timespans is None:
+        timespans = ["hour", "day"]
+
+    for timespan in timespans:
+        if timespan not in ["hour", "day"]:
+            raise Exception(
+                f"Invalid timespan: {timespan}. Acceptable timespans are: ['hour', 'day']."
+            )
+
+    # Reset index if 'Date' is column is the index
+    if "Date" not in df.columns:
+        df = df.reset_index()
+    if not df["Date"].is_monotonic_increasing:
+        df = df.sort_values(by="Date", kind="mergesort")
+
+    utc = df["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+    # Local wall-clock time, used for day boundaries and the session
+    if timezone is not None:
+        local = (
+            pd.DatetimeIndex(utc.view("datetime64[ns]"))
+            .tz_localize("UTC")
+            .tz_convert(timezone)
+            .tz_localize(None)
+            .asi8
+        )
+    else:
+        local = utc
+
+    keep = None
+    if session_start is not None and session_end is not None:
+        time_of_day = local % DAY_NS
+        keep = (time_of_day >= _time_of_day_ns(session_start)) & (
+            time_of_day < _time_of_day_ns(session_end)
+        )
+        utc = utc[keep]
+        local = local[keep]
+
+    columns = [col for col in df.columns if col != "Date"]
+    arrays = {}
+    for col in columns:
+        values = df[col].to_numpy()
+        arrays[col] = values[keep] if keep is not None else values
+
+    # Carry the traded value so that vwap can be aggregated again
+    if "vwap" in arrays:
+        arrays["notional"] = arrays["vwap"] * arrays["volume"]
+
+    results = {}
+    bars = arrays
+    bar_utc = utc
+    bar_local = local
+
+    for timespan in ["hour", "day"]:
+        if len(bar_utc) == 0:
+            bars = {col: values[:0] for col, values in bars.items()}
+        elif timespan == "hour":
+            key = bar_utc // HOUR_NS
+            bars = _reduce_bars({**bars, "_utc": bar_utc, "_local": bar_local}, key)
+            bar_utc = (key[np.r_[True, key[1:] != key[:-1]]]) * HOUR_NS
+            bar_local = bars.pop("_local") - bars.pop("_utc") + bar_utc
+        else:
+            key = bar_local // DAY_NS
+            bars = _reduce_bars(bars, key)
+            day_start = key[np.r_[True, key[1:] != key[:-1]]] * DAY_NS
+            if timezone is not None:
+                bar_utc = (
+                    pd.DatetimeIndex(day_start.view("datetime64[ns]"))
+                    .tz_localize(timezone)
+                    .tz_convert("UTC")
+                    .tz_localize(None)
+                    .asi8
+                )
+            else:
+                bar_utc = day_start
+            bar_local = day_start
+
+        if timespan in timespans:
+            out = {"Date": bar_utc.view("datetime64[ns]")}
+            for col in columns:
+                if col == "vwap":
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        out[col] = np.where(
+                            bars["volume"] > 0,
+                            bars["notional"] / bars["volume"],
+                            np.nan,
+                        )
+                else:
+                    out[col] = bars[col]
+            results[timespan] = pd.DataFrame(out).astype(
+                {col: df[col].dtype for col in columns if col != "vwap"}
+            )
+
+    return results
+
+
+def validate_ohlcv_aggregation(
+    aggregated_df: pd.DataFrame,
+    provider_df: pd.DataFrame,
+    rtol: float = 1e-6,
+) -> pd.DataFrame:
+    """
+    Compare locally aggregated bars with bars supplied by the data provider.
+
+    Only the provider bars within the date range of the aggregated bars are
+    compared, since the provider history may reach further back than the
+    minute data.
+
+    Parameters:
+    -----------
+    aggregated_df : pd.DataFrame
+        Bars returned by `aggregate_ohlcv`.
+    provider_df : pd.DataFrame
+        Bars of the same timespan downloaded from the provider, with a 'Date'
+        column or index.
+    rtol : float, optional
+        Relative tolerance for a value to count as a match (default is 1e-6).
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame with one row per compared column containing the number of
+        bars compared, the number of mismatches, and the largest relative
+        error. The number of bars found only locally or only at the provider
+        are in `attrs['Only Local']` and `attrs['Only Provider']`, and the
+        number of provider bars outside the compared range in
+        `attrs['Outside Range']`.
+    """
+
+    if "Date" not in provider_df.columns:
+        provider_df = provider_df.reset_index()
+
+    in_range = (provider_df["Date"] >= aggregated_df["Date"].min()) & (
+        provider_df["Date"] <= aggregated_df["Date"].max()
+    )
+    outside_range = int((~in_range).sum())
+    provider_df = provider_df[in_range]
+
+    merged = aggregated_df.merge(
+        provider_df,
+        on="Date",
+        how="outer",
+        suffixes=("_local", "_provider"),
+        indicator=True,
+    )
+    both = merged[merged["_merge"] == "both"]
+
+    summary = []
+    for col in PRICE_COLUMNS + ["volume", "vwap", "transactions"]:
+        if col not in aggregated_df.columns or col not in provider_df.columns:
+            continue
+
+        local = both[f"{col}_local"].to_numpy(dtype="float64")
+        provider = both[f"{col}_provider"].to_numpy(dtype="float64")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative_error = np.abs(local - provider) / np.abs(provider)
+        mismatch = ~np.isclose(local, provider, rtol=rtol, atol=0, equal_nan=True)
+
+        summary.append(
+            {
+                "Column": col,
+                "Bars Compared": len(both),
+                "Mismatches": int(mismatch.sum()),
+                "Max Relative Error": (
+                    float(np.nanmax(relative_error)) if mismatch.any() else 0.0
+                ),
+            }
+        )
+
+    summary_df = pd.DataFrame(summary).set_index("Column")
+    summary_df.attrs["Only Local"] = int((merged["_merge"] == "left_only").sum())
+    summary_df.attrs["Only Provider"] = int((merged["_merge"] == "right_only").sum())
+    summary_df.attrs["Outside Range"] = outside_range
+
+    return summary_df
+
+
+def aggregate_ohlcv_files(
+    base_directory,
+    ticker: str,
+    source: str,
+    asset_class: str,
+    minute_timeframe: str,
+    timeframes: dict,
+    timezone: str,
+    session_start: str,
+    session_end: str,
+    excel_export: bool,
+    pickle_export: bool,
+    parquet_export: bool,
+    output_confirmation: bool,
+    overwrite: bool = False,
+) -> dict:
+    """
+    Build hour and day bars from a stored minute data file and export them in
+    place of downloading them.
+
+    If a file for a timeframe already exists (e.g., bars previously downloaded
+    from the provider), the new bars are validated against it with
+    `validate_ohlcv_aggregation` and the result is printed. If any value does
+    not match, or the existing file has bars within the range of the minute
+    data that were not built locally, the existing files are kept and that
+    timeframe is not exported unless overwrite is True. Existing bars before
+    the first minute bar are kept in the exported files.
+
+    Parameters:
+    -----------
+    base_directory
+        Root path where data is stored.
+    ticker : str
+        Ticker symbol for the data.
+    source : str
+        Name of the data source (e.g., 'Polygon').
+    asset_class : str
+        Asset class name (e.g., 'Equities').
+    minute_timeframe : str
+        Directory of the minute data (e.g., "minute" or "ohlcv-1m").
+    timeframes : dict
+        Dictionary of timespan ('hour' or 'day') -> directory to export to,
+        e.g., {"hour": "hour", "day": "day"} or {"hour": "ohlcv-1h", "day":
+        "ohlcv-1d"}.
+    timezone : str
+        Time zone of the trading day passed to `aggregate_ohlcv`.
+    session_start : str
+        Session start passed to `aggregate_ohlcv`.
+    session_end : str
+        Session end passed to `aggregate_ohlcv`.
+    excel_export : bool
+        If True, export data to Excel format.
+    pickle_export : bool
+        If True, export data to Pickle format.
+    parquet_export : bool
+        If True, export data to Parquet format.
+    output_confirmation : bool
+        If True, print confirmation message.
+    overwrite : bool, optional
+        If True, replace the existing files even if the validation fails
+        (default is False).
+
+    Returns:
+    --------
+    dict
+        Dictionary of timespan -> DataFrame of aggregated bars.
+    """
+
+    df = pd.read_pickle(
+        f"{base_directory}/{source}/{asset_class}/{minute_timeframe}/{ticker}.pkl"
+    )
+
+    bars = aggregate_ohlcv(
+        df,
+        timespans=list(timeframes),
+        timezone=timezone,
+        session_start=session_start,
+        session_end=session_end,
+    )
+
+    for timespan, timeframe in timeframes.items():
+        directory = f"{base_directory}/{source}/{asset_class}/{timeframe}"
+        os.makedirs(directory, exist_ok=True)
+
+        export_df = bars[timespan]
+
+        # Validate against the existing (provider) bars before replacing them
+        if os.path.exists(f"{directory}/{ticker}.pkl"):
+            provider_df = pd.read_pickle(f"{directory}/{ticker}.pkl")
+            if "Date" not in provider_df.columns:
+                provider_df = provider_df.reset_index()
+            validation_df = validate_ohlcv_aggregation(bars[timespan], provider_df)
+            print(f"Validation of {ticker} {timeframe} bars against existing data:")
+            print(validation_df)
+            print(
+                f"Bars only local: {validation_df.attrs['Only Local']}, only existing: {validation_df.attrs['Only Provider']}, existing outside the minute data: {validation_df.attrs['Outside Range']}"
+            )
+
+            # Keep the existing bars if the aggregation does not reproduce them
+            failed = (
+                validation_df["Mismatches"].sum() > 0
+                or validation_df.attrs["Only Provider"] > 0
+            )
+            if failed and overwrite == False:
+                print(
+                    f"Validation failed, keeping the existing {ticker} {timeframe} data. Pass overwrite=True to replace it."
+                )
+                continue
+
+            # Keep the existing history from before the minute data
+            if len(export_df) > 0:
+                export_df = pd.concat(
+                    [
+                        provider_df[provider_df["Date"] < export_df["Date"].min()],
+                        export_df,
+                    ],
+                    ignore_index=True,
+                )
+
+        # Export to Excel
+        if excel_export == True:
+            print(f"Exporting {ticker} {timeframe} data to Excel...")
+            export_df.to_excel(f"{directory}/{ticker}.xlsx", sheet_name="data")
+
+        # Export to Pickle
+        if pickle_export == True:
+            print(f"Exporting {ticker} {timeframe} data to Pickle...")
+            export_df.to_pickle(f"{directory}/{ticker}.pkl")
+
+        # Export to Parquet
+        if parquet_export == True:
+            print(f"Exporting {ticker} {timeframe} data to Parquet...")
+            export_df.to_parquet(f"{directory}/{ticker}.parquet")
+
+        # Output confirmation
+        if output_confirmation == True:
+            print(
+                f"Aggregated {len(df)} minute bars into {len(bars[timespan])} {timeframe} bars for {ticker}."
+            )
+            print(f"--------------------")
+
+    return bars
+
+
+if __name__ == "__main__":
+
+    # Example usage - build hour and day bars from Polygon minute bars
+    aggregate_ohlcv_files(
+        base_directory=DATA_DIR,
+        ticker="SPY",
+        source="Polygon",
+        asset_class="Exchange_Traded_Funds",
+        minute_timeframe="minute",
+        timeframes={"hour": "hour", "day": "day"},
+        timezone="America/New_York",
+        session_start=None,
+        session_end=None,
+        excel_export=False,
+        pickle_export=True,
+        parquet_export=False,
+        output_confirmation=True,
+    )
@@ -1,6 +1,97 @@
 import numpy as np
 import pandas as pd
 
+# Columns of the trades table of a batch of stop levels
+TRADE_COLUMNS = [
+    "trailing_stop_pct",
+    "asset",
+    "entry_time",
+    "entry_type",
+    "entry_price",
+    "exit_time",
+    "exit_type",
+    "exit_price",
+    "quantity",
+    "allocation_pct",
+    "pnl",
+    "return",
+    "cash",
+    "entry_fee",
+    "exit_fee",
+    "cumulative_pnl",
+    "equity",
+    "cumulative_return",
+]
+
+
+def _trailing_stop_exit(
+    open_nparray: np.ndarray,
+    high_nparray: np.ndarray,
+    low_nparray: np.ndarray,
+    start: int,
+    entry_price: float,
+    trailing_stop_pcts: np.ndarray,
+    chunk: int = 256,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the exit bar of a trailing stop starting at bar `start` for one or
+    more stop percentages at once.
+
+    Walks forward in windows that double in size, carrying the running peak
+    from one window to the next, and stops once every stop level has been
+    breached. The running peak does not depend on the stop level, so it is
+    computed once and shared by all of them. The cost is proportional to the
+    longest holding period rather than the length of the remaining price
+    history.
+
+    Returns arrays (exit_index, exit_price, gap), one entry per stop level,
+    where gap is True if the bar opened at or below the stop (exit at open).
+    Stop levels that are never hit have exit_index -1 and exit_price NaN.
+    """
+
+    n = len(open_nparray)
+    num_stops = len(trailing_stop_pcts)
+
+    exit_idx = np.full(num_stops, -1, dtype=np.int64)
+    exit_price = np.full(num_stops, np.nan)
+    gap = np.zeros(num_stops, dtype=bool)
+
+    # Stop levels that have not been hit yet
+    pending = np.arange(num_stops)
+
+    peak = entry_price
+    pos = start
+
+    while pos < n and pending.size:
+        end = min(pos + chunk, n)
+
+        # Running peak (never below entry price)
+        peak_price = np.maximum.accumulate(np.maximum(high_nparray[pos:end], peak))
+        stop_price = peak_price * (1.0 - trailing_stop_pcts[pending])[:, None]
+
+        # Regular breach: low <= stop
+        breach = low_nparray[pos:end] <= stop_price
+        hit = breach.any(axis=1)
+        if hit.any():
+            rows = np.flatnonzero(hit)
+            i = np.argmax(breach[rows], axis=1)
+            bars = pos + i
+            stops = stop_price[rows, i]
+
+            # Gap-breach: open <= stop on the same bar -> exit at open
+            gaps = open_nparray[bars] <= stops
+
+            exit_idx[pending[rows]] = bars
+            exit_price[pending[rows]] = np.where(gaps, open_nparray[bars], stops)
+            gap[pending[rows]] = gaps
+            pending = pending[~hit]
+
+        peak = peak_price[-1]
+        pos = end
+        chunk *= 2
+
+    return exit_idx, exit_price, gap
+
 
 def backtest_rsi_multi_asset_strategy(
     tickers: list,
@@ -8,7 +99,7 @@ def backtest_rsi_multi_asset_strategy(
     signals: pd.DataFrame,
     initial_capital: float,
     rsi_threshold: float,  # kept for signature compatibility (unused here)
-    trailing_stop_pct: float,
+    trailing_stop_pct: float | list,
     ma_days: list,  # kept for signature compatibility (unused here)
     order_entry: str,
     trading_fees: bool,
@@ -20,8 +111,21 @@ def backtest_rsi_multi_asset_strategy(
     - If no exit is found from entry to the end of data, cash is NOT refunded and the
       trade remains open (matching your original implementation).
     - Avoids copying prices_df inside the loop; uses NumPy views for speed.
+    - Signals are walked as NumPy arrays; all signals that fall inside an open
+      trade are skipped with a single binary search.
+    - Exits are found by `_trailing_stop_exit`, which only scans the bars the
+      trade is actually held for.
+    - trailing_stop_pct may be a list of stop levels. All levels are simulated
+      together in one pass over the signals and price arrays, each with its own
+      cash and open-trade state, and the returned trades carry a
+      'trailing_stop_pct' column. Cumulative columns are computed per level.
     """
 
+    if order_entry not in ("market", "limit"):
+        raise ValueError(
+            f"Invalid order_entry: {order_entry}. Must be 'market' or 'limit'."
+        )
+
     # Stable sort; shallow (meta-only) copy to avoid duplicating data
     prices_df = prices.copy(deep=False).sort_values(by="Date", kind="mergesort")
     date_idx = prices_df["Date"].to_numpy()
@@ -39,69 +143,89 @@ def backtest_rsi_multi_asset_strategy(
     signals_sorted_df = signals.copy(deep=False).sort_values(
         by="Date", kind="mergesort"
     )
-    signals_grouped_df = signals_sorted_df.groupby("Date", sort=True)
 
-    # Initialize tracking variables
-    cash = initial_capital
+    # Signal columns as numpy arrays
+    signal_dates = signals_sorted_df["Date"].to_numpy()
+    signal_assets = signals_sorted_df["asset"].to_numpy()
+    signal_allocation = signals_sorted_df["allocation_pct"].to_numpy()
+    signal_open = signals_sorted_df["open"].to_numpy()
+    if order_entry == "limit":
+        signal_high = signals_sorted_df["high"].to_numpy()
+        signal_low = signals_sorted_df["low"].to_numpy()
+        signal_close_prev = signals_sorted_df["close_prev"].to_numpy()
+
+    num_signals = len(signal_dates)
+
+    # Stop levels to simulate together
+    batch = np.ndim(trailing_stop_pct) > 0
+    trailing_stop_pcts = np.atleast_1d(np.asarray(trailing_stop_pct, dtype=float))
+    num_stops = len(trailing_stop_pcts)
+
+    # Initialize tracking variables (one per stop level)
+    cash = np.full(num_stops, float(initial_capital))
 
     # Initialize trading fee
     trade_entry_fee_dec = 0.0
     trade_exit_fee_dec = 0.0
+    if trading_fees:
+        trade_entry_fee_dec = (
+            trade_taker_fee if order_entry == "market" else trade_maker_fee
+        )
+        trade_exit_fee_dec = trade_taker_fee
 
     # Create list for trades
     trades = []
 
     # Start with the first timestamp
-    next_timestamp = prices_df["Date"].iloc[0]
+    next_timestamp = np.full(num_stops, date_idx[0] if len(date_idx) else None)
+
+    # Iterate through signals, one timestamp (group) at a time
+    i = 0
+    while i < num_signals:
+        timestamp = signal_dates[i]
+
+        # Check if signal was during a previous trade for every stop level;
+        # if so, jump past all signals until the earliest exit
+        earliest_next = next_timestamp.min()
+        if timestamp <= earliest_next:
+            i = int(np.searchsorted(signal_dates, earliest_next, side="right"))
+            continue
 
-    # Iterate through signals DataFrame
-    for timestamp, signal_rows in signals_grouped_df:
+        # Stop levels that are free to enter at this timestamp
+        active = np.flatnonzero(next_timestamp < timestamp)
 
-        # Check if signal was during a previous trade
-        if timestamp <= next_timestamp:
-            continue
+        # End of the group of signals at this timestamp
+        group_end = int(np.searchsorted(signal_dates, timestamp, side="right"))
 
         # Iterate over each asset
-        for signal in signal_rows.itertuples(index=False):
+        for k in range(i, group_end):
 
             # -------- ENTRY --------
 
             # Get the ticker
-            ticker = getattr(signal, "asset")
+            ticker = signal_assets[k]
 
             # Set the entry timestamp
-            entry_timestamp = timestamp
+            entry_timestamp = pd.Timestamp(timestamp)
 
             # Get the allocation
-            allocation_pct = getattr(signal, "allocation_pct")
-
-            # Calc capital based on number of assets and allocation_pct
-            capital_to_use = cash / len(tickers) * allocation_pct
-
-            # # Shared capital, scaled by allocation
-            # capital_to_use = (cash / max(1, len(tickers))) * allocation_pct
-            # if capital_to_use <= 0:
-            #     continue
+            allocation_pct = signal_allocation[k]
 
-            # Get entry price and trade entry fee percentage
+            # Get entry price
             # Entry on open for a market order
             if order_entry == "market":
-                entry_price = getattr(signal, "open")
-                if trading_fees:
-                    trade_entry_fee_dec = trade_taker_fee
+                entry_price = signal_open[k]
             # Entry on a limit order set at previous candle close
-            elif order_entry == "limit":
-                close_prev = getattr(signal, "close_prev")
-                high = getattr(signal, "high")
-                low = getattr(signal, "low")
-
-                if close_prev >= low and close_prev <= high:
-                    entry_price = getattr(signal, "close_prev")
-                    if trading_fees:
-                        trade_entry_fee_dec = trade_maker_fee
+            else:
+                close_prev = signal_close_prev[k]
+                if close_prev >= signal_low[k] and close_prev <= signal_high[k]:
+                    entry_price = close_prev
                 else:
                     continue
 
+            # Calc capital based on number of assets and allocation_pct
+            capital_to_use = cash[active] / len(tickers) * allocation_pct
+
             # Calc entry value and entry fee
             entry_value = capital_to_use / (1.0 + trade_entry_fee_dec)
             entry_fee = capital_to_use - entry_value
@@ -110,8 +234,8 @@ def backtest_rsi_multi_asset_strategy(
             quantity = entry_value / entry_price
 
             # Update cash position based on entry
-            cash -= entry_value
-            cash -= entry_fee
+            cash[active] -= entry_value
+            cash[active] -= entry_fee
 
             # -------- EXIT --------
 
@@ -119,95 +243,88 @@ def backtest_rsi_multi_asset_strategy(
             open_nparray, high_nparray, low_nparray = prices_dict[ticker]
 
             # Find signal timestamp in prices date index, start is index value
-            start = np.searchsorted(
-                date_idx, np.datetime64(entry_timestamp), side="left"
-            )
+            start = np.searchsorted(date_idx, timestamp, side="left")
             if start >= len(date_idx):
                 # No bars remain; legacy behavior: keep cash debited, position stays open
                 continue
 
-            # Slices from the price numpy arrays
-            o_sub = open_nparray[start:]
-            h_sub = high_nparray[start:]
-            l_sub = low_nparray[start:]
-            d_sub = date_idx[start:]
-
-            # Running peak (never below entry price)
-            peak_price = np.maximum.accumulate(np.maximum(h_sub, entry_price))
-            stop_price = peak_price * (1.0 - trailing_stop_pct)
-
-            # Gap-breach first: open <= stop and low <= stop -> exit at open
-            gap_idx = np.flatnonzero((l_sub <= stop_price) & (o_sub <= stop_price))
-
-            # Regular breach: low <= stop -> exit at stop price
-            br_idx = np.flatnonzero(l_sub <= stop_price)
-
-            i_gap = int(gap_idx[0]) if gap_idx.size else np.inf
-            i_br = int(br_idx[0]) if br_idx.size else np.inf
-
-            if np.isinf(min(i_gap, i_br)):
-                # ---- LEGACY QUIRK: no exit to end of data -> keep cash debited, stay open
-                continue
-
-            if i_gap <= i_br:
-                # Gap-breach is earlier (or same bar) -> exit at open
-                i = i_gap
-                exit_timestamp = pd.Timestamp(d_sub[i].astype("datetime64[ns]"))
-                exit_price = float(o_sub[i])
-                order_exit = "exit at open (gap)"
-            else:
-                # Regular breach is earlier -> exit at stop level of that bar
-                i = i_br
-                exit_timestamp = pd.Timestamp(d_sub[i].astype("datetime64[ns]"))
-                exit_price = float(stop_price[i])
-                order_exit = "trailing stop"
-
-            # Get trade exit fee percentage
-            if trading_fees:
-                trade_exit_fee_dec = trade_taker_fee
-
-            # Calc exit value and exit fee
-            exit_value = quantity * exit_price
-            exit_fee = exit_value * trade_exit_fee_dec
-
-            # Update cash position based on exit
-            cash += exit_value
-            cash -= exit_fee
-
-            # Calc pnl, return
-            pnl = (exit_value - exit_fee) - (entry_value + entry_fee)
-            return_dec = pnl / capital_to_use
-
-            # Add to trades list
-            trades.append(
-                {
-                    "asset": ticker,
-                    "entry_time": entry_timestamp,
-                    "entry_type": order_entry,
-                    "entry_price": entry_price,
-                    "exit_time": exit_timestamp,
-                    "exit_type": order_exit,
-                    "exit_price": exit_price,
-                    "quantity": quantity,
-                    "allocation_pct": allocation_pct,
-                    "pnl": pnl,
-                    "return": return_dec,
-                    "cash": cash,
-                    "entry_fee": entry_fee,
-                    "exit_fee": exit_fee,
-                }
+            exit_idx, exit_price, gap = _trailing_stop_exit(
+                open_nparray,
+                high_nparray,
+                low_nparray,
+                start,
+                entry_price,
+                trailing_stop_pcts[active],
             )
 
-            # Update next_timestamp
-            next_timestamp = exit_timestamp
+            for j, stop in enumerate(active):
+                if exit_idx[j] < 0:
+                    # ---- LEGACY QUIRK: no exit to end of data -> keep cash debited, stay open
+                    continue
 
-    # Create new dataframe for trades
-    trades_df = pd.DataFrame(trades)
+                exit_timestamp = pd.Timestamp(
+                    date_idx[exit_idx[j]].astype("datetime64[ns]")
+                )
+                order_exit = "exit at open (gap)" if gap[j] else "trailing stop"
+
+                # Calc exit value and exit fee
+                exit_value = quantity[j] * exit_price[j]
+                exit_fee = exit_value * trade_exit_fee_dec
+
+                # Update cash position based on exit
+                cash[stop] += exit_value
+                cash[stop] -= exit_fee
+
+                # Calc pnl, return
+                pnl = (exit_value - exit_fee) - (entry_value[j] + entry_fee[j])
+                return_dec = pnl / capital_to_use[j]
+
+                # Add to trades list
+                trades.append(
+                    {
+                        "trailing_stop_pct": trailing_stop_pcts[stop],
+                        "asset": ticker,
+                        "entry_time": entry_timestamp,
+                        "entry_type": order_entry,
+                        "entry_price": entry_price,
+                        "exit_time": exit_timestamp,
+                        "exit_type": order_exit,
+                        "exit_price": float(exit_price[j]),
+                        "quantity": quantity[j],
+                        "allocation_pct": allocation_pct,
+                        "pnl": pnl,
+                        "return": return_dec,
+                        "cash": cash[stop],
+                        "entry_fee": entry_fee[j],
+                        "exit_fee": exit_fee,
+                    }
+                )
+
+                # Update next_timestamp
+                next_timestamp[stop] = date_idx[exit_idx[j]]
+
+        i = group_end
+
+    # Create new dataframe for trades, grouped by stop level; a batch without
+    # trades still has the columns, so it can be split by stop level
+    if batch and not trades:
+        trades_df = pd.DataFrame(columns=TRADE_COLUMNS)
+    else:
+        trades_df = pd.DataFrame(trades)
 
     # If there are entries, calc cumulative pnl, equity, cumulative return
     if not trades_df.empty:
-        trades_df["cumulative_pnl"] = trades_df["pnl"].cumsum()
+        trades_df = trades_df.sort_values(
+            by="trailing_stop_pct", kind="mergesort"
+        ).reset_index(drop=True)
+        trades_df["cumulative_pnl"] = trades_df.groupby("trailing_stop_pct")[
+            "pnl"
+        ].transform(pd.Series.cumsum)
         trades_df["equity"] = trades_df["cumulative_pnl"] + initial_capital
         trades_df["cumulative_return"] = trades_df["equity"] / initial_capital - 1
 
+    # Single stop level: same columns as before
+    if not batch and not trades_df.empty:
+        trades_df = trades_df.drop(columns=["trailing_stop_pct"])
+
     return trades_df
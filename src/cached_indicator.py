@@ -0,0 +1,82 @@
+import hashlib
+import numpy as np
+import os
+
+from collections import OrderedDict
+from pathlib import Path
+
+# In-process LRU cache of indicator arrays, keyed by the indicator key tuple
+_INDICATOR_CACHE = OrderedDict()
+
+
+def cached_indicator(
+    key: tuple,
+    compute,
+    cache_directory=None,
+    max_entries: int = 64,
+) -> np.ndarray:
+    """
+    Return an indicator array from the cache, computing it only on a miss.
+
+    Lookups go through an in-memory LRU cache first and then, if
+    `cache_directory` is given, through an on-disk tier of `.npy` files that is
+    shared between processes. On a miss in both tiers `compute` is called and
+    the result is stored in both.
+
+    Returned arrays are marked read-only because they are shared between every
+    caller that requests the same key.
+
+    Parameters:
+    -----------
+    key : tuple
+        Key identifying the indicator, e.g.
+        (ticker, first_date, last_date, num_rows, close_hash, "RSI", period).
+        The key must change whenever the input data changes, since the
+        on-disk tier is looked up by the key alone.
+    compute : callable
+        Function with no arguments that returns the indicator values.
+    cache_directory : optional
+        Directory for the on-disk tier. If None, only the in-memory tier is used.
+    max_entries : int, optional
+        Maximum number of arrays held in memory (default is 64).
+
+    Returns:
+    --------
+    np.ndarray
+        Read-only array of indicator values.
+    """
+
+    # ----- In-memory tier -----
+    if key in _INDICATOR_CACHE:
+        _INDICATOR_CACHE.move_to_end(key)
+        return _INDICATOR_CACHE[key]
+
+    values = None
+
+    # ----- On-disk tier -----
+    if cache_directory is not None:
+        file_name = hashlib.md5(repr(key).encode()).hexdigest() + ".npy"
+        file_path = Path(cache_directory) / file_name
+
+        if file_path.exists():
+            values = np.load(file_path)
+        else:
+            values = np.asarray(compute())
+
+            # Write to a temporary file and rename so that concurrent
+            # processes never read a partially written array
+            Path(cache_directory).mkdir(parents=True, exist_ok=True)
+            tmp_path = file_path.with_name(f"{file_name}.tmp-{os.getpid()}.npy")
+            np.save(tmp_path, values)
+            os.replace(tmp_path, file_path)
+
+    if values is None:
+        values = np.asarray(compute())
+
+    values.flags.writeable = False
+
+    _INDICATOR_CACHE[key] = values
+    if len(_INDICATOR_CACHE) > max_entries:
+        _INDICATOR_CACHE.popitem(last=False)
+
+    return values
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def calculate_ma_bank(
+    prices,
+    windows: list,
+) -> dict:
+    """
+    Calculates rolling means for several window lengths from one prefix sum.
+
+    Builds a single cumulative sum of the prices and derives every window mean
+    as a difference of two prefix sums, so the total cost is O(n) per window
+    regardless of window length. Matches
+    `prices.rolling(window=window, min_periods=1).mean()`: NaN prices are
+    skipped and a window with no valid prices is NaN.
+
+    Numerical stability:
+    - The prices are centered on their mean before summing, which keeps the
+      prefix sum close to zero instead of growing with the length of the series.
+    - The rounding error of every addition in the prefix sum is recovered
+      exactly with the TwoSum transformation and accumulated in a second
+      (compensation) prefix sum, which is added back to each window sum.
+
+    Each lagged mean is a view into the same buffer as the mean, shifted by one
+    row, so it costs no additional memory.
+
+    Parameters:
+    -----------
+    prices : array-like or pd.Series
+        Price series.
+    windows : list
+        List of window lengths in rows, e.g., [1440 * 7, 1440 * 14].
+
+    Returns:
+    --------
+    dict
+        Dictionary of window -> (mean, mean_prev) where mean_prev is the mean
+        shifted forward by one row (a read-only view).
+
+    Example:
+    --------
+    >>> bank = calculate_ma_bank(df["BTC-USD_close"], windows=[10_080, 20_160])
+    >>> ma_7d, ma_7d_prev = bank[10_080]
+    """
+
+    values = np.asarray(prices, dtype=np.float64)
+    n = len(values)
+
+    valid = ~np.isnan(values)
+    center = values[valid].mean() if valid.any() else 0.0
+    x = np.where(valid, values - center, 0.0)
+
+    # Prefix sums with a leading zero so that window sums are cs[t+1] - cs[t+1-w]
+    cs = np.zeros(n + 1)
+    np.cumsum(x, out=cs[1:])
+
+    # TwoSum: exact rounding error of each cs[i] = cs[i-1] + x[i]
+    a = cs[:-1]
+    s = cs[1:]
+    bb = s - a
+    err = (a - (s - bb)) + (x - bb)
+    comp = np.zeros(n + 1)
+    np.cumsum(err, out=comp[1:])
+
+    counts = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(valid, out=counts[1:])
+
+    bank = {}
+    for window in windows:
+        # Window sums as differences of prefix sums, using slices (no gathers)
+        lag = min(window, n)
+        window_sum = cs[1:].copy()
+        window_sum[lag:] -= cs[1 : n + 1 - lag]
+        window_comp = comp[1:].copy()
+        window_comp[lag:] -= comp[1 : n + 1 - lag]
+        window_sum += window_comp
+
+        window_count = counts[1:].copy()
+        window_count[lag:] -= counts[1 : n + 1 - lag]
+
+        # One extra leading row holds the NaN for the lagged view
+        buffer = np.empty(n + 1)
+        buffer[0] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(window_sum, window_count, out=buffer[1:])
+        buffer[1:] += center
+        buffer[1:][window_count == 0] = np.nan
+        buffer.flags.writeable = False
+
+        bank[window] = (buffer[1:], buffer[:-1])
+
+    return bank
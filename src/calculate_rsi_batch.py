@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from calculate_rsi import calculate_rsi
+
+
+def _ewm_scan(
+    values: np.ndarray,
+    alphas: np.ndarray,
+    start: int,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Exponentially weighted mean (adjust=False) of a 1-D array for several
+    smoothing factors at once, returned as a (time x alpha) array.
+
+    The recursion y[t] = (1 - a) * y[t-1] + a * x[t] is evaluated in closed
+    form block by block:
+
+        y[j] = b^(j+1) * c + a * b^j * cumsum(b^(-s) * x[s])
+
+    where b = 1 - a and c is the carry from the previous block. The block
+    length is chosen so that b^(-s) never overflows in `dtype`.
+    """
+
+    values = values.astype(dtype, copy=False)
+    alphas = alphas.astype(dtype)
+
+    n = len(values)
+    out = np.full((n, len(alphas)), np.nan, dtype=dtype)
+    if start >= n:
+        return out
+
+    betas = 1.0 - alphas
+
+    # alpha = 1 (period of 1) is the identity; avoid dividing by zero below
+    safe_betas = np.where(betas > 0, betas, 1.0)
+
+    # Largest block length for which b^(-L) stays well inside the dtype range
+    block = int(0.5 * np.log(np.finfo(dtype).max) / -np.log(safe_betas.min()))
+    block = max(1, min(block, 4096))
+
+    steps = np.arange(block, dtype=dtype)[:, None]
+    inv_pow = safe_betas**-steps  # b^(-s)
+    pow_j = safe_betas**steps  # b^j
+    pow_j1 = pow_j * safe_betas  # b^(j+1)
+
+    # First observation initializes the average
+    carry = np.full(len(alphas), values[start], dtype=dtype)
+    out[start] = carry
+
+    pos = start + 1
+    while pos < n:
+        end = min(pos + block, n)
+        m = end - pos
+        x = values[pos:end, None]
+        acc = np.cumsum(x * inv_pow[:m], axis=0)
+        y = pow_j1[:m] * carry + alphas * pow_j[:m] * acc
+        out[pos:end] = y
+        carry = y[-1]
+        pos = end
+
+    # Period of 1: the average is the value itself
+    out[start:, betas <= 0] = values[start:, None]
+
+    return out
+
+
+def calculate_rsi_batch(
+    prices,
+    periods: list,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Calculates the Relative Strength Index (RSI) for several periods in one pass.
+
+    Uses the same Wilder smoothing as `calculate_rsi` (an exponentially weighted
+    mean with alpha = 1 / period and adjust=False) and returns every period as
+    one column of a 2-D array, instead of building a separate Series per period.
+
+    Leading NaN prices are allowed. If the prices contain NaN values after the
+    first valid price, pandas re-weights the average across the gap, which this
+    engine does not replicate; in that case each period falls back to
+    `calculate_rsi`.
+
+    Parameters:
+    -----------
+    prices : array-like or pd.Series
+        Price series.
+    periods : list
+        List of RSI lookback periods, e.g., [6, 8, 10, 12, 14].
+    dtype : optional
+        Data type used for the computation and the returned array, e.g.,
+        np.float32 to halve the memory of the temporaries and the result
+        (default is np.float64).
+
+    Returns:
+    --------
+    np.ndarray
+        Array of shape (len(prices), len(periods)) with one RSI column per period.
+
+    Example:
+    --------
+    >>> rsi = calculate_rsi_batch(df["BTC-USD_close"], periods=[6, 14, 24])
+    """
+
+    values = np.asarray(prices, dtype=np.float64)
+    periods = list(periods)
+
+    valid = np.flatnonzero(~np.isnan(values))
+    if valid.size == 0:
+        return np.full((len(values), len(periods)), np.nan, dtype=dtype)
+
+    # Interior gaps: fall back to the pandas implementation
+    if valid[-1] - valid[0] + 1 != valid.size:
+        series = pd.Series(values)
+        return np.column_stack(
+            [calculate_rsi(series, period=p).to_numpy() for p in periods]
+        ).astype(dtype)
+
+    delta = np.diff(values, prepend=np.nan)
+    gain = np.clip(delta, 0, None)
+    loss = -np.clip(delta, None, 0)
+
+    alphas = 1.0 / np.asarray(periods, dtype=np.float64)
+
+    # First non-NaN change initializes the averages
+    start = valid[0] + 1
+    avg_gain = _ewm_scan(gain, alphas, start, dtype)
+    avg_loss = _ewm_scan(loss, alphas, start, dtype)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+
+    return rsi.astype(dtype, copy=False)
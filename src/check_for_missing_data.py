@@ -1,5 +1,4 @@
-import pandas as pd
-
+from data_quality_index import count_missing_by_month, detect_gaps
 from load_data import load_data
 from settings import config
 
@@ -7,6 +6,7 @@ from settings import config
 DATA_DIR = config("DATA_DIR")
 
 # This script checks for missing timestamps in a DataFrame loaded from a pickle file.
+# To check every stored series at once, use `scan_data_quality` in data_quality_index.py.
 
 # Load the pickle file
 df = load_data(
@@ -23,58 +23,29 @@ print(f"Full data: {df}")
 # Reset the index
 df = df.reset_index(drop=False)
 
-# Ensure the timestamp is datetime type
-df["Date"] = pd.to_datetime(df["Date"])
-
-# Sort by time (important for detecting gaps)
-df = df.sort_values(by="Date", ascending=True)
-
-# Set expected frequency (adjust as needed:
-# 'min' for minute
-# 'h' for hourly
-# 'D' for daily
-expected_freq = "min"
-
-# Create a complete range
-full_range = pd.date_range(
-    start=df["Date"].min(), end=df["Date"].max(), freq=expected_freq
-)
+# Set expected spacing of the timestamps in seconds (adjust as needed:
+# 60 for minute
+# 3600 for hourly
+# 86400 for daily
+expected_step_seconds = 60
 
-# Detect missing timestamps
-missing = full_range.difference(df["Date"])
+# Detect runs of missing timestamps
+gaps_df = detect_gaps(df["Date"], expected_step_seconds)
 
 # Summary
-print(f"\nTotal expected timestamps: {len(full_range)}")
-print(f"Total actual timestamps: {df.shape[0]}")
-print(f"Missing timestamps: {len(missing)}")
+print(f"\nTotal actual timestamps: {df.shape[0]}")
+print(f"Missing timestamps: {gaps_df['Missing'].sum()}")
+print(f"Gaps: {len(gaps_df)}")
 
-# Convert to DataFrame for grouping
-missing_df = pd.DataFrame({"missing_timestamp": missing})
-missing_df["year"] = missing_df["missing_timestamp"].dt.year
-missing_df["month"] = missing_df["missing_timestamp"].dt.month
-
-print(f"Missing data: {missing_df}")
+print(f"Missing data: {gaps_df}")
 
 # Count missing timestamps by year and month
-missing_by_year_month = (
-    missing_df.groupby(["year", "month"]).size().reset_index(name="missing_count")
-)
-
-# Generate all year-month combinations in your date range
-years = range(df["Date"].min().year, df["Date"].max().year + 1)
-months = range(1, 13)
-all_combinations = pd.MultiIndex.from_product([years, months], names=["year", "month"])
-
-# Reindex to force inclusion
-missing_by_year_month = (
-    missing_by_year_month.set_index(["year", "month"])
-    .reindex(all_combinations, fill_value=0)
-    .reset_index()
-)
+missing_by_year_month = count_missing_by_month(df["Date"], expected_step_seconds)
 
 # Pivot for nicer display
 pivot_table = (
-    missing_by_year_month.pivot(index="year", columns="month", values="missing_count")
+    missing_by_year_month.pivot(index="year", columns="month", values="Missing")
+    .reindex(columns=range(1, 13))
     .fillna(0)
     .astype(int)
 )
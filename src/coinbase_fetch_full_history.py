@@ -1,8 +1,9 @@
 import pandas as pd
-import time
 
 from coinbase_fetch_historical_candles import coinbase_fetch_historical_candles
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from token_bucket import AdaptiveTokenBucket
 
 
 def coinbase_fetch_full_history(
@@ -10,10 +11,21 @@ def coinbase_fetch_full_history(
     start: datetime,
     end: datetime,
     granularity: int,
+    max_workers: int = 8,
+    requests_per_second: float = 10,
+    on_chunk=None,
+    rate_limiter=None,
 ) -> pd.DataFrame:
     """
     Fetch full historical data for a given product from Coinbase Exchange API.
 
+    The range is split up front into windows of at most 300 candles (the API
+    limit per request), which are fetched concurrently by a thread pool over
+    a pooled HTTP session. Requests are paced by an adaptive rate limiter that
+    slows down when the API responds with HTTP 429 and speeds back up as
+    requests succeed. Windows without data are skipped, so a gap in the
+    history does not end the download.
+
     Parameters:
     -----------
     product_id : str
@@ -24,6 +36,18 @@ def coinbase_fetch_full_history(
         End time in UTC.
     granularity : int
         Time slice in seconds (e.g., 3600 for hourly candles).
+    max_workers : int, optional
+        Number of concurrent requests (default is 8).
+    requests_per_second : float, optional
+        Starting and maximum request rate (default is 10, the public endpoint
+        limit).
+    on_chunk : callable, optional
+        Function called with the DataFrame of each window, in chronological
+        order, as soon as that window and all earlier windows have completed,
+        e.g., to write the data while later windows are still downloading.
+    rate_limiter : AdaptiveTokenBucket, optional
+        Rate limiter shared with other downloads. If None, a new limiter
+        starting at requests_per_second is used.
 
     Returns:
     --------
@@ -31,21 +55,57 @@ def coinbase_fetch_full_history(
         DataFrame containing time, low, high, open, close, volume.
     """
 
-    all_data = []
+    # Pre-compute every window; each one overlaps the next by one candle,
+    # which is dropped when the windows are handed over
+    window_length = timedelta(seconds=granularity * 300)
+    windows = []
     current_start = start
-
     while current_start < end:
-        current_end = min(
-            current_start + timedelta(seconds=granularity * 300), end
-        )  # Fetch max 300 candles per request
-        df = coinbase_fetch_historical_candles(
-            product_id, current_start, current_end, granularity
+        current_end = min(current_start + window_length, end)
+        windows.append((current_start, current_end))
+        current_start = current_end
+
+    if rate_limiter is None:
+        rate_limiter = AdaptiveTokenBucket(
+            rate=requests_per_second, capacity=requests_per_second
         )
-        if df.empty:
-            break
-        all_data.append(df)
-        current_start = df["time"].iloc[-1] + timedelta(seconds=granularity)
-        time.sleep(0.2)  # Small delay to respect rate limits
+
+    results = {}
+    next_window = 0
+    all_data = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                coinbase_fetch_historical_candles,
+                product_id,
+                window_start,
+                window_end,
+                granularity,
+                rate_limiter,
+            ): idx
+            for idx, (window_start, window_end) in enumerate(windows)
+        }
+
+        try:
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+                # Hand over every window that is now complete in order
+                while next_window in results:
+                    df = results.pop(next_window)
+                    next_window += 1
+                    if all_data:
+                        df = df[df["time"] > all_data[-1]["time"].iloc[-1]]
+                    if df.empty:
+                        continue
+                    all_data.append(df)
+                    if on_chunk is not None:
+                        on_chunk(df)
+        except Exception:
+            # Do not start the remaining windows after a failed window
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
     if all_data:
         full_df = pd.concat(all_data).reset_index(drop=True)
@@ -1,8 +1,27 @@
 import pandas as pd
 import requests
+import threading
 import time
 
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP session so that connections (and TLS handshakes) are reused
+# across calls and threads
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_session(pool_size: int = 32) -> requests.Session:
+    """Return the shared session, creating it on first use."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            _SESSION = session
+    return _SESSION
 
 
 def coinbase_fetch_historical_candles(
@@ -10,10 +29,15 @@ def coinbase_fetch_historical_candles(
     start: datetime,
     end: datetime,
     granularity: int,
+    rate_limiter=None,
 ) -> pd.DataFrame:
     """
     Fetch historical candle data for a given product from Coinbase Exchange API.
 
+    Requests go through a pooled HTTP session shared by every call, so
+    repeated calls reuse open connections instead of opening a new one each
+    time.
+
     Parameters:
     -----------
     product_id : str
@@ -24,6 +48,10 @@ def coinbase_fetch_historical_candles(
         End time in UTC.
     granularity : int
         Time slice in seconds (e.g., 60 for minute candles, 3600 for hourly candles, 86,400 for daily candles).
+    rate_limiter : AdaptiveTokenBucket, optional
+        Rate limiter shared with other requests. If given, a token is acquired
+        before each attempt, and the limiter is slowed down on HTTP 429
+        responses and sped up again on successful requests.
 
     Returns:
     --------
@@ -42,11 +70,17 @@ def coinbase_fetch_historical_candles(
     retry_delay = 1  # initial delay in seconds
 
     for attempt in range(max_retries):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = _get_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
 
+            if rate_limiter is not None:
+                rate_limiter.on_success()
+
             # Coinbase Exchange API returns data in reverse chronological order
             data = data[::-1]
 
@@ -59,6 +93,8 @@ def coinbase_fetch_historical_candles(
 
         except requests.exceptions.HTTPError as errh:
             if response.status_code == 429:
+                if rate_limiter is not None:
+                    rate_limiter.on_throttle()
                 print(f"Rate limit exceeded. Retrying in {retry_delay} seconds...")
                 time.sleep(retry_delay)
                 retry_delay *= 2  # Exponential backoff
@@ -0,0 +1,83 @@
+from coinbase_fetch_historical_candles import coinbase_fetch_historical_candles
+from datetime import datetime, timedelta
+
+
+def coinbase_find_listing_start(
+    product_id: str,
+    lower: datetime,
+    upper: datetime,
+) -> datetime:
+    """
+    Find the first day with data for a given product from Coinbase Exchange API.
+
+    Bisects the days between `lower` and `upper` with single daily candle
+    requests, assuming that once a product is listed it has a daily candle on
+    every following day. Finding the listing day takes about log2 of the
+    number of days requests, e.g., 12 requests for 10 years, instead of
+    downloading the full range.
+
+    The search assumes the product was never delisted or paused between
+    `lower` and `upper`. Days without a candle after the listing (e.g., a
+    trading halt) can make it return a day after the actual listing day.
+
+    Parameters:
+    -----------
+    product_id : str
+        The trading pair (e.g., 'BTC-USD').
+    lower : datetime
+        Earliest day to search from in UTC.
+    upper : datetime
+        Latest day to search up to in UTC.
+
+    Returns:
+    --------
+    datetime
+        First day with data (midnight UTC), `lower` if the product already has
+        data on that day, or None if there is no data on `upper`.
+    """
+
+    lower = datetime(lower.year, lower.month, lower.day)
+    upper = datetime(upper.year, upper.month, upper.day)
+
+    def _has_data(day: datetime) -> bool:
+        # Window covering only the daily candle that starts at midnight
+        df = coinbase_fetch_historical_candles(
+            product_id,
+            day,
+            day + timedelta(days=1) - timedelta(seconds=1),
+            granularity=86_400,
+        )
+        return not df.empty
+
+    if _has_data(lower):
+        return lower
+
+    if not _has_data(upper):
+        print(f"No data available for {product_id} through {upper.date()}.")
+        return None
+
+    # Invariant: no data on lo, data on hi
+    lo, hi = 0, (upper - lower).days
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if _has_data(lower + timedelta(days=mid)):
+            hi = mid
+        else:
+            lo = mid
+
+    listing_start = lower + timedelta(days=hi)
+    print(f"First data for {product_id} found on {listing_start.date()}.")
+
+    return listing_start
+
+
+if __name__ == "__main__":
+
+    # Example usage
+    listing_start = coinbase_find_listing_start(
+        product_id="SOL-USD",
+        lower=datetime(2015, 1, 1),
+        upper=datetime.now() - timedelta(days=1),
+    )
+
+    print(listing_start)
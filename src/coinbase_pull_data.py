@@ -4,13 +4,80 @@ import pandas as pd
 
 from coinbase_fetch_available_products import coinbase_fetch_available_products
 from coinbase_fetch_full_history import coinbase_fetch_full_history
+from coinbase_find_listing_start import coinbase_find_listing_start
+from coinbase_refresh_universe import GRANULARITY_TIMEFRAMES, coinbase_refresh_universe
 from datetime import datetime, timedelta
+from load_data import load_data
+from pathlib import Path
 from settings import config
 
 # Get the data directory from the configuration
 DATA_DIR = config("DATA_DIR")
 
 
+def _sync_pickle_with_dataset(
+    base_directory,
+    source: str,
+    asset_class: str,
+    time_length: str,
+    product: str,
+    excel_export: bool,
+    pickle_export: bool,
+):
+    """
+    Append the rows of a product's partitioned Parquet dataset that are newer
+    than its pickle file to the pickle (and Excel) file. Only the partitions
+    after the last date in the pickle are read from the dataset, but the full
+    pickle is read and rewritten.
+    """
+
+    directory = Path(base_directory) / source / asset_class / time_length
+    if not (directory / product).is_dir():
+        return
+
+    pickle_path = directory / f"{product}.pkl"
+    if pickle_path.exists():
+        ex_data = pd.read_pickle(pickle_path)
+        if "Date" in ex_data.columns:
+            ex_data = ex_data.set_index("Date")
+        last_date = ex_data.index.max()
+    else:
+        ex_data = None
+        last_date = None
+
+    new_data = load_data(
+        base_directory=base_directory,
+        ticker=product,
+        source=source,
+        asset_class=asset_class,
+        timeframe=time_length,
+        file_format="parquet",
+        start_date=str(last_date) if last_date is not None else None,
+    )
+    new_data = new_data.set_index("Date")
+    if last_date is not None:
+        new_data = new_data[new_data.index > last_date]
+    if new_data.empty:
+        return
+
+    if ex_data is not None:
+        full_history_df = pd.concat(
+            [ex_data, new_data.reindex(columns=ex_data.columns)]
+        )
+    else:
+        full_history_df = new_data
+
+    if excel_export == True:
+        full_history_df.to_excel(directory / f"{product}.xlsx", sheet_name="data")
+    else:
+        pass
+
+    if pickle_export == True:
+        full_history_df.to_pickle(pickle_path)
+    else:
+        pass
+
+
 def coinbase_pull_data(
     base_directory,
     source: str,
@@ -27,6 +94,8 @@ def coinbase_pull_data(
     - timedelta(
         days=1
     ),  # updates data through 1 day ago due to lag in data availability
+    bulk: bool = False,
+    sync_pickle: bool = False,
 ) -> pd.DataFrame:
     """
     Update existing record or pull full historical data for a given product from Coinbase Exchange API.
@@ -57,6 +126,17 @@ def coinbase_pull_data(
         Start date in UTC (ISO format).
     end_date : str, optional
         End date in UTC (ISO format).
+    bulk : bool, optional
+        If True, refresh the partitioned Parquet datasets of every filtered
+        product at once with `coinbase_refresh_universe` and return its
+        summary. pickle_export and excel_export are ignored unless
+        sync_pickle is True (default is False).
+    sync_pickle : bool, optional
+        With bulk, append the rows the pickle does not have yet from the
+        dataset to the pickle and Excel files (per pickle_export and
+        excel_export) for the readers that load the pickle (e.g.,
+        `load_crypto_data` and the trading bot). This reads and rewrites each
+        full pickle, so it is off by default (default is False).
 
     Returns:
     --------
@@ -78,6 +158,32 @@ def coinbase_pull_data(
     else:
         print("No products found with the specified base and/or quote currencies.")
 
+    if bulk == True:
+        summary_df = coinbase_refresh_universe(
+            base_directory=base_directory,
+            source=source,
+            asset_class=asset_class,
+            products=filtered_products_list,
+            granularities=[granularity],
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+        # Keep the pickle and Excel files in sync with the datasets
+        if sync_pickle == True and (pickle_export == True or excel_export == True):
+            for product in filtered_products_list:
+                _sync_pickle_with_dataset(
+                    base_directory=base_directory,
+                    source=source,
+                    asset_class=asset_class,
+                    time_length=GRANULARITY_TIMEFRAMES[granularity],
+                    product=product,
+                    excel_export=excel_export,
+                    pickle_export=pickle_export,
+                )
+
+        return summary_df
+
     missing_data = []
     omitted_data = []
     num_products = len(filtered_products_list)
@@ -166,68 +272,59 @@ def coinbase_pull_data(
                 f"File not found...downloading the {product} data starting with {starting_year}."
             )
 
-            def get_full_hist(year):
-                try:
-                    # Define the start and end dates
-                    start_date = datetime(year, 1, 1)  # Default start date
-                    end_date = datetime.now() - timedelta(
-                        days=1
-                    )  # Updates data through 1 day ago
-
-                    # Fetch and process the data
-                    full_history_df = coinbase_fetch_full_history(
-                        product, start_date, end_date, granularity
-                    )
-                    full_history_df = full_history_df.rename(columns={"time": "Date"})
-                    full_history_df = full_history_df.sort_values(by="Date")
-
-                    # Iterate through rows to see if the value of the asset ever exceeds a specified threshold
-                    # Default value for the price threshold is 0 USD
-                    # If the price never exceeds this threshold, the asset is omitted from the final list
-                    def find_first_close_above_threshold(full_history_df, threshold=0):
-                        # Ensure 'Date' is the index before proceeding
-                        if "Date" in full_history_df.columns:
-                            full_history_df.set_index("Date", inplace=True)
-                        full_history_df.index = full_history_df.index.tz_localize(None)
-
-                        # Iterate through the DataFrame
-                        for index, row in full_history_df.iterrows():
-                            if row["close"] >= threshold:
-                                print(
-                                    f"First occurrence: {index}, close={row['close']}"
-                                )
-
-                                # Return the filtered DataFrame starting from this row
-                                return full_history_df.loc[index:]
-
-                        # If no value meets the condition, return an empty DataFrame
-                        print(f"Share price never exceeds {threshold} USD.")
-                        omitted_data.append(product)
-                        return None
-
-                    full_history_above_threshold_df = find_first_close_above_threshold(
-                        full_history_df, threshold=0
-                    )
-
-                    return full_history_above_threshold_df
+            # Find the first day with data, no earlier than the starting year
+            listing_start = coinbase_find_listing_start(
+                product_id=product,
+                lower=datetime(starting_year, 1, 1),
+                upper=datetime.now() - timedelta(days=1),
+            )
 
-                except KeyError:
+            # Default value for the price threshold is 0 USD
+            # If the price never exceeds this threshold, the asset is omitted from the final list
+            def find_first_close_above_threshold(full_history_df, threshold=0):
+                # Ensure 'Date' is the index before proceeding
+                if "Date" in full_history_df.columns:
+                    full_history_df.set_index("Date", inplace=True)
+                full_history_df.index = full_history_df.index.tz_localize(None)
+
+                # First row with a close at or above the threshold
+                above = full_history_df["close"].to_numpy() >= threshold
+                if above.any():
+                    first = above.argmax()
                     print(
-                        f"KeyError: No data available for {product} in {year}. Trying next year..."
+                        f"First occurrence: {full_history_df.index[first]}, close={full_history_df['close'].iloc[first]}"
                     )
-                    next_year = year + 1
 
-                    # Base case: Stop if the next year exceeds the current year
-                    if next_year > datetime.now().year:
-                        print("No more data available for any future years.")
-                        missing_data.append(product)
-                        return None
+                    # Return the filtered DataFrame starting from this row
+                    return full_history_df.iloc[first:]
+
+                # If no value meets the condition, return None
+                print(f"Share price never exceeds {threshold} USD.")
+                omitted_data.append(product)
+                return None
 
-                    # Recursive call for the next year
-                    return get_full_hist(year=next_year)
+            if listing_start is None:
+                missing_data.append(product)
+                full_history_df = None
+            else:
+                # Fetch and process the data from the listing day through 1 day ago
+                full_history_df = coinbase_fetch_full_history(
+                    product,
+                    listing_start,
+                    datetime.now() - timedelta(days=1),
+                    granularity,
+                )
 
-            # Fetch the full history starting from the given year
-            full_history_df = get_full_hist(year=starting_year)
+                if full_history_df.empty:
+                    print(f"No data available for {product}.")
+                    missing_data.append(product)
+                    full_history_df = None
+                else:
+                    full_history_df = full_history_df.rename(columns={"time": "Date"})
+                    full_history_df = full_history_df.sort_values(by="Date")
+                    full_history_df = find_first_close_above_threshold(
+                        full_history_df, threshold=0
+                    )
 
             if full_history_df is not None:
 
@@ -0,0 +1,376 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+
+from coinbase_fetch_full_history import coinbase_fetch_full_history
+from coinbase_find_listing_start import coinbase_find_listing_start
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from data_quality_index import query_gaps, scan_series
+from datetime import datetime, timedelta
+from export_parquet_partitioned import export_parquet_partitioned
+from pathlib import Path
+from settings import config
+from token_bucket import AdaptiveTokenBucket
+
+# Get the data directory from the configuration
+DATA_DIR = config("DATA_DIR")
+
+# Directory name used for each granularity
+GRANULARITY_TIMEFRAMES = {60: "Minute", 3600: "Hourly", 86400: "Daily"}
+
+
+def _last_stored_date(dataset_path: Path):
+    """Last date in a partitioned dataset, reading only the last partition."""
+
+    partitions = sorted(
+        (int(month_dir.parent.name.split("=")[1]), int(month_dir.name.split("=")[1]))
+        for month_dir in dataset_path.glob("year=*/month=*")
+    )
+    if not partitions:
+        return None
+
+    year, month = partitions[-1]
+    table = pq.read_table(
+        dataset_path / f"year={year}" / f"month={month}", columns=["Date"]
+    )
+    if table.num_rows == 0:
+        return None
+
+    return pd.Timestamp(table.column("Date").to_pandas().max())
+
+
+def _merge_ranges(work_queue: list) -> dict:
+    """
+    Group the work queue by (product, granularity) and merge overlapping or
+    adjacent ranges, so that no candle is requested twice.
+    """
+
+    merged = {}
+    for product, granularity, start, end in sorted(work_queue):
+        ranges = merged.setdefault((product, granularity), [])
+        if ranges and start <= ranges[-1][1] + timedelta(seconds=granularity):
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        else:
+            ranges.append((start, end))
+
+    return merged
+
+
+def _prepare_candles(df: pd.DataFrame) -> pd.DataFrame:
+    """Fetched candles as dataset rows: sorted, unique Date and float prices."""
+
+    df = df.rename(columns={"time": "Date"})
+    df = df.drop_duplicates(subset="Date").sort_values(by="Date")
+    return df.astype(
+        {
+            "Date": "datetime64[ns]",
+            **{col: "float64" for col in ["low", "high", "open", "close", "volume"]},
+        }
+    )
+
+
+def _commit_new_rows(
+    df: pd.DataFrame, dataset_path: Path, last_date, gaps: list = None
+) -> int:
+    """
+    Append the rows after `last_date`, and the rows inside any of `gaps`, to
+    the dataset as one new file per year/month partition.
+
+    All files are first written under hidden temporary names (which the
+    Parquet dataset reader ignores) and then renamed into place in
+    chronological order, so an interrupted commit never leaves a hole before
+    the last stored candle and is resumed by the next refresh.
+    """
+
+    if last_date is not None:
+        keep = df["Date"] > last_date
+        for gap_start, gap_end in gaps or []:
+            keep |= (df["Date"] >= gap_start) & (df["Date"] <= gap_end)
+        df = df[keep]
+    if df.empty:
+        return 0
+
+    pending = []
+    for (year, month), month_df in df.groupby(
+        [df["Date"].dt.year, df["Date"].dt.month], sort=True
+    ):
+        month_dir = dataset_path / f"year={year}" / f"month={month}"
+        month_dir.mkdir(parents=True, exist_ok=True)
+
+        file_name = f"part-{month_df['Date'].iloc[0]:%Y%m%d%H%M%S}.parquet"
+        tmp_path = month_dir / f".{file_name}.tmp-{os.getpid()}"
+        month_df.to_parquet(tmp_path, index=False)
+        pending.append((tmp_path, month_dir / file_name))
+
+    for tmp_path, file_path in pending:
+        os.replace(tmp_path, file_path)
+
+    return len(df)
+
+
+def coinbase_refresh_universe(
+    base_directory,
+    source: str,
+    asset_class: str,
+    products: list,
+    granularities: list,
+    start_date: datetime,
+    end_date: datetime,
+    max_workers: int = 4,
+    max_workers_per_product: int = 4,
+    requests_per_second: float = 10,
+    fill_gaps: bool = False,
+) -> pd.DataFrame:
+    """
+    Bring the partitioned Parquet datasets of many Coinbase products up to date.
+
+    Builds a work queue of (product, granularity, missing range) from the last
+    stored candle of each dataset, merges overlapping requests (e.g., a product
+    listed twice), and runs the queue through a thread pool sharing one
+    adaptive rate limiter. Only the last partition of each dataset is read,
+    and each product's new rows are committed as new files in the partitions
+    they belong to (see `_commit_new_rows`), so the cost of a refresh grows
+    with the number of new candles rather than the number of stored ones. The
+    candles after the last stored one are committed a month at a time as the
+    windows complete, so an interrupted download keeps every finished month.
+
+    Datasets are stored as `base_directory/source/asset_class/timeframe/product`
+    (see `export_parquet_partitioned`). A product without a dataset is
+    converted from its pickle file if one exists, and otherwise downloaded
+    from its listing day (see `coinbase_find_listing_start`) or start_date,
+    whichever is later.
+
+    With fill_gaps, the holes recorded in the data-quality index (see
+    `scan_series`) are added to the work queue as well, and the index of each
+    refreshed product is re-scanned afterwards. Coinbase has no candle for an
+    interval without trades, so such gaps stay in the index and are requested
+    again on every fill.
+
+    Parameters:
+    -----------
+    base_directory
+        Root path to store downloaded data.
+    source : str
+        Name of the data source (e.g., 'Coinbase').
+    asset_class : str
+        Asset class name (e.g., 'Cryptocurrencies').
+    products : list
+        List of trading pairs, e.g., ["BTC-USD", "ETH-USD"].
+    granularities : list
+        List of time slices in seconds, e.g., [60, 3600, 86400].
+    start_date : datetime
+        Start date in UTC for products without existing data.
+    end_date : datetime
+        End date in UTC.
+    max_workers : int, optional
+        Number of (product, granularity) jobs run at once (default is 4).
+    max_workers_per_product : int, optional
+        Number of concurrent requests per job (default is 4).
+    requests_per_second : float, optional
+        Starting and maximum request rate shared by all jobs (default is 10).
+    fill_gaps : bool, optional
+        If True, also re-request the gaps in the stored data from the
+        data-quality index (default is False).
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame with one row per (product, granularity) job containing the
+        requested range, the number of new rows, and any error.
+    """
+
+    # ----- Build the work queue -----
+    work_queue = []
+    last_dates = {}
+    gap_ranges = {}
+    for product in products:
+        for granularity in granularities:
+            timeframe = GRANULARITY_TIMEFRAMES[granularity]
+            dataset_path = (
+                Path(base_directory) / source / asset_class / timeframe / product
+            )
+            pickle_path = dataset_path.with_name(f"{product}.pkl")
+
+            # Bootstrap the partitioned dataset from the existing pickle file
+            if not dataset_path.is_dir() and pickle_path.exists():
+                export_parquet_partitioned(
+                    df=pd.read_pickle(pickle_path),
+                    base_directory=base_directory,
+                    ticker=product,
+                    source=source,
+                    asset_class=asset_class,
+                    timeframe=timeframe,
+                    output_confirmation=False,
+                )
+
+            if (product, granularity) not in last_dates:
+                last_dates[(product, granularity)] = _last_stored_date(dataset_path)
+            last_date = last_dates[(product, granularity)]
+
+            if last_date is not None:
+                range_start = last_date.to_pydatetime() + timedelta(seconds=granularity)
+            else:
+                range_start = start_date
+
+            if range_start < end_date:
+                work_queue.append((product, granularity, range_start, end_date))
+
+            # Holes in the stored data, from the data-quality index
+            if fill_gaps == True and last_date is not None:
+                gap_ranges[(product, granularity)] = query_gaps(
+                    base_directory=base_directory,
+                    source=source,
+                    asset_class=asset_class,
+                    timeframe=timeframe,
+                    ticker=product,
+                    end_date=last_date,
+                )
+                for gap_start, gap_end in gap_ranges[(product, granularity)]:
+                    work_queue.append((product, granularity, gap_start, gap_end))
+
+    jobs = _merge_ranges(work_queue)
+    print(
+        f"Refreshing {len(jobs)} of {len(set(products)) * len(granularities)} product datasets."
+    )
+
+    rate_limiter = AdaptiveTokenBucket(
+        rate=requests_per_second, capacity=requests_per_second
+    )
+
+    def _refresh(product, granularity, ranges):
+        dataset_path = (
+            Path(base_directory)
+            / source
+            / asset_class
+            / GRANULARITY_TIMEFRAMES[granularity]
+            / product
+        )
+        last_date = last_dates[(product, granularity)]
+        gaps = gap_ranges.get((product, granularity))
+
+        new_rows = 0
+        pending = []
+
+        def _commit_complete_months(df):
+            # Commit the windows received so far up to the start of the month
+            # of the latest window, which may still receive candles
+            nonlocal new_rows
+            pending.append(df)
+            first_time = pending[0]["time"].iloc[0]
+            last_time = df["time"].iloc[-1]
+            if (first_time.year, first_time.month) == (last_time.year, last_time.month):
+                return
+
+            data = pd.concat(pending)
+            month_start = pd.Timestamp(last_time.year, last_time.month, 1)
+            new_rows += _commit_new_rows(
+                _prepare_candles(data[data["time"] < month_start]),
+                dataset_path,
+                last_date,
+                gaps,
+            )
+            pending[:] = [data[data["time"] >= month_start]]
+
+        chunks = []
+        for range_start, range_end in ranges:
+            # Skip the range before the listing day of a new product
+            if last_date is None:
+                listing_start = coinbase_find_listing_start(
+                    product_id=product, lower=range_start, upper=range_end
+                )
+                if listing_start is None:
+                    continue
+                range_start = max(range_start, listing_start)
+
+            # Ranges after the last stored candle are committed as they
+            # complete; gap ranges are committed together at the end, since a
+            # partly committed gap would be requested again in full
+            streamed = last_date is None or range_start > last_date
+            df = coinbase_fetch_full_history(
+                product,
+                range_start,
+                range_end,
+                granularity,
+                max_workers=max_workers_per_product,
+                on_chunk=_commit_complete_months if streamed else None,
+                rate_limiter=rate_limiter,
+            )
+            if not streamed and not df.empty:
+                chunks.append(df)
+
+        # Commit the gap rows and the last (incomplete) month
+        chunks.extend(chunk for chunk in pending if not chunk.empty)
+        if chunks:
+            new_rows += _commit_new_rows(
+                _prepare_candles(pd.concat(chunks)), dataset_path, last_date, gaps
+            )
+
+        # Re-scan so that filled gaps are not requested again
+        if fill_gaps == True:
+            scan_series(
+                base_directory,
+                source,
+                asset_class,
+                GRANULARITY_TIMEFRAMES[granularity],
+                product,
+            )
+
+        return new_rows
+
+    summary = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_refresh, product, granularity, ranges): (
+                product,
+                granularity,
+                ranges,
+            )
+            for (product, granularity), ranges in jobs.items()
+        }
+
+        for future in as_completed(futures):
+            product, granularity, ranges = futures[future]
+            record = {
+                "Product": product,
+                "Granularity": granularity,
+                "Start": ranges[0][0],
+                "End": ranges[-1][1],
+            }
+            try:
+                record["New Rows"] = future.result()
+                record["Error"] = None
+                print(
+                    f"Data update complete for {GRANULARITY_TIMEFRAMES[granularity]} {product}: {record['New Rows']} new rows."
+                )
+            except Exception as e:
+                record["New Rows"] = 0
+                record["Error"] = str(e)
+                print(
+                    f"Failed to update {GRANULARITY_TIMEFRAMES[granularity]} {product}: {e}"
+                )
+            summary.append(record)
+
+    summary_df = pd.DataFrame(
+        summary,
+        columns=["Product", "Granularity", "Start", "End", "New Rows", "Error"],
+    )
+    summary_df = summary_df.sort_values(by=["Product", "Granularity"])
+    summary_df = summary_df.reset_index(drop=True)
+
+    return summary_df
+
+
+if __name__ == "__main__":
+
+    # Example usage - refresh minute, hourly, and daily data for the USD pairs
+    summary_df = coinbase_refresh_universe(
+        base_directory=DATA_DIR,
+        source="Coinbase",
+        asset_class="Cryptocurrencies",
+        products=["BTC-USD", "ETH-USD", "SOL-USD", "XRP-USD"],
+        granularities=[60, 3600, 86400],
+        start_date=datetime(2025, 1, 1),
+        end_date=datetime.now() - timedelta(days=1),
+    )
+
+    print(summary_df)
@@ -0,0 +1,407 @@
+import asyncio
+import json
+import logging
+import time
+
+from coinbase.websocket import WSClient
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Order statuses after which an order no longer needs to be tracked
+ORDER_DONE_STATUSES = {"FILLED", "CANCELLED", "EXPIRED", "FAILED"}
+
+# Maximum number of updates kept for orders that are not tracked (yet)
+MAX_UNTRACKED_UPDATES = 100
+
+
+def _order_id(response):
+    """Order id from a create order response (dict or SDK response object)."""
+
+    if not response:
+        return None
+    if hasattr(response, "to_dict"):
+        response = response.to_dict()
+    return response.get("order_id") or (response.get("success_response") or {}).get(
+        "order_id"
+    )
+
+
+def _candle_start(start: str) -> datetime:
+    """Candle start time (unix seconds or ISO 8601) as a naive UTC datetime."""
+
+    if start.isdigit():
+        return datetime.fromtimestamp(int(start), tz=timezone.utc).replace(tzinfo=None)
+    return datetime.fromisoformat(start.rstrip("Z"))
+
+
+class RSIOrderPipeline:
+    """
+    RSI trading bot run as a single asyncio event loop.
+
+    Websocket messages are handled on the loop by `on_message`, which passes
+    candle closes to the indicator stage through a bounded queue. The stages
+    are connected by bounded queues:
+
+        ingest -> indicator (RSI) -> signal -> order placement
+
+    When the market data queue is full the oldest candle is dropped, since
+    only the latest price matters; the later queues apply backpressure
+    instead. Order placement runs the blocking REST calls in a worker thread
+    so the loop keeps receiving messages. Order statuses are updated from the
+    `user` channel, and all state is only touched by the loop, so no locks
+    are needed. Since an order's first updates can arrive before its REST
+    call returns, updates for unknown order ids are kept and applied once
+    the order is tracked.
+
+    The websocket URL and the REST client are parameters, so the pipeline can
+    be run against a local fake server, and every stage is a plain method
+    that can be called directly.
+
+    Parameters:
+    -----------
+    client : RESTClient
+        Client used to place orders (any object with `limit_order_gtc_buy`
+        and `stop_limit_order_gtc_sell`).
+    product_id : str
+        Trading pair, e.g., "BTC-USD".
+    rsi_state : StreamingRSI
+        RSI state, optionally seeded with stored candles.
+    rsi_oversold : float, optional
+        RSI threshold for buy (default is 30).
+    stop_loss_percent : float, optional
+        Stop loss below the buy price in decimal format (default is 0.02).
+    order_size : str, optional
+        Base currency amount per order (default is "0.001").
+    queue_size : int, optional
+        Maximum number of items in each queue (default is 1000).
+    order_book : OrderBook, optional
+        Local order book kept up to date from the `level2` channel. If given,
+        buy limits are placed at the best bid instead of the candle close
+        (default is None).
+    """
+
+    def __init__(
+        self,
+        client,
+        product_id: str,
+        rsi_state,
+        rsi_oversold: float = 30,
+        stop_loss_percent: float = 0.02,
+        order_size: str = "0.001",
+        queue_size: int = 1000,
+        order_book=None,
+    ):
+        self.client = client
+        self.product_id = product_id
+        self.rsi_state = rsi_state
+        self.rsi_oversold = rsi_oversold
+        self.stop_loss_percent = stop_loss_percent
+        self.order_size = order_size
+        self.order_book = order_book
+
+        # Queues between the stages
+        self.market_queue = asyncio.Queue(maxsize=queue_size)
+        self.signal_queue = asyncio.Queue(maxsize=queue_size)
+        self.order_queue = asyncio.Queue(maxsize=queue_size)
+
+        # Open orders by order id, and whether a trade is in progress
+        self.orders = {}
+        self.position_open = False
+
+        # Latest update of each order that is not tracked (yet), by order id
+        self.untracked_updates = OrderedDict()
+
+        # Counters
+        self.candles = 0
+        self.dropped = 0
+
+    # --- INGEST ---
+    def on_message(self, message: str):
+        """Handle a raw websocket message (called by WSClient on the loop)."""
+
+        try:
+            data = json.loads(message)
+            channel = data.get("channel")
+
+            if channel == "candles":
+                for event in data.get("events", []):
+                    candles = sorted(
+                        event.get("candles", []),
+                        key=lambda c: _candle_start(c["start"]),
+                    )
+                    for candle in candles:
+                        if candle.get("product_id", self.product_id) == self.product_id:
+                            self.put_candle(
+                                float(candle["close"]), _candle_start(candle["start"])
+                            )
+
+            elif channel == "l2_data" and self.order_book is not None:
+                self.order_book.on_message(data)
+
+            elif channel == "user":
+                for event in data.get("events", []):
+                    for order in event.get("orders", []):
+                        self.handle_order_update(order)
+
+        except Exception as e:
+            logger.error(f"Error in WebSocket message handler: {e}")
+
+    def put_candle(self, price: float, timestamp: datetime):
+        """Queue a candle close, dropping the oldest one if the queue is full."""
+
+        if self.market_queue.full():
+            self.market_queue.get_nowait()
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Market data queue full. Dropped {self.dropped}.")
+        self.market_queue.put_nowait((price, timestamp))
+
+    def handle_order_update(self, order: dict):
+        """Update an open order from a `user` channel order message."""
+
+        order_id = order.get("order_id")
+        if order_id not in self.orders:
+            # Possibly an order whose REST call has not returned yet; keep the
+            # latest update so that `apply_untracked_updates` can apply it
+            if order_id:
+                self.untracked_updates[order_id] = order
+                self.untracked_updates.move_to_end(order_id)
+                if len(self.untracked_updates) > MAX_UNTRACKED_UPDATES:
+                    self.untracked_updates.popitem(last=False)
+            return
+
+        status = order.get("status")
+        self.orders[order_id]["status"] = status
+        logger.info(f"Order {order_id} status: {status}")
+
+        if status in ORDER_DONE_STATUSES:
+            del self.orders[order_id]
+            if not self.orders:
+                self.position_open = False
+            logger.info(f"Active Orders: {len(self.orders)}")
+
+    # --- INDICATOR ---
+    def update_indicator(self, price: float, timestamp: datetime):
+        """Update the RSI with a candle close and return the RSI."""
+
+        self.candles += 1
+        rsi = self.rsi_state.update(price, timestamp)
+        logger.info(f"Market Data - Time: {timestamp}, Price: {price}")
+
+        return rsi
+
+    async def indicator_stage(self):
+        while True:
+            price, timestamp = await self.market_queue.get()
+            rsi = self.update_indicator(price, timestamp)
+            if self.rsi_state.ready:
+                await self.signal_queue.put((price, timestamp, rsi))
+            self.market_queue.task_done()
+
+    # --- SIGNAL ---
+    def limit_price(self, price: float) -> float:
+        """Buy limit price: the best bid of the order book, else the candle close."""
+
+        if self.order_book is not None and self.order_book.ready:
+            best_bid = self.order_book.best_bid()
+            if best_bid is not None:
+                return best_bid[0]
+
+        return price
+
+    def evaluate_signal(self, price: float, timestamp: datetime, rsi: float):
+        """Return a buy order request if the RSI is oversold and no trade is open."""
+
+        logger.info(f"RSI: {rsi:.2f}, Price: {price}")
+
+        if rsi < self.rsi_oversold and not self.position_open:
+            logger.info(f"RSI below {self.rsi_oversold}. Placing buy order.")
+            self.position_open = True
+            return {
+                "price": self.limit_price(price),
+                "size": self.order_size,
+                "timestamp": timestamp,
+            }
+
+        return None
+
+    async def signal_stage(self):
+        while True:
+            price, timestamp, rsi = await self.signal_queue.get()
+            request = self.evaluate_signal(price, timestamp, rsi)
+            if request is not None:
+                await self.order_queue.put(request)
+            self.signal_queue.task_done()
+
+    # --- ORDER PLACEMENT ---
+    def place_buy_limit_order(self, price, size):
+        """Place a buy limit order."""
+        try:
+            order = self.client.limit_order_gtc_buy(
+                client_order_id=f"buy_{int(time.time())}",
+                product_id=self.product_id,
+                base_size=size,
+                limit_price=str(round(price, 2)),
+            )
+            logger.info(f"Placed buy limit order: {order}")
+            return order
+        except Exception as e:
+            logger.error(f"Error placing buy order: {e}")
+            return None
+
+    def place_stop_limit_sell_order(self, buy_price, size):
+        """Place a stop limit sell order."""
+        stop_price = buy_price * (1 - self.stop_loss_percent)
+        try:
+            order = self.client.stop_limit_order_gtc_sell(
+                client_order_id=f"sell_{int(time.time())}",
+                product_id=self.product_id,
+                base_size=size,
+                limit_price=str(round(stop_price, 2)),
+                stop_price=str(round(stop_price, 2)),
+                stop_direction="STOP_DIRECTION_STOP_DOWN",
+            )
+            logger.info(f"Placed stop limit sell order: {order}")
+            return order
+        except Exception as e:
+            logger.error(f"Error placing stop sell order: {e}")
+            return None
+
+    def track_order(self, response, side: str, price: float, request: dict):
+        """Add a placed order to the open orders and return its id."""
+
+        order_id = _order_id(response)
+        if order_id:
+            self.orders[order_id] = {
+                "order_id": order_id,
+                "type": side,
+                "price": price,
+                "size": request["size"],
+                "timestamp": request["timestamp"],
+                "status": "PENDING",
+            }
+
+        return order_id
+
+    def apply_untracked_updates(self, order_ids: list):
+        """Apply the updates that arrived before these orders were tracked."""
+
+        for order_id in order_ids:
+            order = self.untracked_updates.pop(order_id, None)
+            if order is not None and order_id in self.orders:
+                self.handle_order_update(order)
+
+    async def place_orders(self, request: dict):
+        """Place the buy limit order and its stop loss for an order request."""
+
+        price = request["price"]
+        buy_order = await asyncio.to_thread(
+            self.place_buy_limit_order, price, request["size"]
+        )
+        buy_id = self.track_order(buy_order, "buy", price, request)
+        if not buy_id:
+            if not self.orders:
+                self.position_open = False
+            return
+
+        stop_price = price * (1 - self.stop_loss_percent)
+        sell_order = await asyncio.to_thread(
+            self.place_stop_limit_sell_order, price, request["size"]
+        )
+        sell_id = self.track_order(sell_order, "sell", stop_price, request)
+        logger.info(f"Active Orders: {len(self.orders)}")
+
+        # Updates received while the REST calls were running, applied once
+        # both orders are tracked so that a filled buy does not end the trade
+        # before its stop loss is placed
+        self.apply_untracked_updates([buy_id, sell_id])
+
+    async def order_stage(self):
+        while True:
+            request = await self.order_queue.get()
+            try:
+                await self.place_orders(request)
+            except Exception as e:
+                logger.error(f"Error placing orders: {e}")
+                if not self.orders:
+                    self.position_open = False
+            self.order_queue.task_done()
+
+    def start_stages(self) -> list:
+        """Start the indicator, signal, and order stages as tasks on the loop."""
+
+        return [
+            asyncio.create_task(self.indicator_stage()),
+            asyncio.create_task(self.signal_stage()),
+            asyncio.create_task(self.order_stage()),
+        ]
+
+    async def drain(self):
+        """Wait until every queued item has passed through all the stages."""
+
+        await self.market_queue.join()
+        await self.signal_queue.join()
+        await self.order_queue.join()
+
+    # --- RUN ---
+    async def run(
+        self,
+        ws_url: str,
+        api_key: str = None,
+        api_secret: str = None,
+        channels: list = None,
+    ):
+        """
+        Connect to the websocket, subscribe to the channels, and run the
+        stages until the connection fails after its reconnection attempts
+        (the WSClient exception is raised) or the task is cancelled, e.g.,
+        by Ctrl+C in `asyncio.run`.
+
+        Parameters:
+        -----------
+        ws_url : str
+            Websocket URL, e.g., "wss://advanced-trade-ws.coinbase.com" or a
+            local fake server such as "ws://localhost:8765".
+        api_key : str, optional
+            API key, required for the `user` channel (default is None).
+        api_secret : str, optional
+            API secret, required for the `user` channel (default is None).
+        channels : list, optional
+            Channels to subscribe to. If None, subscribes to "candles" and
+            "heartbeats", to "level2" when there is an order book, and to
+            "user" when API keys are given (default is None).
+        """
+
+        if channels is None:
+            channels = ["candles", "heartbeats"]
+            if self.order_book is not None:
+                channels.append("level2")
+            if api_key and api_secret:
+                channels.append("user")
+
+        ws = WSClient(
+            api_key=api_key,
+            api_secret=api_secret,
+            base_url=ws_url,
+            on_message=self.on_message,
+            on_open=lambda: logger.info("WebSocket opened"),
+            on_close=lambda: logger.info("WebSocket closed"),
+        )
+
+        stages = self.start_stages()
+
+        try:
+            await ws.open_async()
+            await ws.subscribe_async([self.product_id], channels)
+
+            # Raises the message handler's exception once the connection
+            # fails and cannot be reopened
+            await ws.run_forever_with_exception_check_async()
+        finally:
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            if ws.websocket is not None and ws.websocket.open:
+                await ws.close_async()
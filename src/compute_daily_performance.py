@@ -1,15 +1,24 @@
+import numpy as np
 import pandas as pd
 
+DAY_NS = 24 * 3_600 * 1_000_000_000
+
 
 def compute_daily_performance(
     tickers: list,
     data: pd.DataFrame,
     trades: pd.DataFrame,
     initial_capital: int,
+    trailing_stop_pct: float = None,
 ) -> pd.DataFrame:
     """
     Computes daily portfolio equity, return, etc. from trades dataframe.
 
+    The entry and exit events are mapped onto the daily index with
+    `searchsorted`, positions and cash are cumulative sums over the events,
+    and prices are only sampled at the last timestamp of each day, so no
+    intermediate frame the size of the price data is built.
+
     Parameters:
     -----------
     tickers : list
@@ -20,127 +29,140 @@ def compute_daily_performance(
         DataFrame of trades from backtest_rsi_multi_asset_strategy.
     initial_capital : int
         Initial capital for the portfolio.
+    trailing_stop_pct : float, optional
+        Stop level to compute when the trades come from a batch of stop levels
+        and carry a 'trailing_stop_pct' column. May be None if the trades hold
+        a single stop level (default is None).
 
     Returns:
     --------
     pd.DataFrame
         DataFrame containing daily data for the portfolio with equity, cash,
-        returns, positions, drawdowns, and prices.
+        returns, positions, drawdowns, and prices. Empty (with the portfolio
+        columns only) if there are no trades.
     """
 
-    # Copy the data dataframe
-    df = data.copy().set_index("Date")
-
-    # Filter the entry trades
-    entry_trades_df = trades.copy()
-    entry_trades_df = entry_trades_df[
-        ["asset", "entry_time", "entry_price", "quantity", "entry_fee"]
-    ]
-    entry_trades_df["cash"] = (
-        entry_trades_df["entry_price"] * entry_trades_df["quantity"] * -1
-    ) - entry_trades_df["entry_fee"]
-    entry_trades_df["crypto_value"] = (
-        entry_trades_df["quantity"] * entry_trades_df["entry_price"]
-    )
-    entry_trades_df.rename(columns={"entry_time": "Date"}, inplace=True)
-
-    # Filter the exit trades
-    exit_trades_df = trades.copy()
-    exit_trades_df = exit_trades_df[
-        ["asset", "exit_time", "exit_price", "quantity", "exit_fee"]
-    ]
-    exit_trades_df["cash"] = (
-        exit_trades_df["exit_price"] * exit_trades_df["quantity"]
-    ) - exit_trades_df["exit_fee"]
-    exit_trades_df["quantity"] = (
-        exit_trades_df["quantity"] * -1
-    )  # Convert quantity to negative for exit
-    exit_trades_df["crypto_value"] = (
-        exit_trades_df["quantity"] * exit_trades_df["exit_price"]
-    )
-    exit_trades_df.rename(columns={"exit_time": "Date"}, inplace=True)
+    # Trades of a batch of stop levels: keep the requested level only
+    if "trailing_stop_pct" in trades.columns:
+        if trailing_stop_pct is not None:
+            trades = trades[trades["trailing_stop_pct"] == trailing_stop_pct]
+        elif trades["trailing_stop_pct"].nunique() > 1:
+            raise ValueError(
+                "Trades contain several trailing stop levels. Pass trailing_stop_pct to select one."
+            )
+        else:
+            pass
+
+    # No trades: return an empty ledger
+    if trades.empty:
+        return pd.DataFrame(
+            columns=["cash", "equity", "Return", "Cum_Return", "Drawdown"],
+            index=pd.DatetimeIndex([], name="Date").astype(data["Date"].dtype),
+            dtype="float64",
+        )
 
-    # Combine entry and exit trades into a single DataFrame
-    ledger_events_df = pd.concat([entry_trades_df, exit_trades_df], ignore_index=True)
-    ledger_events_df = ledger_events_df.sort_values("Date")
+    # Price data is only read at the last timestamp of each day
+    if not data["Date"].is_monotonic_increasing:
+        data = data.sort_values(by="Date", kind="mergesort")
+    data_times = data["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
 
-    # Create pivot table for quantity held by date per asset
-    quantity_df = ledger_events_df.pivot_table(
-        index="Date",
-        columns="asset",
-        values="quantity",
-        aggfunc="sum",
-    ).fillna(0)
+    # Entry and exit trades as one list of ledger events, sorted by time
+    entry_cash = (trades["entry_price"] * trades["quantity"] * -1) - trades["entry_fee"]
+    exit_cash = (trades["exit_price"] * trades["quantity"]) - trades["exit_fee"]
 
-    quantity_df.columns = [f"{col}_qty" for col in quantity_df.columns]
+    event_times = np.concatenate(
+        [
+            trades["entry_time"].to_numpy(dtype="datetime64[ns]").view("int64"),
+            trades["exit_time"].to_numpy(dtype="datetime64[ns]").view("int64"),
+        ]
+    )
+    event_assets = np.concatenate([trades["asset"].values, trades["asset"].values])
+    event_qtys = np.concatenate(
+        [trades["quantity"].to_numpy(), trades["quantity"].to_numpy() * -1]
+    )
+    event_cash = np.concatenate([entry_cash.to_numpy(), exit_cash.to_numpy()])
+
+    order = np.argsort(event_times, kind="mergesort")
+    event_times = event_times[order]
+    event_assets = event_assets[order]
+    event_qtys = event_qtys[order]
+    event_cash = event_cash[order]
+
+    # Traded assets, in the same order as the pivot of the ledger by asset
+    asset_symbols, asset_idx = np.unique(event_assets, return_inverse=True)
+    asset_symbols = list(asset_symbols)
+
+    # Cumulative quantity per asset and cumulative cash after each event, with
+    # a leading row of zeros for "no events yet"
+    qty_matrix = np.zeros((len(event_times) + 1, len(asset_symbols)))
+    qty_matrix[np.arange(1, len(event_times) + 1), asset_idx] = event_qtys
+    cum_qty = np.cumsum(qty_matrix, axis=0)
+    cum_cash = np.concatenate([[0.0], np.cumsum(event_cash)])
+
+    # Daily index covering every data and event timestamp
+    first_time = (
+        min(data_times[0], event_times[0]) if len(event_times) else data_times[0]
+    )
+    last_time = (
+        max(data_times[-1], event_times[-1]) if len(event_times) else data_times[-1]
+    )
+    day_starts = np.arange(first_time // DAY_NS, last_time // DAY_NS + 1) * DAY_NS
+    day_ends = day_starts + DAY_NS
 
-    # Cash flow dataframe
-    cash_df = ledger_events_df.groupby("Date")["cash"].sum().to_frame()
+    # Last data row and number of events up to the end of each day
+    data_pos = np.searchsorted(data_times, day_ends, side="left") - 1
+    event_pos = np.searchsorted(event_times, day_ends, side="left")
 
-    # Combine quantity and cash dataframes into the ledger
-    ledger_qtys_df = pd.concat([quantity_df, cash_df], axis=1).fillna(0)
-    ledger_qtys_df = ledger_qtys_df.sort_index()
+    has_data = (data_pos >= 0) & (data_times[np.maximum(data_pos, 0)] >= day_starts)
+    has_event = (event_pos > 0) & (
+        event_times[np.maximum(event_pos - 1, 0)] >= day_starts
+    )
 
-    # Isolate the daily close prices for each asset
-    price_cols = [f"{ticker}_close" for ticker in tickers]
-    price_df = df[price_cols].copy()
+    # The day's prices are those of its last timestamp, which are 0 when that
+    # timestamp is an event without price data or the price is missing (NaN)
+    last_data_time = np.where(has_data, data_times[np.maximum(data_pos, 0)], -1)
+    last_event_time = np.where(has_event, event_times[np.maximum(event_pos - 1, 0)], -1)
+    priced = has_data & (last_data_time >= last_event_time)
 
-    # Merge the daily close prices DataFrame into the ledger
-    ledger_qtys_prices_df = ledger_qtys_df.join(price_df, how="outer")
+    empty_day = ~(has_data | has_event)
 
-    # Replace all NaN values with 0
-    ledger_qtys_prices_df.fillna(0, inplace=True)
+    # Sample cash, quantities, and prices at the day boundaries only
+    daily_ledger = {}
+    daily_ledger["cash"] = np.where(
+        empty_day, np.nan, cum_cash[event_pos] + initial_capital
+    )
 
-    # Add columns for each asset's cumulative quantity
-    quantity_cols = [
-        col for col in ledger_qtys_prices_df.columns if col.endswith("_qty")
-    ]
-    for col in quantity_cols:
-        ledger_qtys_prices_df[col] = ledger_qtys_prices_df[col].cumsum()
-
-    # Cumulative cash column
-    ledger_qtys_prices_df["cash"] = ledger_qtys_prices_df["cash"].cumsum()
-
-    # Add initial capital amount to cash to represent initial capital
-    ledger_qtys_prices_df["cash"] += initial_capital
-
-    # Establish position columns for each asset
-    ledger_qtys_prices_pos_df = ledger_qtys_prices_df.copy()
-    for col in quantity_cols:
-        asset_symbol = col.replace("_qty", "")
-        ledger_qtys_prices_pos_df[f"{asset_symbol}_position"] = (
-            ledger_qtys_prices_pos_df[col]
-            * ledger_qtys_prices_pos_df[f"{asset_symbol}_close"]
+    positions = []
+    for i, asset_symbol in enumerate(asset_symbols):
+        close = data[f"{asset_symbol}_close"].to_numpy(dtype="float64")
+        daily_close = np.where(
+            priced, np.nan_to_num(close[np.maximum(data_pos, 0)]), 0.0
         )
+        daily_qty = cum_qty[event_pos, i]
 
-    # Re-arrange the columns to have date, cash, then quantities, prices, positions grouped by asset
-    asset_symbols = []
-    for col in quantity_cols:
-        asset_symbol = col.replace("_qty", "")
-        asset_symbols.append(asset_symbol)
-
-    cols = ["cash"] + [
-        col
-        for ticker in asset_symbols
-        for col in ledger_qtys_prices_pos_df.columns
-        if col.startswith(ticker)
-    ]
-    ledger_qtys_prices_pos_df = ledger_qtys_prices_pos_df[cols]
+        daily_ledger[f"{asset_symbol}_qty"] = np.where(empty_day, np.nan, daily_qty)
+        daily_ledger[f"{asset_symbol}_close"] = np.where(empty_day, np.nan, daily_close)
+        daily_ledger[f"{asset_symbol}_position"] = np.where(
+            empty_day, np.nan, daily_qty * daily_close
+        )
+        positions.append(daily_ledger[f"{asset_symbol}_position"])
 
     # Calculate total portfolio value
-    ledger_qtys_prices_pos_df["equity"] = ledger_qtys_prices_pos_df[
-        "cash"
-    ] + ledger_qtys_prices_pos_df[
-        [col for col in ledger_qtys_prices_pos_df.columns if col.endswith("_position")]
-    ].sum(
-        axis=1
-    )
+    daily_ledger["equity"] = daily_ledger["cash"].copy()
+    for position in positions:
+        daily_ledger["equity"] += np.nan_to_num(position)
+
+    # Day starts are UTC nanoseconds; convert back to the time zone of the data
+    tz = data["Date"].dt.tz
+    if tz is not None:
+        daily_index = pd.to_datetime(day_starts, utc=True).tz_convert(tz)
+    else:
+        daily_index = pd.DatetimeIndex(day_starts.view("datetime64[ns]")).astype(
+            data["Date"].dtype
+        )
+    daily_index.name = "Date"
 
-    # Reindex ledger to daily using last price for the day
-    daily_ledger_qtys_prices_pos_df = ledger_qtys_prices_pos_df.copy()
-    daily_ledger_qtys_prices_pos_df = daily_ledger_qtys_prices_pos_df.resample(
-        "D"
-    ).last()
+    daily_ledger_qtys_prices_pos_df = pd.DataFrame(daily_ledger, index=daily_index)
 
     # Drop the columns where any of the crypto asset prices = 0
     price_cols = [
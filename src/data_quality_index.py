@@ -0,0 +1,402 @@
+import numpy as np
+import os
+import pandas as pd
+import pyarrow.dataset as ds
+
+from datetime import datetime
+from pathlib import Path
+from settings import config
+
+# Get the environment variable for where data is stored
+DATA_DIR = config("DATA_DIR")
+
+# Expected spacing in seconds of the timestamps in each timeframe directory
+TIMEFRAME_SECONDS = {
+    "Minute": 60,
+    "minute": 60,
+    "Hourly": 3_600,
+    "hour": 3_600,
+    "Daily": 86_400,
+    "day": 86_400,
+}
+
+# Directories under the data directory that do not contain price series
+EXCLUDED_DIRECTORIES = {"Cache", "Data_Quality"}
+
+
+def detect_gaps(
+    dates,
+    step_seconds: int,
+) -> pd.DataFrame:
+    """
+    Find the runs of missing timestamps in a series.
+
+    Works on the int64 nanosecond timestamps: a gap is any difference between
+    consecutive timestamps larger than one step, so the cost is O(n) and no
+    complete date range is ever built.
+
+    Parameters:
+    -----------
+    dates : array-like or pd.Series
+        Timestamps of the series, in any order. Duplicates are ignored.
+    step_seconds : int
+        Expected spacing of the timestamps in seconds (e.g., 60 for minute data).
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame with one row per gap containing 'Gap Start' and 'Gap End'
+        (the first and last missing timestamps) and 'Missing' (the number of
+        missing timestamps).
+    """
+
+    t = np.unique(np.asarray(dates, dtype="datetime64[ns]").view("int64"))
+    step = step_seconds * 1_000_000_000
+
+    d = np.diff(t)
+    idx = np.flatnonzero(d > step)
+    missing = (d[idx] - 1) // step
+    gap_start = t[idx] + step
+    gap_end = gap_start + (missing - 1) * step
+
+    return pd.DataFrame(
+        {
+            "Gap Start": gap_start.view("datetime64[ns]"),
+            "Gap End": gap_end.view("datetime64[ns]"),
+            "Missing": missing,
+        }
+    )
+
+
+def count_missing_by_month(
+    dates,
+    step_seconds: int,
+) -> pd.DataFrame:
+    """
+    Count the missing timestamps of a series in every year and month between
+    its first and last timestamp.
+
+    The count for each month is the number of expected timestamps in that
+    month minus the number present, both found with binary searches on the
+    month boundaries, so months without gaps cost nothing extra.
+
+    Parameters:
+    -----------
+    dates : array-like or pd.Series
+        Timestamps of the series, in any order. Duplicates are ignored.
+    step_seconds : int
+        Expected spacing of the timestamps in seconds.
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame with 'year', 'month', and 'Missing' columns, including months
+        without missing timestamps.
+    """
+
+    t = np.unique(np.asarray(dates, dtype="datetime64[ns]").view("int64"))
+    if t.size == 0:
+        return pd.DataFrame({"year": [], "month": [], "Missing": []}, dtype="int64")
+
+    step = step_seconds * 1_000_000_000
+    first, last = t[0], t[-1]
+
+    months = pd.period_range(
+        pd.Timestamp(first).to_period("M"), pd.Timestamp(last).to_period("M"), freq="M"
+    )
+    edges = months.start_time.to_numpy().astype("datetime64[ns]").view("int64")
+    edges = np.clip(np.append(edges, last + 1), first, last + 1)
+
+    # Expected timestamps first + k * step before each edge, and present ones
+    expected_before = -((first - edges) // step)
+    present_before = np.searchsorted(t, edges)
+
+    missing = np.diff(expected_before) - np.diff(present_before)
+
+    return pd.DataFrame(
+        {
+            "year": months.year.to_numpy().astype("int64"),
+            "month": months.month.to_numpy().astype("int64"),
+            "Missing": np.maximum(missing, 0),
+        }
+    )
+
+
+def _series_dates(series_path: Path) -> np.ndarray:
+    """Read only the dates of a pickle file or partitioned Parquet dataset."""
+
+    if series_path.is_dir():
+        dataset = ds.dataset(series_path, format="parquet", partitioning="hive")
+        dates = dataset.to_table(columns=["Date"]).column("Date").to_pandas()
+    else:
+        df = pd.read_pickle(series_path)
+        dates = df["Date"] if "Date" in df.columns else df.index.to_series()
+
+    return pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]")
+
+
+def _series_modified(series_path: Path) -> float:
+    """Last modification time of a pickle file or partitioned Parquet dataset."""
+
+    if series_path.is_dir():
+        return max(
+            (f.stat().st_mtime for f in series_path.rglob("*.parquet")), default=0.0
+        )
+    return series_path.stat().st_mtime
+
+
+def _write_parquet_atomic(df: pd.DataFrame, file_path: Path) -> None:
+    """Write a DataFrame to Parquet through a temporary file and a rename."""
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp-{os.getpid()}")
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, file_path)
+
+
+def _index_path(base_directory, source, asset_class, timeframe, ticker, kind) -> Path:
+    """Path of a per-series gap index file."""
+
+    return (
+        Path(base_directory)
+        / "Data_Quality"
+        / source
+        / asset_class
+        / timeframe
+        / f"{ticker}_{kind}.parquet"
+    )
+
+
+def scan_series(
+    base_directory,
+    source: str,
+    asset_class: str,
+    timeframe: str,
+    ticker: str,
+) -> dict:
+    """
+    Detect the gaps of one stored series and persist its gap index.
+
+    The partitioned Parquet dataset is used if it exists, otherwise the pickle
+    file. Two files are written under
+    `base_directory/Data_Quality/source/asset_class/timeframe/`:
+
+    * `{ticker}_gaps.parquet` with one row per gap (see `detect_gaps`)
+    * `{ticker}_monthly.parquet` with missing counts by year and month (see
+      `count_missing_by_month`)
+
+    Parameters:
+    -----------
+    base_directory
+        Root path where data is stored.
+    source : str
+        Name of the data source (e.g., 'Coinbase').
+    asset_class : str
+        Asset class name (e.g., 'Cryptocurrencies').
+    timeframe : str
+        Timeframe for the data (e.g., 'Minute', 'Daily').
+    ticker : str
+        Ticker symbol for the data.
+
+    Returns:
+    --------
+    dict
+        Summary of the series: first and last date, number of rows, number of
+        missing timestamps, and number of gaps.
+    """
+
+    step_seconds = TIMEFRAME_SECONDS[timeframe]
+
+    series_path = Path(base_directory) / source / asset_class / timeframe / ticker
+    if not series_path.is_dir():
+        series_path = series_path.with_name(f"{ticker}.pkl")
+
+    modified = _series_modified(series_path)
+    dates = _series_dates(series_path)
+
+    gaps_df = detect_gaps(dates, step_seconds)
+    monthly_df = count_missing_by_month(dates, step_seconds)
+
+    _write_parquet_atomic(
+        gaps_df,
+        _index_path(base_directory, source, asset_class, timeframe, ticker, "gaps"),
+    )
+    _write_parquet_atomic(
+        monthly_df,
+        _index_path(base_directory, source, asset_class, timeframe, ticker, "monthly"),
+    )
+
+    return {
+        "Source": source,
+        "Asset Class": asset_class,
+        "Timeframe": timeframe,
+        "Ticker": ticker,
+        "First Date": dates.min() if len(dates) else pd.NaT,
+        "Last Date": dates.max() if len(dates) else pd.NaT,
+        "Rows": len(dates),
+        "Missing": int(gaps_df["Missing"].sum()),
+        "Gaps": len(gaps_df),
+        "Source Modified": modified,
+        "Scanned": datetime.now(),
+    }
+
+
+def scan_data_quality(
+    base_directory,
+    force: bool = False,
+) -> pd.DataFrame:
+    """
+    Scan every stored price series and update the data-quality index.
+
+    Walks `base_directory/source/asset_class/timeframe/` for pickle files and
+    partitioned Parquet datasets with a minute, hourly, or daily timeframe and
+    runs `scan_series` on each. Series that have not been modified since the
+    previous scan are skipped unless force is True. The summary of every
+    series is stored in `base_directory/Data_Quality/index.parquet`.
+
+    For exchange-traded assets the gaps include the times the market is
+    closed (nights, weekends, and holidays).
+
+    Parameters:
+    -----------
+    base_directory
+        Root path where data is stored.
+    force : bool, optional
+        If True, re-scan every series (default is False).
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame with one row per series containing the summary returned by
+        `scan_series`.
+    """
+
+    index_file = Path(base_directory) / "Data_Quality" / "index.parquet"
+
+    previous = {}
+    if index_file.exists() and force == False:
+        previous_df = pd.read_parquet(index_file)
+        for record in previous_df.to_dict("records"):
+            key = (
+                record["Source"],
+                record["Asset Class"],
+                record["Timeframe"],
+                record["Ticker"],
+            )
+            previous[key] = record
+
+    summary = []
+    for source_dir in sorted(Path(base_directory).iterdir()):
+        if not source_dir.is_dir() or source_dir.name in EXCLUDED_DIRECTORIES:
+            continue
+
+        for timeframe_dir in sorted(source_dir.glob("*/*")):
+            if timeframe_dir.name not in TIMEFRAME_SECONDS:
+                continue
+
+            # Pickle files and partitioned datasets, keyed by ticker
+            tickers = {p.stem for p in timeframe_dir.glob("*.pkl")}
+            tickers |= {
+                p.name
+                for p in timeframe_dir.iterdir()
+                if p.is_dir() and any(p.glob("year=*"))
+            }
+
+            for ticker in sorted(tickers):
+                key = (
+                    source_dir.name,
+                    timeframe_dir.parent.name,
+                    timeframe_dir.name,
+                    ticker,
+                )
+
+                series_path = timeframe_dir / ticker
+                if not series_path.is_dir():
+                    series_path = timeframe_dir / f"{ticker}.pkl"
+
+                # Skip series that have not changed since the previous scan
+                if key in previous and previous[key][
+                    "Source Modified"
+                ] == _series_modified(series_path):
+                    summary.append(previous[key])
+                    continue
+
+                print(f"Scanning {'/'.join(key)}...")
+                try:
+                    summary.append(scan_series(base_directory, *key))
+                except Exception as e:
+                    print(f"Failed to scan {'/'.join(key)}: {e}")
+
+    summary_df = pd.DataFrame(summary)
+    _write_parquet_atomic(summary_df, index_file)
+
+    return summary_df
+
+
+def query_gaps(
+    base_directory,
+    source: str,
+    asset_class: str,
+    timeframe: str,
+    ticker: str,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    min_missing: int = 1,
+) -> list:
+    """
+    Return the gaps of a series from its persisted gap index, e.g., so that a
+    fetcher can re-request only the missing ranges.
+
+    Parameters:
+    -----------
+    base_directory
+        Root path where data is stored.
+    source : str
+        Name of the data source (e.g., 'Coinbase').
+    asset_class : str
+        Asset class name (e.g., 'Cryptocurrencies').
+    timeframe : str
+        Timeframe for the data (e.g., 'Minute', 'Daily').
+    ticker : str
+        Ticker symbol for the data.
+    start_date : datetime, optional
+        Only return gaps ending on or after this date.
+    end_date : datetime, optional
+        Only return gaps starting on or before this date.
+    min_missing : int, optional
+        Only return gaps with at least this many missing timestamps (default
+        is 1).
+
+    Returns:
+    --------
+    list
+        List of (gap start, gap end) datetime tuples, or an empty list if the
+        series has not been scanned.
+    """
+
+    gaps_file = _index_path(
+        base_directory, source, asset_class, timeframe, ticker, "gaps"
+    )
+    if not gaps_file.exists():
+        return []
+
+    gaps_df = pd.read_parquet(gaps_file)
+    mask = gaps_df["Missing"] >= min_missing
+    if start_date is not None:
+        mask &= gaps_df["Gap End"] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= gaps_df["Gap Start"] <= pd.Timestamp(end_date)
+
+    return [
+        (gap_start.to_pydatetime(), gap_end.to_pydatetime())
+        for gap_start, gap_end in zip(
+            gaps_df.loc[mask, "Gap Start"], gaps_df.loc[mask, "Gap End"]
+        )
+    ]
+
+
+if __name__ == "__main__":
+
+    # Example usage - scan every series and list the series with the most gaps
+    summary_df = scan_data_quality(base_directory=DATA_DIR)
+    print(summary_df.sort_values(by="Missing", ascending=False).head(20))
@@ -1,6 +1,8 @@
 import os
 import pandas as pd
 
+from resample_period_end import resample_period_end
+
 
 def databento_month_end(
     base_directory,
@@ -45,15 +47,12 @@ def databento_month_end(
 
     location = f"{base_directory}/{source}/{asset_class}/{schema}/{symbol}.pkl"
 
-    df = pd.read_pickle(location)
-
-    if "Date" not in df.columns:
-        df = df.reset_index()
-
-    df = df[["Date", "close"]]
-    df = df.set_index("Date")
-
-    df_month_end = df.resample("ME").last()
+    # Resample data to month end, updating the cached results incrementally
+    df_month_end = resample_period_end(
+        location=location,
+        columns=["close"],
+        cache_directory=f"{base_directory}/Cache/Period_End",
+    )["ME"]
 
     directory = f"{base_directory}/{source}/{asset_class}/Month_End"
     os.makedirs(directory, exist_ok=True)
@@ -1,6 +1,7 @@
 """
 This script uses existing functions to download OHLCV data from DataBento, then:
 
+* Aggregate minute data to hourly and daily data (optional)
 * Resample to month end data
 * Resample to quarter end data
 
@@ -13,6 +14,7 @@ DataBento dataset reference (US equities):
 
 import pandas as pd
 
+from aggregate_ohlcv import aggregate_ohlcv_files
 from datetime import datetime
 from databento_pull_data import databento_pull_data
 from databento_month_end import databento_month_end
@@ -30,6 +32,8 @@ current_day = datetime.now().day
 # Set global variables
 GLOBAL_VERBOSE = False
 GLOBAL_PULL_MINUTE = True
+# Build hourly and daily data from minute data instead of downloading it
+GLOBAL_AGGREGATE_MINUTE = False
 GLOBAL_PARQUET_EXPORT = False
 
 ###############
@@ -61,37 +65,54 @@ for stock, meta in equities.items():
             output_confirmation=True,
         )
 
-    databento_pull_data(
-        base_directory=DATA_DIR,
-        symbol=stock,
-        dataset=dataset,
-        source="DataBento",
-        asset_class="Equities",
-        start_date=datetime(current_year - 2, current_month, current_day),
-        schema="ohlcv-1h",
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
+    if GLOBAL_PULL_MINUTE and GLOBAL_AGGREGATE_MINUTE:
+        aggregate_ohlcv_files(
+            base_directory=DATA_DIR,
+            ticker=stock,
+            source="DataBento",
+            asset_class="Equities",
+            minute_timeframe="ohlcv-1m",
+            timeframes={"hour": "ohlcv-1h", "day": "ohlcv-1d"},
+            timezone=None,
+            session_start=None,
+            session_end=None,
+            excel_export=True,
+            pickle_export=True,
+            parquet_export=GLOBAL_PARQUET_EXPORT,
+            output_confirmation=True,
+        )
+    else:
+        databento_pull_data(
+            base_directory=DATA_DIR,
+            symbol=stock,
+            dataset=dataset,
+            source="DataBento",
+            asset_class="Equities",
+            start_date=datetime(current_year - 2, current_month, current_day),
+            schema="ohlcv-1h",
+            force_existing_check=False,
+            verbose=GLOBAL_VERBOSE,
+            excel_export=True,
+            pickle_export=True,
+            parquet_export=GLOBAL_PARQUET_EXPORT,
+            output_confirmation=True,
+        )
 
-    databento_pull_data(
-        base_directory=DATA_DIR,
-        symbol=stock,
-        dataset=dataset,
-        source="DataBento",
-        asset_class="Equities",
-        start_date=datetime(current_year - 2, current_month, current_day),
-        schema="ohlcv-1d",
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
+        databento_pull_data(
+            base_directory=DATA_DIR,
+            symbol=stock,
+            dataset=dataset,
+            source="DataBento",
+            asset_class="Equities",
+            start_date=datetime(current_year - 2, current_month, current_day),
+            schema="ohlcv-1d",
+            force_existing_check=False,
+            verbose=GLOBAL_VERBOSE,
+            excel_export=True,
+            pickle_export=True,
+            parquet_export=GLOBAL_PARQUET_EXPORT,
+            output_confirmation=True,
+        )
 
     databento_month_end(
         base_directory=DATA_DIR,
@@ -146,37 +167,54 @@ for fund, meta in etfs.items():
             output_confirmation=True,
         )
 
-    databento_pull_data(
-        base_directory=DATA_DIR,
-        symbol=fund,
-        dataset=dataset,
-        source="DataBento",
-        asset_class="Exchange_Traded_Funds",
-        start_date=datetime(current_year - 2, current_month, current_day),
-        schema="ohlcv-1h",
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
+    if GLOBAL_PULL_MINUTE and GLOBAL_AGGREGATE_MINUTE:
+        aggregate_ohlcv_files(
+            base_directory=DATA_DIR,
+            ticker=fund,
+            source="DataBento",
+            asset_class="Exchange_Traded_Funds",
+            minute_timeframe="ohlcv-1m",
+            timeframes={"hour": "ohlcv-1h", "day": "ohlcv-1d"},
+            timezone=None,
+            session_start=None,
+            session_end=None,
+            excel_export=True,
+            pickle_export=True,
+            parquet_export=GLOBAL_PARQUET_EXPORT,
+            output_confirmation=True,
+        )
+    else:
+        databento_pull_data(
+            base_directory=DATA_DIR,
+            symbol=fund,
+            dataset=dataset,
+            source="DataBento",
+            asset_class="Exchange_Traded_Funds",
+            start_date=datetime(current_year - 2, current_month, current_day),
+            schema="ohlcv-1h",
+            force_existing_check=False,
+            verbose=GLOBAL_VERBOSE,
+            excel_export=True,
+            pickle_export=True,
+            parquet_export=GLOBAL_PARQUET_EXPORT,
+            output_confirmation=True,
+        )
 
-    databento_pull_data(
-        base_directory=DATA_DIR,
-        symbol=fund,
-        dataset=dataset,
-        source="DataBento",
-        asset_class="Exchange_Traded_Funds",
-        start_date=datetime(current_year - 2, current_month, current_day),
-        schema="ohlcv-1d",
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
+        databento_pull_data(
+            base_directory=DATA_DIR,
+            symbol=fund,
+            dataset=dataset,
+            source="DataBento",
+            asset_class="Exchange_Traded_Funds",
+            start_date=datetime(current_year - 2, current_month, current_day),
+            schema="ohlcv-1d",
+            force_existing_check=False,
+            verbose=GLOBAL_VERBOSE,
+            excel_export=True,
+            pickle_export=True,
+            parquet_export=GLOBAL_PARQUET_EXPORT,
+            output_confirmation=True,
+        )
 
     databento_month_end(
         base_directory=DATA_DIR,
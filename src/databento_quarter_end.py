@@ -1,6 +1,8 @@
 import os
 import pandas as pd
 
+from resample_period_end import resample_period_end
+
 
 def databento_quarter_end(
     base_directory,
@@ -45,15 +47,12 @@ def databento_quarter_end(
 
     location = f"{base_directory}/{source}/{asset_class}/{schema}/{symbol}.pkl"
 
-    df = pd.read_pickle(location)
-
-    if "Date" not in df.columns:
-        df = df.reset_index()
-
-    df = df[["Date", "close"]]
-    df = df.set_index("Date")
-
-    df_quarter_end = df.resample("QE").last()
+    # Resample data to quarter end, updating the cached results incrementally
+    df_quarter_end = resample_period_end(
+        location=location,
+        columns=["close"],
+        cache_directory=f"{base_directory}/Cache/Period_End",
+    )["QE"]
 
     directory = f"{base_directory}/{source}/{asset_class}/Quarter_End"
     os.makedirs(directory, exist_ok=True)
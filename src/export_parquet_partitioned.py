@@ -0,0 +1,109 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pathlib import Path
+from settings import config
+
+# Get the environment variable for where data is stored
+DATA_DIR = config("DATA_DIR")
+
+
+def export_parquet_partitioned(
+    df: pd.DataFrame,
+    base_directory,
+    ticker: str,
+    source: str,
+    asset_class: str,
+    timeframe: str,
+    output_confirmation: bool,
+) -> Path:
+    """
+    Export a price DataFrame to a Parquet dataset partitioned by year and month.
+
+    The dataset is written under the same `source/asset_class/timeframe` layout
+    used by the pickle and Excel exports, with one directory per ticker:
+
+        base_directory/source/asset_class/timeframe/ticker/year=YYYY/month=M/part-0.parquet
+
+    Only the year/month partitions present in `df` are replaced. Partitions
+    outside of the date range of `df` are left untouched, so this function can
+    be used both for a full conversion and for appending new months of data.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        DataFrame containing the price data, with either a 'Date' column or a
+        datetime index.
+    base_directory
+        Root path to store the data.
+    ticker : str
+        Ticker symbol for the data.
+    source : str
+        Name of the data source (e.g., 'Coinbase').
+    asset_class : str
+        Asset class name (e.g., 'Cryptocurrencies').
+    timeframe : str
+        Timeframe for the data (e.g., 'Minute', 'Daily').
+    output_confirmation : bool
+        If True, print confirmation message.
+
+    Returns:
+    --------
+    Path
+        Path to the root of the partitioned dataset.
+
+    Example:
+    --------
+    >>> export_parquet_partitioned(df, DATA_DIR, "BTC-USD", "Coinbase", "Cryptocurrencies", "Minute", True)
+    """
+
+    # Ensure 'Date' is a column and not the index
+    if "Date" not in df.columns:
+        df = df.reset_index()
+
+    df = df.copy()
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.sort_values(by="Date", kind="mergesort")
+
+    # Partition keys
+    df["year"] = df["Date"].dt.year.astype("int32")
+    df["month"] = df["Date"].dt.month.astype("int32")
+
+    dataset_path = Path(base_directory) / source / asset_class / timeframe / ticker
+    dataset_path.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Replace only the partitions contained in df
+    pq.write_to_dataset(
+        table,
+        root_path=dataset_path,
+        partition_cols=["year", "month"],
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+
+    if output_confirmation == True:
+        print(
+            f"Exported {len(df)} rows of {ticker} {timeframe} data to partitioned Parquet at {dataset_path}."
+        )
+
+    return dataset_path
+
+
+if __name__ == "__main__":
+
+    # Example usage - convert an existing minute pickle into a partitioned dataset
+    for ticker in ["BTC-USD"]:
+        df = pd.read_pickle(f"{DATA_DIR}/Coinbase/Cryptocurrencies/Minute/{ticker}.pkl")
+
+        export_parquet_partitioned(
+            df=df,
+            base_directory=DATA_DIR,
+            ticker=ticker,
+            source="Coinbase",
+            asset_class="Cryptocurrencies",
+            timeframe="Minute",
+            output_confirmation=True,
+        )
@@ -8,6 +8,7 @@ def load_crypto_data(
     base_directory,
     start_date: str,
     end_date: str,
+    file_format: str = "pickle",
 ) -> pd.DataFrame:
     """
     Loads minute-level data for multiple crypto tickers from Coinbase source.
@@ -23,6 +24,10 @@ def load_crypto_data(
         Optional start date for filtering data, e.g., "2023-01-01".
     end_date : str
         Optional end date for filtering data, e.g., "2023-12-31".
+    file_format : str, optional
+        Format of the stored data ('pickle' or 'parquet'). With 'parquet', the
+        date range and OHLCV columns are pushed down to the reader so that only
+        the requested slice is loaded from disk (default is 'pickle').
 
     Returns:
     --------
@@ -41,8 +46,13 @@ def load_crypto_data(
             source="Coinbase",
             asset_class="Cryptocurrencies",
             timeframe="Minute",
-            file_format="pickle",
+            file_format=file_format,
+            start_date=start_date,
+            end_date=end_date,
+            columns=["Date", "open", "high", "low", "close", "volume"],
         )
+        if "Date" in temp_df.columns:
+            temp_df = temp_df.set_index("Date")
         temp_df.index = pd.to_datetime(temp_df.index)
         temp_df = temp_df.sort_index()
 
@@ -0,0 +1,165 @@
+import json
+import numpy as np
+import os
+import pandas as pd
+import shutil
+
+from load_crypto_data import load_crypto_data
+from pathlib import Path
+
+# In-process cache of memory-mapped DataFrames, keyed by cache directory and
+# source fingerprint
+_PRICE_CACHE = {}
+
+
+def _source_fingerprint(tickers: list, base_directory, file_format: str) -> dict:
+    """
+    Modification time and size of each ticker's stored data, so that a cache
+    entry built from an older version of the data is detected.
+    """
+
+    minute_dir = Path(base_directory) / "Coinbase" / "Cryptocurrencies" / "Minute"
+
+    fingerprint = {}
+    for ticker in tickers:
+        if file_format == "parquet":
+            dataset_dir = minute_dir / ticker
+            if dataset_dir.is_dir():
+                files = [f for f in dataset_dir.rglob("*") if f.is_file()]
+            else:
+                files = [minute_dir / f"{ticker}.parquet"]
+        else:
+            files = [minute_dir / f"{ticker}.pkl"]
+
+        stats = [f.stat() for f in files if f.exists()]
+        fingerprint[ticker] = [
+            len(stats),
+            max((st.st_mtime_ns for st in stats), default=0),
+            sum(st.st_size for st in stats),
+        ]
+
+    return fingerprint
+
+
+def load_crypto_data_cached(
+    tickers: list,
+    base_directory,
+    start_date: str,
+    end_date: str,
+    cache_directory=None,
+    file_format: str = "pickle",
+) -> pd.DataFrame:
+    """
+    Loads minute-level data for multiple crypto tickers through a memory-mapped
+    price cache.
+
+    The first call for a given set of tickers and date range loads the data with
+    `load_crypto_data` and stores every column as a `.npy` array in the cache
+    directory. Every later call (in this process or in any worker process)
+    memory-maps those arrays and wraps them in a DataFrame without copying, so
+    the source pickle is never read or decoded again for the same slice.
+
+    Each entry records the modification time and size of the source files it
+    was built from, and is rebuilt when they change (e.g., after a data
+    refresh). An incomplete entry left by an interrupted build is removed and
+    rebuilt.
+
+    The returned DataFrame is backed by read-only memory maps and is shared
+    between callers in the same process. Functions such as `add_rsi_ma_bb`
+    copy their input before adding columns, so it is safe to pass directly.
+
+    Parameters:
+    -----------
+    tickers : list
+        List of crypto tickers, e.g., ["BTC-USD", "ETH-USD", "SOL-USD"].
+    base_directory
+        Base directory where data files are stored.
+    start_date : str
+        Optional start date for filtering data, e.g., "2023-01-01".
+    end_date : str
+        Optional end date for filtering data, e.g., "2023-12-31".
+    cache_directory : optional
+        Directory for the cached arrays (default is
+        `base_directory/Cache/Price_Cache`).
+    file_format : str, optional
+        Format of the stored data passed to `load_crypto_data` when the cache
+        is built (default is 'pickle').
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame containing merged price data for all tickers.
+    """
+
+    if cache_directory is None:
+        cache_directory = Path(base_directory) / "Cache" / "Price_Cache"
+
+    # One cache entry per ticker set, date range, and file format
+    key = f"{'_'.join(tickers)}_{start_date}_{end_date}_{file_format}"
+    entry_dir = Path(cache_directory) / key
+    sources = _source_fingerprint(tickers, base_directory, file_format)
+    cache_key = (entry_dir, json.dumps(sources))
+
+    # Already mapped in this process
+    if cache_key in _PRICE_CACHE:
+        return _PRICE_CACHE[cache_key]
+
+    manifest_path = entry_dir / "manifest.json"
+
+    # Existing entry: check that it is complete and built from the current data
+    current = False
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            current = json.load(f).get("sources") == sources
+
+    # Build the cache entry if it does not exist yet or is stale
+    if not current:
+        df = load_crypto_data(
+            tickers=tickers,
+            base_directory=base_directory,
+            start_date=start_date,
+            end_date=end_date,
+            file_format=file_format,
+        )
+
+        # Write into a temporary directory and rename so that concurrent
+        # workers never see a partially written entry
+        tmp_dir = Path(cache_directory) / f"{key}.tmp-{os.getpid()}"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        columns = list(df.columns)
+        for i, col in enumerate(columns):
+            np.save(tmp_dir / f"{i}.npy", df[col].to_numpy())
+
+        with open(tmp_dir / "manifest.json", "w") as f:
+            json.dump({"columns": columns, "sources": sources}, f)
+
+        # Move a stale or incomplete entry out of the way (arrays that are
+        # already memory-mapped stay readable)
+        if entry_dir.exists():
+            old_dir = Path(cache_directory) / f"{key}.old-{os.getpid()}"
+            try:
+                os.replace(entry_dir, old_dir)
+                shutil.rmtree(old_dir, ignore_errors=True)
+            except OSError:
+                pass
+
+        try:
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another process finished first; use its entry
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Memory-map every column and wrap the arrays without copying
+    with open(manifest_path) as f:
+        columns = json.load(f)["columns"]
+
+    arrays = {
+        col: np.load(entry_dir / f"{i}.npy", mmap_mode="r")
+        for i, col in enumerate(columns)
+    }
+    df = pd.DataFrame(arrays, copy=False)
+
+    _PRICE_CACHE[cache_key] = df
+
+    return df
@@ -1,4 +1,6 @@
 import pandas as pd
+import pyarrow.dataset as ds
+
 from pathlib import Path
 
 
@@ -9,14 +11,24 @@ def load_data(
     asset_class: str,
     timeframe: str,
     file_format: str,
+    start_date: str = None,
+    end_date: str = None,
+    columns: list = None,
 ) -> pd.DataFrame:
     """
-    Load data from a CSV, Excel, or Pickle file into a pandas DataFrame.
+    Load data from a CSV, Excel, Pickle, or Parquet file into a pandas DataFrame.
 
     This function attempts to read a file first as a CSV, then as an Excel file
     (specifically looking for a sheet named 'data' and using the 'calamine' engine).
     If both attempts fail, a ValueError is raised.
 
+    For the Parquet format, the date range and column filters are pushed down to
+    the reader. If a partitioned dataset exists (see `export_parquet_partitioned`),
+    only the year/month partitions overlapping the date range are opened and
+    only the requested columns are read from disk. Otherwise a single
+    `{ticker}.parquet` file is read with the same filters applied row group by
+    row group.
+
     Parameters:
     -----------
     base_directory
@@ -30,7 +42,13 @@ def load_data(
     timeframe : str
         Timeframe for the data (e.g., 'Daily', 'Month_End').
     file_format : str
-        Format of the file to load ('csv', 'excel', or 'pickle')
+        Format of the file to load ('csv', 'excel', 'pickle', or 'parquet')
+    start_date : str, optional
+        Start date (inclusive) for filtering 'parquet' data, e.g., "2019-01-01".
+    end_date : str, optional
+        End date (inclusive) for filtering 'parquet' data, e.g., "2019-12-31".
+    columns : list, optional
+        Columns to read for 'parquet' data. The 'Date' column is always included.
 
     Returns:
     --------
@@ -68,7 +86,59 @@ def load_data(
         df = pd.read_pickle(pickle_path)
         return df
 
+    elif file_format == "parquet":
+        dataset_path = Path(base_directory) / source / asset_class / timeframe / ticker
+        partitioned = dataset_path.is_dir()
+
+        if partitioned:
+            dataset = ds.dataset(dataset_path, format="parquet", partitioning="hive")
+        else:
+            dataset = ds.dataset(
+                dataset_path.with_name(f"{ticker}.parquet"), format="parquet"
+            )
+
+        # Build the row filter, adding the partition keys so that whole
+        # year/month directories are skipped without being opened
+        row_filter = None
+        if start_date:
+            start = pd.to_datetime(start_date)
+            expr = ds.field("Date") >= start
+            if partitioned:
+                expr = expr & (
+                    (ds.field("year") > start.year)
+                    | (
+                        (ds.field("year") == start.year)
+                        & (ds.field("month") >= start.month)
+                    )
+                )
+            row_filter = expr
+        if end_date:
+            end = pd.to_datetime(end_date)
+            expr = ds.field("Date") <= end
+            if partitioned:
+                expr = expr & (
+                    (ds.field("year") < end.year)
+                    | (
+                        (ds.field("year") == end.year)
+                        & (ds.field("month") <= end.month)
+                    )
+                )
+            row_filter = expr if row_filter is None else row_filter & expr
+
+        # Always read the 'Date' column and never return the partition keys
+        if columns is not None:
+            read_columns = ["Date"] + [c for c in columns if c != "Date"]
+        else:
+            read_columns = [
+                c for c in dataset.schema.names if c not in ("year", "month")
+            ]
+
+        table = dataset.to_table(columns=read_columns, filter=row_filter)
+        df = table.to_pandas()
+        df = df.sort_values(by="Date", kind="mergesort").reset_index(drop=True)
+        return df
+
     else:
         raise ValueError(
-            f"❌ Unsupported file format: {file_format}. Please use 'csv', 'excel', or 'pickle'."
+            f"❌ Unsupported file format: {file_format}. Please use 'csv', 'excel', 'pickle', or 'parquet'."
         )
@@ -3,6 +3,45 @@ import os
 import pandas as pd
 
 from IPython.display import display
+from resample_period_end import resample_period_end
+
+
+def _fill_dividends(df: pd.DataFrame) -> pd.DataFrame:
+    """Forward fill the first dividend of each month until the end of the month."""
+
+    # Keep only required columns
+    df = df[["Date", "Close", "Dividend"]].copy()
+
+    # Replace any instances of 0 dividend with np.nan
+    df["Dividend"] = df["Dividend"].replace(0.00, np.nan)
+
+    # Create variables
+    current_month = None
+    current_year = None
+    current_dividend = None
+
+    # Loop through the dataframes and forward fill the dividend
+    for index, row in df.iterrows():
+        date = row["Date"]
+        dividend = row["Dividend"]
+
+        # Check if it's a dividend entry
+        if pd.notnull(dividend):
+            # Check if it's a new month
+            if date.month != current_month:
+                current_month = date.month
+                current_year = date.year
+                current_dividend = dividend
+
+        # Forward fill the dividend until the end of the month
+        if (
+            pd.isnull(dividend)
+            and date.month == current_month
+            and date.year == current_year
+        ):
+            df.at[index, "Dividend"] = current_dividend
+
+    return df
 
 
 def ndl_month_end(
@@ -43,46 +82,13 @@ def ndl_month_end(
     # Set location from where to read existing excel file
     location = f"{base_directory}/{source}/{asset_class}/Daily/{ticker}.xlsx"
 
-    # Read data from excel
-    df = pd.read_excel(location, sheet_name="data", engine="calamine")
-
-    # Keep only required columns
-    df = df[["Date", "Close", "Dividend"]]
-
-    # Replace any instances of 0 dividend with np.nan
-    df["Dividend"] = df["Dividend"].replace(0.00, np.nan)
-
-    # Create variables
-    current_month = None
-    current_year = None
-    current_dividend = None
-
-    # Loop through the dataframes and forward fill the dividend
-    for index, row in df.iterrows():
-        date = row["Date"]
-        dividend = row["Dividend"]
-
-        # Check if it's a dividend entry
-        if pd.notnull(dividend):
-            # Check if it's a new month
-            if date.month != current_month:
-                current_month = date.month
-                current_year = date.year
-                current_dividend = dividend
-
-        # Forward fill the dividend until the end of the month
-        if (
-            pd.isnull(dividend)
-            and date.month == current_month
-            and date.year == current_year
-        ):
-            df.at[index, "Dividend"] = current_dividend
-
-    # Set index to date column
-    df.set_index("Date", inplace=True)
-
-    # Resample data to month end
-    df_month_end = df.resample("ME").last()
+    # Resample data to month end, updating the cached results incrementally
+    df_month_end = resample_period_end(
+        location=location,
+        columns=["Close", "Dividend"],
+        transform=_fill_dividends,
+        cache_directory=f"{base_directory}/Cache/Period_End",
+    )["ME"]
 
     # Create directory
     directory = f"{base_directory}/{source}/{asset_class}/Month_End"
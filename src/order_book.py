@@ -0,0 +1,180 @@
+import json
+import numpy as np
+
+from bisect import bisect_left
+
+
+class _BookSide:
+    """
+    Price levels of one side of the book.
+
+    Quantities are kept in a dict keyed by price and the prices in a sorted
+    list with the best price last, so the top of the book (where most levels
+    are added and removed) is at the cheap end of the list. Bid prices are
+    stored as is and ask prices negated, so both lists are ascending. A
+    quantity change is a dict update, and adding or removing a level is a
+    binary search plus an insert into the list.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.sign = 1.0 if is_bid else -1.0
+        self.keys = []
+        self.quantities = {}
+
+    def clear(self):
+        self.keys = []
+        self.quantities = {}
+
+    def set(self, price: float, quantity: float):
+        """Set the quantity at a price level (0 removes the level)."""
+
+        key = self.sign * price
+        if quantity > 0:
+            if key not in self.quantities:
+                self.keys.insert(bisect_left(self.keys, key), key)
+            self.quantities[key] = quantity
+        elif key in self.quantities:
+            del self.quantities[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def best(self):
+        if not self.keys:
+            return None
+        key = self.keys[-1]
+        return (self.sign * key, self.quantities[key])
+
+    def levels(self, n: int) -> tuple:
+        """Prices and quantities of the best n levels, best first."""
+
+        keys = self.keys[: -n - 1 : -1] if n > 0 else []
+        prices = self.sign * np.array(keys, dtype="float64")
+        quantities = np.array([self.quantities[key] for key in keys], dtype="float64")
+        return prices, quantities
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class OrderBook:
+    """
+    Local level 2 order book for one product, built from the websocket
+    `level2` channel.
+
+    A snapshot replaces the book and each update sets the quantity of a price
+    level (a quantity of 0 removes it). Updates cost O(1) for a quantity
+    change and a binary search plus a list insert for a new or removed level
+    (see `_BookSide`), and the best bid/ask is read from the end of the
+    sorted prices.
+
+    Parameters:
+    -----------
+    product_id : str
+        Trading pair, e.g., "BTC-USD".
+
+    Example:
+    --------
+    >>> book = OrderBook("BTC-USD")
+    >>> book.on_message(message)
+    >>> book.best_bid(), book.best_ask(), book.microprice()
+    """
+
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        self.bids = _BookSide(is_bid=True)
+        self.asks = _BookSide(is_bid=False)
+        self.ready = False
+        self.updates = 0
+
+    def apply_event(self, event: dict):
+        """Apply a level2 "snapshot" or "update" event."""
+
+        if event.get("product_id", self.product_id) != self.product_id:
+            return
+
+        if event.get("type") == "snapshot":
+            self.bids.clear()
+            self.asks.clear()
+            self.ready = True
+
+        bids = self.bids
+        asks = self.asks
+        for update in event.get("updates", []):
+            side = bids if update["side"] == "bid" else asks
+            side.set(float(update["price_level"]), float(update["new_quantity"]))
+        self.updates += 1
+
+    def on_message(self, message):
+        """
+        Apply a raw websocket message (str or parsed dict) from the level2
+        channel; messages from other channels are ignored.
+        """
+
+        if isinstance(message, (str, bytes)):
+            message = json.loads(message)
+        if message.get("channel") == "l2_data":
+            for event in message.get("events", []):
+                self.apply_event(event)
+
+    def best_bid(self):
+        """Best bid as (price, quantity), or None if there are no bids."""
+        return self.bids.best()
+
+    def best_ask(self):
+        """Best ask as (price, quantity), or None if there are no asks."""
+        return self.asks.best()
+
+    def spread(self) -> float:
+        """Best ask minus best bid (NaN if either side is empty)."""
+
+        bid = self.bids.best()
+        ask = self.asks.best()
+        if bid is None or ask is None:
+            return np.nan
+        return ask[0] - bid[0]
+
+    def mid(self) -> float:
+        """Midpoint of the best bid and ask (NaN if either side is empty)."""
+
+        bid = self.bids.best()
+        ask = self.asks.best()
+        if bid is None or ask is None:
+            return np.nan
+        return (bid[0] + ask[0]) / 2
+
+    def microprice(self) -> float:
+        """
+        Best bid and ask weighted by the quantity on the opposite side,
+        (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty), which leans
+        towards the side with less quantity (NaN if either side is empty).
+        """
+
+        bid = self.bids.best()
+        ask = self.asks.best()
+        if bid is None or ask is None:
+            return np.nan
+        (bid_price, bid_qty), (ask_price, ask_qty) = bid, ask
+        return (bid_price * ask_qty + ask_price * bid_qty) / (bid_qty + ask_qty)
+
+    def depth(self, levels: int = 10) -> dict:
+        """
+        Best `levels` price levels of each side.
+
+        Returns:
+        --------
+        dict
+            Dictionary with arrays 'bid_price', 'bid_size', 'ask_price', and
+            'ask_size', best level first.
+        """
+
+        bid_price, bid_size = self.bids.levels(levels)
+        ask_price, ask_size = self.asks.levels(levels)
+
+        return {
+            "bid_price": bid_price,
+            "bid_size": bid_size,
+            "ask_price": ask_price,
+            "ask_size": ask_size,
+        }
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
@@ -4,6 +4,8 @@ import time
 from datetime import datetime, timedelta
 from massive import RESTClient
 from settings import config
+from urllib3.exceptions import MaxRetryError, ProtocolError
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
 
 # Load API key from the environment variables
 POLYGON_KEY = config("POLYGON_KEY")
@@ -12,6 +14,31 @@ POLYGON_KEY = config("POLYGON_KEY")
 DATA_DIR = config("DATA_DIR")
 
 
+def _is_retryable(e: Exception) -> bool:
+    """
+    Whether a failed API request is worth retrying: rate limit (429) and
+    server (5xx) responses, and connection errors. The client already retries
+    those statuses itself and raises MaxRetryError once it gives up.
+    """
+
+    if isinstance(
+        e,
+        (
+            ConnectionError,
+            TimeoutError,
+            MaxRetryError,
+            ProtocolError,
+            Urllib3TimeoutError,
+        ),
+    ):
+        return True
+
+    status = getattr(e, "status", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or 500 <= status < 600)
+
+
 def polygon_fetch_full_history(
     client,
     ticker: str,
@@ -22,10 +49,19 @@ def polygon_fetch_full_history(
     current_start: datetime,
     free_tier: bool,
     verbose: bool,
+    rate_limiter=None,
+    max_retries: int = 0,
+    backoff: float = 1.0,
 ) -> pd.DataFrame:
     """
     Fetch full historical data for a given product from Polygon API.
 
+    Each chunk of new data is only checked for overlap against the most recent
+    rows (the tail of the existing data or the previous chunk), and the chunks
+    are combined with the existing data once at the end, so the cost of an
+    update grows with the number of new rows rather than the length of the
+    existing history.
+
     Parameters:
     -----------
     client
@@ -43,9 +79,19 @@ def polygon_fetch_full_history(
     current_start : datetime
         Date for which to start pulling data in datetime format.
     free_tier : bool
-        If True, then pause to avoid API limits.
+        If True, then pause to avoid API limits. Ignored if rate_limiter is given.
     verbose : bool
         If True, print detailed information about the data being processed.
+    rate_limiter : TokenBucket, optional
+        Rate limiter shared with other downloads. If given, a token is acquired
+        before each API request instead of pausing for a fixed time.
+    max_retries : int, optional
+        Number of times a failed API request is retried (default is 0). Only
+        rate limit (429), server (5xx), and connection errors are retried;
+        any other error is raised immediately.
+    backoff : float, optional
+        Initial pause in seconds before a retry, doubled after every failed
+        attempt (default is 1.0).
 
     Returns:
     --------
@@ -53,8 +99,11 @@ def polygon_fetch_full_history(
         DataFrame containing the data.
     """
 
-    # Copy DataFrame
-    full_history_df = existing_history_df.copy()
+    # Most recent rows that new data is expected to overlap with
+    tail_df = existing_history_df
+
+    # Chunks of new data, combined with the existing data once at the end
+    new_chunks = []
 
     if timespan == "minute":
         time_delta = 15
@@ -82,17 +131,31 @@ def polygon_fetch_full_history(
             )
 
         try:
-            # Pull new data
-            aggs = client.get_aggs(
-                ticker=ticker,
-                timespan=timespan,
-                multiplier=multiplier,
-                from_=current_start,
-                to=current_end,
-                adjusted=adjusted,
-                sort="asc",
-                limit=5000,
-            )
+            # Pull new data, retrying failed requests with exponential backoff
+            for attempt in range(max_retries + 1):
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+
+                try:
+                    aggs = client.get_aggs(
+                        ticker=ticker,
+                        timespan=timespan,
+                        multiplier=multiplier,
+                        from_=current_start,
+                        to=current_end,
+                        adjusted=adjusted,
+                        sort="asc",
+                        limit=5000,
+                    )
+                    break
+                except Exception as e:
+                    if attempt == max_retries or not _is_retryable(e):
+                        raise
+                    pause = backoff * 2**attempt
+                    print(
+                        f"Request for {ticker} {timespan} data failed ({e}), retrying in {pause} seconds..."
+                    )
+                    time.sleep(pause)
 
             # if len(aggs) == 0:
             # raise Exception(f"No data is available for {ticker} for {current_start} thru {current_end}. Please attempt different dates.")
@@ -116,11 +179,11 @@ def polygon_fetch_full_history(
             ]
             new_data = new_data.sort_values(by="Date", ascending=True)
 
-            # Enforce dtypes to match full_history_df
-            new_data = new_data.astype(full_history_df.dtypes.to_dict())
+            # Enforce dtypes to match existing_history_df
+            new_data = new_data.astype(existing_history_df.dtypes.to_dict())
 
             # (Optional) reorder columns to match schema
-            # new_data = new_data[full_history_df.columns]
+            # new_data = new_data[existing_history_df.columns]
 
             # Find last date in new_data
             new_data_last_date = new_data["Date"].max()
@@ -135,64 +198,40 @@ def polygon_fetch_full_history(
             # if len(new_data) == 5000:
             # raise Exception(f"New data for {ticker} contains 5000 rows, indicating potential issues with data completeness or API limits.")
 
-            # If full_history_df length is not 0, check to confirm that data overlaps to verify that there were not any splits in the data
-            # if not full_history_df.empty:
-            # if not full_history_df['Date'].isin(new_data['Date']).any():
-            # raise Exception(f"New data does not overlap with existing data.")
-
-            if not full_history_df.empty:
+            # If tail_df length is not 0, check to confirm that data overlaps to verify that there were not any splits in the data
+            if not tail_df.empty:
                 # Columns present in both frames
-                common_cols = list(
-                    full_history_df.columns.intersection(new_data.columns)
-                )
+                common_cols = list(tail_df.columns.intersection(new_data.columns))
                 if not common_cols:
                     raise Exception("No common columns to compare.")
 
-                # (Optional) de-duplicate to speed up the merge
-                # full_dedup = full_history_df[common_cols].drop_duplicates()
-                # new_dedup  = new_data[common_cols].drop_duplicates()
-
                 price_cols = ["open", "high", "low", "close"]
 
-                # Inner join on every shared column = exact row matches
-                # overlap = full_dedup.merge(new_dedup, on=common_cols, how="inner")
-                # overlap = full_dedup.merge(new_dedup, on=price_cols, how="inner")
-                overlap = full_history_df.merge(new_data, on=price_cols, how="inner")
+                # Only rows from the start of the new data onward can overlap
+                recent_df = tail_df[tail_df["Date"] >= new_data["Date"].min()]
+
+                # Inner join on the price columns = exact row matches
+                overlap = recent_df.merge(new_data, on=price_cols, how="inner")
 
                 if overlap.empty:
                     raise Exception(
-                        # f"New data does not overlap with existing data (full-row check)."
                         f"New data does not overlap with existing data (price data check)."
                     )
 
-            # Combine existing data with recent data, drop duplicates, sort values, reset index
-            full_history_df = pd.concat([full_history_df, new_data])
-            full_history_df = full_history_df.drop_duplicates(
-                subset="Date", keep="last"
-            )
-            full_history_df = full_history_df.sort_values(by="Date", ascending=True)
-            full_history_df = full_history_df.reset_index(drop=True)
-
-            if verbose == True:
-                print("Combined data:")
-                print(full_history_df)
+            # Keep the new data; the next chunk overlaps with this one
+            new_chunks.append(new_data)
+            tail_df = new_data
 
         except KeyError as e:
+            # Runs in worker threads of polygon_pull_data_concurrent, so skip
+            # the empty timeframe instead of prompting for input
             print(
-                f"No data is available for {ticker} from {current_start} thru {current_end}."
+                f"No data is available for {ticker} from {current_start} thru {current_end}. Trying next timeframe for {ticker} {timespan} data."
             )
 
-            user_choice = input(f"Press Enter to continue, or type 'q' to quit: ")
-            if user_choice.lower() == "q":
-                print(f"Aborting operation to update {ticker} {timespan} data.")
-                break  # break out of the while loop
-            else:
-                print(f"Trying next timeframe for {ticker} {timespan} data.")
-
-                # Set last_data_date to current_end because we know data was not available
-                # up until current_end
-                new_data_last_date = current_end
-                pass
+            # Set last_data_date to current_end because we know data was not available
+            # up until current_end
+            new_data_last_date = current_end
 
         except Exception as e:
             print(
@@ -225,11 +264,24 @@ def polygon_fetch_full_history(
             #     current_start = last_data_date - timedelta(days=time_overlap)
 
         # Check for free tier and if so then pause for 12 seconds to avoid hitting API rate limits
-        if free_tier == True:
+        if free_tier == True and rate_limiter is None:
             if verbose == True:
                 print(f"Sleeping for 12 seconds to avoid hitting API rate limits...\n")
             time.sleep(12)
 
+    # Combine existing data with new data, drop duplicates, sort values, reset index
+    if new_chunks:
+        full_history_df = pd.concat([existing_history_df, *new_chunks])
+        full_history_df = full_history_df.drop_duplicates(subset="Date", keep="last")
+        full_history_df = full_history_df.sort_values(by="Date", ascending=True)
+        full_history_df = full_history_df.reset_index(drop=True)
+    else:
+        full_history_df = existing_history_df.copy()
+
+    if verbose == True:
+        print("Combined data:")
+        print(full_history_df)
+
     # Return the DataFrame containing the full history
     return full_history_df
 
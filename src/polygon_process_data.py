@@ -2,16 +2,17 @@
 This script uses existing functions to download daily price data from
 Polygon, then:
 
+* Aggregate minute data to hourly and daily data (optional)
 * Resample to month end data
 * Resample to quarter end data
 """
 
 import pandas as pd
-import time
 
+from aggregate_ohlcv import aggregate_ohlcv_files
 from datetime import datetime
-from polygon_pull_data import polygon_pull_data
 from polygon_month_end import polygon_month_end
+from polygon_pull_data_concurrent import polygon_pull_data_concurrent
 from polygon_quarter_end import polygon_quarter_end
 from settings import config
 
@@ -24,9 +25,13 @@ current_month = datetime.now().month
 current_day = datetime.now().day
 
 # Set global variables
+# Build hourly and daily data from minute data instead of downloading it
+GLOBAL_AGGREGATE_MINUTE = False
 GLOBAL_FREE_TIER = False
 GLOBAL_PARQUET_EXPORT = False
 GLOBAL_PULL_MINUTE = True
+# Rate limit of the plan in requests per minute
+GLOBAL_REQUESTS_PER_MINUTE = 5 if GLOBAL_FREE_TIER == True else 1000
 GLOBAL_START_DATE = datetime(current_year - 5, current_month, current_day)
 GLOBAL_VERBOSE = False
 
@@ -41,83 +46,64 @@ GLOBAL_VERBOSE = False
 equities_df = pd.read_csv(f"{DATA_DIR}/Polygon/equities.csv", index_col=0)
 equities = equities_df.to_dict()["Name"]
 
+# Pull minute (optional), hourly, and daily data for every stock concurrently
+timespan_excel_export = {"minute": False, "hour": True, "day": True}
+if GLOBAL_PULL_MINUTE == False:
+    del timespan_excel_export["minute"]
+elif GLOBAL_AGGREGATE_MINUTE == True:
+    del timespan_excel_export["hour"]
+    del timespan_excel_export["day"]
+
+results = polygon_pull_data_concurrent(
+    jobs=[
+        {"ticker": stock, "timespan": timespan, "excel_export": excel_export}
+        for stock in equities.keys()
+        for timespan, excel_export in timespan_excel_export.items()
+    ],
+    requests_per_minute=GLOBAL_REQUESTS_PER_MINUTE,
+    base_directory=DATA_DIR,
+    source="Polygon",
+    asset_class="Equities",
+    start_date=GLOBAL_START_DATE,
+    multiplier=1,
+    adjusted=True,
+    force_existing_check=False,
+    verbose=GLOBAL_VERBOSE,
+    free_tier=GLOBAL_FREE_TIER,
+    pickle_export=True,
+    parquet_export=GLOBAL_PARQUET_EXPORT,
+    output_confirmation=True,
+)
+
+# Tickers with a failed download keep their previous data, so skip resampling them
+failed_tickers = {
+    ticker for (ticker, _), result in results.items() if isinstance(result, Exception)
+}
+
 # Iterate through each stock
 for stock in equities.keys():
-    if GLOBAL_PULL_MINUTE == True:
-        # Pull minute data
-        polygon_pull_data(
+    if stock in failed_tickers:
+        print(f"Skipping {stock}: the data download failed.")
+        continue
+
+    # Aggregate minute data to hourly and daily data
+    if GLOBAL_PULL_MINUTE == True and GLOBAL_AGGREGATE_MINUTE == True:
+        aggregate_ohlcv_files(
             base_directory=DATA_DIR,
             ticker=stock,
             source="Polygon",
             asset_class="Equities",
-            start_date=GLOBAL_START_DATE,
-            timespan="minute",
-            multiplier=1,
-            adjusted=True,
-            force_existing_check=False,
-            verbose=GLOBAL_VERBOSE,
-            free_tier=GLOBAL_FREE_TIER,
-            excel_export=False,
+            minute_timeframe="minute",
+            timeframes={"hour": "hour", "day": "day"},
+            timezone="America/New_York",
+            session_start=None,
+            session_end=None,
+            excel_export=True,
             pickle_export=True,
             parquet_export=GLOBAL_PARQUET_EXPORT,
             output_confirmation=True,
         )
 
-        if GLOBAL_FREE_TIER == True:
-            time.sleep(12)
-        else:
-            pass
-    else:
-        pass
-
-    # Pull hourly data
-    polygon_pull_data(
-        base_directory=DATA_DIR,
-        ticker=stock,
-        source="Polygon",
-        asset_class="Equities",
-        start_date=GLOBAL_START_DATE,
-        timespan="hour",
-        multiplier=1,
-        adjusted=True,
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        free_tier=GLOBAL_FREE_TIER,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
-
-    if GLOBAL_FREE_TIER == True:
-        time.sleep(12)
-    else:
-        pass
-
-    # Pull daily data
-    polygon_pull_data(
-        base_directory=DATA_DIR,
-        ticker=stock,
-        source="Polygon",
-        asset_class="Equities",
-        start_date=GLOBAL_START_DATE,
-        timespan="day",
-        multiplier=1,
-        adjusted=True,
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        free_tier=GLOBAL_FREE_TIER,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
-
-    if GLOBAL_FREE_TIER == True:
-        time.sleep(12)
-    else:
-        pass
-
     # Resample to month-end data
     polygon_month_end(
         base_directory=DATA_DIR,
@@ -275,83 +261,64 @@ for stock in equities.keys():
 etfs_df = pd.read_csv(f"{DATA_DIR}/Polygon/etfs.csv", index_col=0)
 etfs = etfs_df.to_dict()["Name"]
 
+# Pull minute (optional), hourly, and daily data for every fund concurrently
+timespan_excel_export = {"minute": False, "hour": True, "day": True}
+if GLOBAL_PULL_MINUTE == False:
+    del timespan_excel_export["minute"]
+elif GLOBAL_AGGREGATE_MINUTE == True:
+    del timespan_excel_export["hour"]
+    del timespan_excel_export["day"]
+
+results = polygon_pull_data_concurrent(
+    jobs=[
+        {"ticker": fund, "timespan": timespan, "excel_export": excel_export}
+        for fund in etfs.keys()
+        for timespan, excel_export in timespan_excel_export.items()
+    ],
+    requests_per_minute=GLOBAL_REQUESTS_PER_MINUTE,
+    base_directory=DATA_DIR,
+    source="Polygon",
+    asset_class="Exchange_Traded_Funds",
+    start_date=GLOBAL_START_DATE,
+    multiplier=1,
+    adjusted=True,
+    force_existing_check=False,
+    verbose=GLOBAL_VERBOSE,
+    free_tier=GLOBAL_FREE_TIER,
+    pickle_export=True,
+    parquet_export=GLOBAL_PARQUET_EXPORT,
+    output_confirmation=True,
+)
+
+# Tickers with a failed download keep their previous data, so skip resampling them
+failed_tickers = {
+    ticker for (ticker, _), result in results.items() if isinstance(result, Exception)
+}
+
 # Iterate through each ETF
 for fund in etfs.keys():
-    if GLOBAL_PULL_MINUTE == True:
-        # Pull minute data
-        polygon_pull_data(
+    if fund in failed_tickers:
+        print(f"Skipping {fund}: the data download failed.")
+        continue
+
+    # Aggregate minute data to hourly and daily data
+    if GLOBAL_PULL_MINUTE == True and GLOBAL_AGGREGATE_MINUTE == True:
+        aggregate_ohlcv_files(
             base_directory=DATA_DIR,
             ticker=fund,
             source="Polygon",
             asset_class="Exchange_Traded_Funds",
-            start_date=GLOBAL_START_DATE,
-            timespan="minute",
-            multiplier=1,
-            adjusted=True,
-            force_existing_check=False,
-            verbose=GLOBAL_VERBOSE,
-            free_tier=GLOBAL_FREE_TIER,
-            excel_export=False,
+            minute_timeframe="minute",
+            timeframes={"hour": "hour", "day": "day"},
+            timezone="America/New_York",
+            session_start=None,
+            session_end=None,
+            excel_export=True,
             pickle_export=True,
             parquet_export=GLOBAL_PARQUET_EXPORT,
             output_confirmation=True,
         )
 
-        if GLOBAL_FREE_TIER == True:
-            time.sleep(12)
-        else:
-            pass
-    else:
-        pass
-
-    # Pull hourly data
-    polygon_pull_data(
-        base_directory=DATA_DIR,
-        ticker=fund,
-        source="Polygon",
-        asset_class="Exchange_Traded_Funds",
-        start_date=GLOBAL_START_DATE,
-        timespan="hour",
-        multiplier=1,
-        adjusted=True,
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        free_tier=GLOBAL_FREE_TIER,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
-
-    if GLOBAL_FREE_TIER == True:
-        time.sleep(12)
-    else:
-        pass
-
-    # Pull daily data
-    polygon_pull_data(
-        base_directory=DATA_DIR,
-        ticker=fund,
-        source="Polygon",
-        asset_class="Exchange_Traded_Funds",
-        start_date=GLOBAL_START_DATE,
-        timespan="day",
-        multiplier=1,
-        adjusted=True,
-        force_existing_check=False,
-        verbose=GLOBAL_VERBOSE,
-        free_tier=GLOBAL_FREE_TIER,
-        excel_export=True,
-        pickle_export=True,
-        parquet_export=GLOBAL_PARQUET_EXPORT,
-        output_confirmation=True,
-    )
-
-    if GLOBAL_FREE_TIER == True:
-        time.sleep(12)
-    else:
-        pass
-
     # Resample to month-end data
     polygon_month_end(
         base_directory=DATA_DIR,
@@ -1,10 +1,12 @@
 import os
 import pandas as pd
-import time
 
 from datetime import datetime, timedelta
+from export_parquet_partitioned import export_parquet_partitioned
 from IPython.display import display
+from load_data import load_data
 from massive import RESTClient
+from pathlib import Path
 from polygon_fetch_full_history import polygon_fetch_full_history
 from settings import config
 
@@ -31,10 +33,23 @@ def polygon_pull_data(
     pickle_export: bool,
     parquet_export: bool,
     output_confirmation: bool,
+    incremental: bool = False,
+    rate_limiter=None,
+    max_retries: int = 0,
 ) -> pd.DataFrame:
     """
     Read existing data file, download price data from Polygon, and export data.
 
+    In incremental mode the data is stored as a Parquet dataset partitioned by
+    year and month (see `export_parquet_partitioned`). Only the most recent
+    partition is read to find where the data ends and to check the overlap with
+    the new data, and only that partition and any new ones are written, so the
+    download and the Parquet update cost O(new rows) instead of re-reading and
+    rewriting the full history. If the dataset does not exist yet, it is
+    created from the existing pickle file (if any) on the first run. The
+    pickle and Excel files are still kept up to date for the readers that use
+    them when pickle_export or excel_export is True.
+
     Parameters:
     -----------
     base_directory : any
@@ -67,11 +82,26 @@ def polygon_pull_data(
         If True, export data to Parquet format.
     output_confirmation : bool
         If True, print confirmation message.
+    incremental : bool, optional
+        If True, update the partitioned Parquet dataset in place instead of
+        writing a single Parquet file. The new rows are spliced onto the end of
+        the pickle and Excel files if pickle_export or excel_export is True,
+        which reads and rewrites the full history, so leave both off for
+        routine refreshes. The parquet_export flag is ignored in this mode
+        (default is False).
+    rate_limiter : TokenBucket, optional
+        Rate limiter shared with other downloads (see
+        `polygon_pull_data_concurrent`). If given, it replaces the fixed pause
+        of the free tier.
+    max_retries : int, optional
+        Number of times a failed API request is retried with exponential
+        backoff (default is 0).
 
     Returns:
     --------
     pd.DataFrame
-        DataFrame containing the updated price data.
+        DataFrame containing the updated price data. In incremental mode, only
+        the rows of the partitions that were written.
     """
 
     # Open client connection
@@ -87,6 +117,27 @@ def polygon_pull_data(
             f"Invalid timespan: {timespan}. Acceptable timespans are: {acceptable_timespans}."
         )
 
+    if incremental == True:
+        return _polygon_pull_data_incremental(
+            client=client,
+            base_directory=base_directory,
+            ticker=ticker,
+            source=source,
+            asset_class=asset_class,
+            start_date=start_date,
+            timespan=timespan,
+            multiplier=multiplier,
+            adjusted=adjusted,
+            force_existing_check=force_existing_check,
+            free_tier=free_tier,
+            verbose=verbose,
+            excel_export=excel_export,
+            pickle_export=pickle_export,
+            output_confirmation=output_confirmation,
+            rate_limiter=rate_limiter,
+            max_retries=max_retries,
+        )
+
     # if timespan == "minute":
     #     time_delta = 15
     #     time_overlap = 1
@@ -165,6 +216,8 @@ def polygon_pull_data(
         current_start=current_start,
         free_tier=free_tier,
         verbose=verbose,
+        rate_limiter=rate_limiter,
+        max_retries=max_retries,
     )
 
     # Create directory
@@ -204,8 +257,207 @@ def polygon_pull_data(
     return full_history_df
 
 
+def _polygon_pull_data_incremental(
+    client,
+    base_directory,
+    ticker: str,
+    source: str,
+    asset_class: str,
+    start_date: datetime,
+    timespan: str,
+    multiplier: int,
+    adjusted: bool,
+    force_existing_check: bool,
+    free_tier: bool,
+    verbose: bool,
+    excel_export: bool,
+    pickle_export: bool,
+    output_confirmation: bool,
+    rate_limiter=None,
+    max_retries: int = 0,
+) -> pd.DataFrame:
+    """
+    Incremental mode of `polygon_pull_data`: read the last year/month partition
+    of the Parquet dataset, download the new data, and write only the
+    partitions from the last existing month onward. If pickle_export or
+    excel_export is True, the pickle and Excel files are then updated from the
+    same rows so that they match the dataset (this rewrites the full files).
+    """
+
+    dataset_path = Path(base_directory) / source / asset_class / timespan / ticker
+    pickle_path = dataset_path.with_name(f"{ticker}.pkl")
+
+    # Bootstrap the partitioned dataset from the existing pickle file
+    if not dataset_path.is_dir() and pickle_path.exists():
+        print(f"Converting the {ticker} {timespan} pickle to partitioned Parquet...")
+        existing_history_df = pd.read_pickle(pickle_path)
+        export_parquet_partitioned(
+            df=existing_history_df,
+            base_directory=base_directory,
+            ticker=ticker,
+            source=source,
+            asset_class=asset_class,
+            timeframe=timespan,
+            output_confirmation=output_confirmation,
+        )
+
+    # Find the last year/month partition
+    partitions = sorted(
+        (int(month_dir.parent.name.split("=")[1]), int(month_dir.name.split("=")[1]))
+        for month_dir in dataset_path.glob("year=*/month=*")
+    )
+
+    # First partition that is written back (None writes every partition)
+    first_partition = None
+
+    if partitions and force_existing_check == False:
+        last_year, last_month = partitions[-1]
+        first_partition = (last_year, last_month)
+
+        # Read only the last partition
+        existing_history_df = load_data(
+            base_directory=base_directory,
+            ticker=ticker,
+            source=source,
+            asset_class=asset_class,
+            timeframe=timespan,
+            file_format="parquet",
+            start_date=f"{last_year}-{last_month:02d}-01",
+        )
+
+        print(f"Dataset found...updating the {ticker} {timespan} data.")
+
+        # Find last date in existing data
+        last_data_date = existing_history_df["Date"].max()
+        print(f"Last date in existing data: {last_data_date}")
+
+        # Overlap with existing data to capture all data
+        current_start = last_data_date - timedelta(days=1)
+
+    elif partitions:
+        print("Forcing check of existing data...")
+
+        # Read the full history so that every partition is re-checked
+        existing_history_df = load_data(
+            base_directory=base_directory,
+            ticker=ticker,
+            source=source,
+            asset_class=asset_class,
+            timeframe=timespan,
+            file_format="parquet",
+        )
+        current_start = start_date
+
+    else:
+        print(f"Dataset not found...downloading the {ticker} {timespan} data.")
+
+        # Create an empty DataFrame
+        existing_history_df = pd.DataFrame(
+            {
+                "Date": pd.Series(dtype="datetime64[ns]"),
+                "open": pd.Series(dtype="float64"),
+                "high": pd.Series(dtype="float64"),
+                "low": pd.Series(dtype="float64"),
+                "close": pd.Series(dtype="float64"),
+                "volume": pd.Series(dtype="float64"),
+                "vwap": pd.Series(dtype="float64"),
+                "transactions": pd.Series(dtype="int64"),
+                "otc": pd.Series(dtype="object"),
+            }
+        )
+        current_start = start_date
+
+    starting_rows = len(existing_history_df)
+
+    updated_df = polygon_fetch_full_history(
+        client=client,
+        ticker=ticker,
+        timespan=timespan,
+        multiplier=multiplier,
+        adjusted=adjusted,
+        existing_history_df=existing_history_df,
+        current_start=current_start,
+        free_tier=free_tier,
+        verbose=verbose,
+        rate_limiter=rate_limiter,
+        max_retries=max_retries,
+    )
+
+    # Drop the overlap rows that fall in an earlier month, since writing them
+    # would replace that whole partition with just the overlap
+    if first_partition is not None:
+        updated_df = updated_df[
+            updated_df["Date"].dt.year * 100 + updated_df["Date"].dt.month
+            >= first_partition[0] * 100 + first_partition[1]
+        ].reset_index(drop=True)
+
+    # Write only the partitions that were read or received new rows; older
+    # partitions are never rewritten
+    if len(updated_df) > 0:
+        export_parquet_partitioned(
+            df=updated_df,
+            base_directory=base_directory,
+            ticker=ticker,
+            source=source,
+            asset_class=asset_class,
+            timeframe=timespan,
+            output_confirmation=output_confirmation,
+        )
+
+    # Keep the pickle and Excel files in sync with the dataset for the readers
+    # that use them
+    if (pickle_export == True or excel_export == True) and len(updated_df) > 0:
+        full_history_df = None
+        if pickle_path.exists():
+            pickle_df = pd.read_pickle(pickle_path)
+            if "Date" not in pickle_df.columns:
+                pickle_df = pickle_df.reset_index()
+
+            # Replace the rows from the first updated date onward, as long as
+            # the pickle reaches the updated rows (no gap in between)
+            first_updated_date = updated_df["Date"].min()
+            if len(pickle_df) > 0 and pickle_df["Date"].max() >= first_updated_date:
+                full_history_df = pd.concat(
+                    [pickle_df[pickle_df["Date"] < first_updated_date], updated_df],
+                    ignore_index=True,
+                )
+            else:
+                pass
+
+        # No pickle yet, or it is behind the dataset: rebuild it from the dataset
+        if full_history_df is None:
+            full_history_df = load_data(
+                base_directory=base_directory,
+                ticker=ticker,
+                source=source,
+                asset_class=asset_class,
+                timeframe=timespan,
+                file_format="parquet",
+            )
+
+        if pickle_export == True:
+            print(f"Exporting {ticker} {timespan} data to Pickle...")
+            full_history_df.to_pickle(pickle_path)
+
+        if excel_export == True:
+            print(f"Exporting {ticker} {timespan} data to Excel...")
+            full_history_df.to_excel(
+                pickle_path.with_suffix(".xlsx"), sheet_name="data"
+            )
+
+    # Output confirmation
+    if output_confirmation == True:
+        print(f"Number of rows added during update: {len(updated_df) - starting_rows}")
+        print(f"Polygon data complete for {ticker} {timespan} data.")
+        print(f"--------------------")
+
+    return updated_df
+
+
 if __name__ == "__main__":
 
+    from polygon_pull_data_concurrent import polygon_pull_data_concurrent
+
     # Get current year, month, day
     current_year = datetime.now().year
     current_month = datetime.now().month
@@ -214,35 +466,35 @@ if __name__ == "__main__":
     # Set global variables
     GLOBAL_FREE_TIER = False
 
+    # Rate limit of the plan in requests per minute
+    GLOBAL_REQUESTS_PER_MINUTE = 5 if GLOBAL_FREE_TIER == True else 1000
+
     # Stock Data
     equities = ["BKNG"]
 
     # Timespans
     timespans = ["day"]
 
-    # Iterate through each stock
-    for stock in equities:
-        for timespan in timespans:
-            polygon_pull_data(
-                base_directory=DATA_DIR,
-                ticker=stock,
-                source="Polygon",
-                asset_class="Equities",
-                start_date=datetime(current_year - 5, current_month, current_day),
-                timespan=timespan,
-                multiplier=1,
-                adjusted=False,
-                force_existing_check=False,
-                free_tier=GLOBAL_FREE_TIER,
-                verbose=False,
-                excel_export=True,
-                pickle_export=True,
-                parquet_export=True,
-                output_confirmation=True,
-            )
-
-            if GLOBAL_FREE_TIER == True:
-                time.sleep(12)
-            else:
-                pass
-
+    # Pull every stock and timespan concurrently
+    polygon_pull_data_concurrent(
+        jobs=[
+            {"ticker": stock, "timespan": timespan}
+            for stock in equities
+            for timespan in timespans
+        ],
+        requests_per_minute=GLOBAL_REQUESTS_PER_MINUTE,
+        base_directory=DATA_DIR,
+        source="Polygon",
+        asset_class="Equities",
+        start_date=datetime(current_year - 5, current_month, current_day),
+        multiplier=1,
+        adjusted=False,
+        force_existing_check=False,
+        free_tier=GLOBAL_FREE_TIER,
+        verbose=False,
+        excel_export=False,
+        pickle_export=False,
+        parquet_export=True,
+        output_confirmation=True,
+        incremental=True,
+    )
@@ -0,0 +1,98 @@
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from polygon_pull_data import polygon_pull_data
+from token_bucket import TokenBucket
+
+
+def polygon_pull_data_concurrent(
+    jobs: list,
+    requests_per_minute: float,
+    max_workers: int = 8,
+    max_retries: int = 5,
+    **kwargs,
+) -> dict:
+    """
+    Download data for several tickers and timespans from Polygon concurrently.
+
+    Each job is a call to `polygon_pull_data` run in a thread pool. All jobs
+    share one token bucket rate limiter sized to the plan's rate limit, which
+    is consulted before every API request, so on paid tiers the allowance is
+    saturated instead of idling, and on the free tier no request waits longer
+    than the limit requires. Requests that fail with a rate limit, server, or
+    connection error are retried with exponential backoff. A job that still
+    fails is reported and does not stop the others; its exception is returned
+    in place of the data, so callers must skip any steps that depend on it
+    (e.g. resampling the ticker).
+
+    Parameters:
+    -----------
+    jobs : list
+        List of dictionaries of `polygon_pull_data` arguments specific to each
+        job, e.g., [{"ticker": "SPY", "timespan": "day"}, ...]. Each job must
+        include 'ticker' and 'timespan'.
+    requests_per_minute : float
+        Rate limit of the plan in requests per minute, e.g., 5 for the free tier.
+        Up to this many requests may be sent in a burst.
+    max_workers : int, optional
+        Number of download threads (default is 8).
+    max_retries : int, optional
+        Number of times a request that failed with a rate limit (429), server
+        (5xx), or connection error is retried (default is 5).
+    **kwargs
+        `polygon_pull_data` arguments shared by every job, e.g., base_directory,
+        source, asset_class, start_date. Arguments in a job take precedence.
+
+    Returns:
+    --------
+    dict
+        Dictionary of (ticker, timespan) -> DataFrame of the updated data, or
+        the exception raised if the job failed.
+
+    Example:
+    --------
+    >>> results = polygon_pull_data_concurrent(
+    ...     jobs=[{"ticker": t, "timespan": "day"} for t in ["SPY", "QQQ"]],
+    ...     requests_per_minute=5,
+    ...     base_directory=DATA_DIR,
+    ...     source="Polygon",
+    ...     asset_class="Exchange_Traded_Funds",
+    ...     ...
+    ... )
+    """
+
+    rate_limiter = TokenBucket(
+        rate=requests_per_minute / 60, capacity=max(1, requests_per_minute)
+    )
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                polygon_pull_data,
+                **{
+                    **kwargs,
+                    **job,
+                    "rate_limiter": rate_limiter,
+                    "max_retries": max_retries,
+                },
+            ): (job["ticker"], job["timespan"])
+            for job in jobs
+        }
+
+        for future in as_completed(futures):
+            ticker, timespan = futures[future]
+            try:
+                results[(ticker, timespan)] = future.result()
+            except Exception as e:
+                print(f"Failed to pull {timespan} data for {ticker}: {e}")
+                results[(ticker, timespan)] = e
+
+    failed = [key for key, result in results.items() if isinstance(result, Exception)]
+    print(
+        f"Polygon data complete for {len(results) - len(failed)} of {len(jobs)} jobs."
+    )
+    if failed:
+        print(f"Failed jobs: {failed}")
+
+    return results
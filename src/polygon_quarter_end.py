@@ -1,6 +1,8 @@
 import os
 import pandas as pd
 
+from resample_period_end import resample_period_end
+
 
 def polygon_quarter_end(
     base_directory,
@@ -46,21 +48,12 @@ def polygon_quarter_end(
     # Set location from where to read existing pickle file
     location = f"{base_directory}/{source}/{asset_class}/{timespan}/{ticker}.pkl"
 
-    # Read data from pickle
-    df = pd.read_pickle(location)
-
-    # Reset index if 'Date' is column is the index
-    if "Date" not in df.columns:
-        df = df.reset_index()
-
-    # Keep only required columns
-    df = df[["Date", "close"]]
-
-    # Set index to date column
-    df = df.set_index("Date")
-
-    # Resample data to month end
-    df_quarter_end = df.resample("QE").last()
+    # Resample data to quarter end, updating the cached results incrementally
+    df_quarter_end = resample_period_end(
+        location=location,
+        columns=["close"],
+        cache_directory=f"{base_directory}/Cache/Period_End",
+    )["QE"]
 
     # Create directory
     directory = f"{base_directory}/{source}/{asset_class}/Quarter_End"
@@ -0,0 +1,518 @@
+import asyncio
+import json
+import logging
+import numpy as np
+import pandas as pd
+import time
+
+from add_rsi_ma_bb import add_rsi_ma_bb
+from backtest_rsi_multi_asset_strategy import backtest_rsi_multi_asset_strategy
+from coinbase_rsi_pipeline import RSIOrderPipeline
+from create_signals import create_signals
+from load_crypto_data import load_crypto_data
+from streaming_rsi import StreamingRSI
+
+
+class SimulatedExchange:
+    """
+    Exchange that fills the bot's orders against replayed minute candles.
+
+    Implements the two REST calls used by `RSIOrderPipeline` (counting the buy
+    orders received in `buy_orders`), and
+    `process_candle` applies one candle to the open orders and returns the
+    `user` channel messages for the orders that were filled or cancelled:
+
+    - A buy limit fills when the candle trades at or below the limit, at the
+      limit or the open, whichever is lower. If `buy_expire_candles` is set,
+      a buy that is not filled within that many candles is cancelled
+      together with the stop orders waiting for it.
+    - A stop limit sell is armed once the base size is held (the stop is
+      placed together with the buy). It triggers when the low reaches the
+      stop and then fills as a limit sell once the high is at or above the
+      limit, at the limit or the open, whichever is higher.
+
+    Orders are processed in the order they were placed, so a buy and its stop
+    can both fill on the same candle. A trade is added to `trades` when its
+    buy fills and its exit is filled in when the stop fills, so a position
+    still open at the end of the replay has no exit (NaT/NaN).
+
+    Parameters:
+    -----------
+    buy_expire_candles : int, optional
+        Candles after which an unfilled buy is cancelled. If None, buys stay
+        open until filled (default is 1, which matches the limit entry of
+        `backtest_rsi_multi_asset_strategy`).
+    """
+
+    def __init__(self, buy_expire_candles: int = 1):
+        self.buy_expire_candles = buy_expire_candles
+        self.open_orders = {}
+        self.position = 0.0
+        self.trades = []
+        self.buy_orders = 0
+        self._trade = None
+        self._next_id = 0
+
+    def _add_order(self, order: dict) -> dict:
+        self._next_id += 1
+        order_id = f"sim-{self._next_id}"
+        self.open_orders[order_id] = {"order_id": order_id, "candles": 0, **order}
+        return {"success": True, "success_response": {"order_id": order_id}}
+
+    def limit_order_gtc_buy(self, client_order_id, product_id, base_size, limit_price):
+        self.buy_orders += 1
+        return self._add_order(
+            {
+                "side": "BUY",
+                "client_order_id": client_order_id,
+                "product_id": product_id,
+                "size": float(base_size),
+                "limit_price": float(limit_price),
+            }
+        )
+
+    def stop_limit_order_gtc_sell(
+        self,
+        client_order_id,
+        product_id,
+        base_size,
+        limit_price,
+        stop_price,
+        stop_direction,
+    ):
+        return self._add_order(
+            {
+                "side": "SELL",
+                "client_order_id": client_order_id,
+                "product_id": product_id,
+                "size": float(base_size),
+                "limit_price": float(limit_price),
+                "stop_price": float(stop_price),
+                "triggered": False,
+            }
+        )
+
+    def process_candle(self, timestamp, open_, high, low) -> list:
+        """
+        Apply a candle to the open orders.
+
+        Returns:
+        --------
+        list
+            `user` channel messages (JSON strings) for the orders that were
+            filled or cancelled on this candle.
+        """
+
+        updates = []
+
+        for order_id, order in list(self.open_orders.items()):
+            if order["side"] == "BUY":
+                if low <= order["limit_price"]:
+                    price = min(order["limit_price"], open_)
+                    self.position += order["size"]
+                    self._trade = {
+                        "entry_time": timestamp,
+                        "entry_price": price,
+                        "exit_time": pd.NaT,
+                        "exit_price": np.nan,
+                    }
+                    self.trades.append(self._trade)
+                    updates.append(self._close_order(order_id, "FILLED"))
+                else:
+                    order["candles"] += 1
+                    if (
+                        self.buy_expire_candles is not None
+                        and order["candles"] >= self.buy_expire_candles
+                    ):
+                        updates.append(self._close_order(order_id, "CANCELLED"))
+
+                        # Nothing is held for the waiting stop orders
+                        if self.position <= 0:
+                            for other_id, other in list(self.open_orders.items()):
+                                if other["side"] == "SELL":
+                                    updates.append(
+                                        self._close_order(other_id, "CANCELLED")
+                                    )
+
+            elif self.position >= order["size"]:
+                if not order["triggered"] and low <= order["stop_price"]:
+                    order["triggered"] = True
+                    price = order["limit_price"]
+                elif order["triggered"]:
+                    price = max(order["limit_price"], open_)
+                else:
+                    continue
+
+                if high >= order["limit_price"]:
+                    self.position -= order["size"]
+                    if self._trade is not None:
+                        self._trade["exit_time"] = timestamp
+                        self._trade["exit_price"] = price
+                        self._trade = None
+                    updates.append(self._close_order(order_id, "FILLED"))
+
+        return [
+            json.dumps(
+                {"channel": "user", "events": [{"type": "update", "orders": [o]}]}
+            )
+            for o in updates
+        ]
+
+    def _close_order(self, order_id: str, status: str) -> dict:
+        order = self.open_orders.pop(order_id)
+        return {
+            "order_id": order_id,
+            "client_order_id": order["client_order_id"],
+            "status": status,
+        }
+
+
+def _candle_messages(df: pd.DataFrame, ticker: str) -> list:
+    """Candles channel messages, one per minute candle."""
+
+    starts = df["Date"].to_numpy().astype("datetime64[s]").astype("int64")
+    columns = ["open", "high", "low", "close", "volume"]
+    values = {
+        col: df[f"{ticker}_{col}"].to_numpy(dtype="float64")
+        for col in columns
+        if f"{ticker}_{col}" in df.columns
+    }
+
+    messages = []
+    for i, start in enumerate(starts):
+        candle = {"start": str(start), "product_id": ticker}
+        candle.update({col: repr(float(values[col][i])) for col in values})
+        messages.append(
+            json.dumps(
+                {
+                    "channel": "candles",
+                    "events": [{"type": "update", "candles": [candle]}],
+                }
+            )
+        )
+
+    return messages
+
+
+async def _replay(pipeline, exchange, df: pd.DataFrame, ticker: str) -> dict:
+    """Feed the candles and the exchange's order updates through the pipeline."""
+
+    messages = _candle_messages(df, ticker)
+    dates = df["Date"].tolist()
+    opens = df[f"{ticker}_open"].to_numpy(dtype="float64")
+    highs = df[f"{ticker}_high"].to_numpy(dtype="float64")
+    lows = df[f"{ticker}_low"].to_numpy(dtype="float64")
+
+    rsi = np.full(len(df), np.nan)
+    ready = np.zeros(len(df), dtype=bool)
+
+    # Live entry decisions, by the candle the buy order is placed for (the
+    # candle after the close that triggered it), and whether the bot was flat
+    # when the close arrived
+    buy = np.zeros(len(df), dtype=bool)
+    flat = np.zeros(len(df), dtype=bool)
+    events = 0
+
+    stages = pipeline.start_stages()
+    start = time.perf_counter()
+    try:
+        for i, message in enumerate(messages):
+            # Orders placed at the previous close are filled during this candle
+            for update in exchange.process_candle(
+                dates[i], opens[i], highs[i], lows[i]
+            ):
+                pipeline.on_message(update)
+                events += 1
+
+            # Candle close through ingest, RSI, signal and order placement
+            was_flat = not pipeline.position_open
+            buy_orders = exchange.buy_orders
+            pipeline.on_message(message)
+            await pipeline.drain()
+            events += 1
+
+            rsi[i] = pipeline.rsi_state.rsi
+            ready[i] = pipeline.rsi_state.ready
+            if i + 1 < len(df):
+                buy[i + 1] = exchange.buy_orders > buy_orders
+                flat[i + 1] = was_flat
+    finally:
+        for task in stages:
+            task.cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
+
+    return {
+        "events": events,
+        "seconds": time.perf_counter() - start,
+        "rsi": rsi,
+        "ready": ready,
+        "buy": buy,
+        "flat": flat,
+    }
+
+
+def replay_rsi_bot(
+    ticker: str,
+    base_directory,
+    start_date: str = None,
+    end_date: str = None,
+    rsi_period: int = 14,
+    rsi_oversold: float = 30,
+    stop_loss_percent: float = 0.02,
+    order_size: str = "0.001",
+    buy_expire_candles: int = 1,
+    compare_backtest: bool = True,
+    excel_export: bool = False,
+    pickle_export: bool = False,
+    output_confirmation: bool = True,
+) -> dict:
+    """
+    Replay stored Coinbase minute candles through the live RSI bot and
+    compare its decisions with the research backtest.
+
+    Each candle is sent to `RSIOrderPipeline.on_message` as a candles channel
+    message and passed through the same ingest, RSI, signal, and order stages
+    as in live trading, as fast as the pipeline processes them. Orders go to
+    a `SimulatedExchange`, whose fills and cancellations are sent back
+    through the `user` channel handler.
+
+    With compare_backtest, the same data is run through `add_rsi_ma_bb`,
+    `create_signals` (RSI only), and `backtest_rsi_multi_asset_strategy`
+    with limit entries and a trailing stop of stop_loss_percent. The live
+    entry decisions are the buy orders the pipeline actually placed with the
+    exchange after the close of candle t - 1, and the backtest's are its
+    signals on candle t (RSI_prev below rsi_oversold). The live bot's fixed
+    stop loss and the backtest's trailing stop exit at different times, so
+    the decisions are compared only on the candles where both sides are
+    flat, and there they must agree. The trades are matched by entry time;
+    once the exits part ways the later entries are expected to differ too. A
+    live position still open at the end has no exit, and the backtest does
+    not return its own open trade, so these are left unmatched.
+
+    Parameters:
+    -----------
+    ticker : str
+        Crypto ticker, e.g., "BTC-USD".
+    base_directory
+        Base directory where data files are stored.
+    start_date : str, optional
+        Start date for the replay, e.g., "2023-01-01" (default is None).
+    end_date : str, optional
+        End date for the replay, e.g., "2023-12-31" (default is None).
+    rsi_period : int, optional
+        RSI calculation period (default is 14).
+    rsi_oversold : float, optional
+        RSI threshold for buy (default is 30).
+    stop_loss_percent : float, optional
+        Stop loss below the buy price in decimal format (default is 0.02).
+    order_size : str, optional
+        Base currency amount per order (default is "0.001").
+    buy_expire_candles : int, optional
+        Passed to `SimulatedExchange` (default is 1).
+    compare_backtest : bool, optional
+        If True, run the backtest on the same data and compare the decisions
+        (default is True).
+    excel_export : bool, optional
+        If True, export the trade comparison to Excel format (default is False).
+    pickle_export : bool, optional
+        If True, export the trade comparison to Pickle format (default is False).
+    output_confirmation : bool, optional
+        If True, print the throughput and the comparison (default is True).
+
+    Returns:
+    --------
+    dict
+        Dictionary with 'events', 'seconds', and 'events_per_second' of the
+        replay, the live 'trades', and with compare_backtest the 'signals'
+        DataFrame (one row per candle where both sides are flat and either
+        side enters, with 'live' and 'backtest' flags), 'signals_compared'
+        (number of candles where both sides are flat), 'signal_mismatches',
+        the backtest 'backtest_trades', and the 'trades_compared' DataFrame.
+    """
+
+    df = load_crypto_data(
+        tickers=[ticker],
+        base_directory=base_directory,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    df = df.dropna(subset=[f"{ticker}_close"]).reset_index(drop=True)
+
+    exchange = SimulatedExchange(buy_expire_candles=buy_expire_candles)
+
+    # Silence the per-candle logging of the pipeline while replaying
+    pipeline_logger = logging.getLogger("coinbase_rsi_pipeline")
+    level = pipeline_logger.level
+    pipeline_logger.setLevel(logging.WARNING)
+    try:
+
+        async def _run():
+            pipeline = RSIOrderPipeline(
+                client=exchange,
+                product_id=ticker,
+                rsi_state=StreamingRSI(period=rsi_period),
+                rsi_oversold=rsi_oversold,
+                stop_loss_percent=stop_loss_percent,
+                order_size=order_size,
+            )
+            return await _replay(pipeline, exchange, df, ticker)
+
+        replay = asyncio.run(_run())
+    finally:
+        pipeline_logger.setLevel(level)
+
+    results = {
+        "events": replay["events"],
+        "seconds": replay["seconds"],
+        "events_per_second": replay["events"] / replay["seconds"],
+        "trades": pd.DataFrame(
+            exchange.trades,
+            columns=["entry_time", "entry_price", "exit_time", "exit_price"],
+        ),
+    }
+
+    if compare_backtest == True:
+        technical_df = add_rsi_ma_bb(
+            tickers=[ticker],
+            data=df,
+            rsi_period=rsi_period,
+            ma_days=[],
+            bb_window=20,
+            bb_num_std=2.0,
+        )
+        signals_df = create_signals(
+            tickers=[ticker],
+            data=technical_df,
+            use_rsi=True,
+            rsi_threshold=rsi_oversold,
+            use_ma=True,
+            ma_days=[],
+            use_bbands=False,
+        )
+
+        # Candles after the live RSI warm-up
+        warmed_up = np.r_[False, replay["ready"][:-1]]
+
+        # Backtest on the signals after the live RSI warm-up
+        backtest_trades = backtest_rsi_multi_asset_strategy(
+            tickers=[ticker],
+            prices=technical_df,
+            signals=signals_df[signals_df["Date"].isin(df["Date"][warmed_up])],
+            initial_capital=10_000,
+            rsi_threshold=rsi_oversold,
+            trailing_stop_pct=stop_loss_percent,
+            ma_days=[],
+            order_entry="limit",
+            trading_fees=False,
+            trade_taker_fee=0.0,
+            trade_maker_fee=0.0,
+        )
+
+        backtest_trades = backtest_trades.reindex(
+            columns=["entry_time", "entry_price", "exit_time", "exit_price"]
+        )
+
+        # The backtest enters flat and is then in the trade after its entry
+        # candle through its exit candle, skipping the signals in between
+        dates = df["Date"].to_numpy()
+        in_trade = np.zeros(len(df) + 1, dtype="int64")
+        np.add.at(
+            in_trade,
+            np.searchsorted(
+                dates, backtest_trades["entry_time"].to_numpy(), side="right"
+            ),
+            1,
+        )
+        np.add.at(
+            in_trade,
+            np.searchsorted(
+                dates, backtest_trades["exit_time"].to_numpy(), side="right"
+            ),
+            -1,
+        )
+        backtest_flat = np.cumsum(in_trade[:-1]) == 0
+
+        # Entry decisions on the candles where both sides are flat
+        live = replay["buy"]
+        backtest = df["Date"].isin(signals_df["Date"]).to_numpy()
+        compared = warmed_up & replay["flat"] & backtest_flat
+
+        signals = pd.DataFrame(
+            {
+                "Date": df["Date"],
+                "live_rsi_prev": np.r_[np.nan, replay["rsi"][:-1]],
+                "backtest_rsi_prev": technical_df[f"{ticker}_RSI_prev"].to_numpy(),
+                "live": live,
+                "backtest": backtest,
+            }
+        )[compared & (live | backtest)].reset_index(drop=True)
+        trades_compared = pd.merge(
+            results["trades"].add_prefix("live_"),
+            backtest_trades.add_prefix("backtest_"),
+            how="outer",
+            left_on="live_entry_time",
+            right_on="backtest_entry_time",
+        )
+        trades_compared["entry_match"] = trades_compared[
+            "live_entry_time"
+        ].notna() & np.isclose(
+            trades_compared["live_entry_price"], trades_compared["backtest_entry_price"]
+        )
+        trades_compared["exit_match"] = trades_compared["entry_match"] & (
+            trades_compared["live_exit_time"] == trades_compared["backtest_exit_time"]
+        )
+
+        results["signals"] = signals
+        results["signals_compared"] = int(compared.sum())
+        results["signal_mismatches"] = int(
+            (signals["live"] != signals["backtest"]).sum()
+        )
+        results["backtest_trades"] = backtest_trades
+        results["trades_compared"] = trades_compared
+
+        # Export to excel
+        if excel_export == True:
+            trades_compared.to_excel(f"{ticker}_Replay_Parity.xlsx", sheet_name="data")
+        else:
+            pass
+
+        # Export to pickle
+        if pickle_export == True:
+            trades_compared.to_pickle(f"{ticker}_Replay_Parity.pkl")
+        else:
+            pass
+
+    # Output confirmation
+    if output_confirmation == True:
+        print(
+            f"Replayed {len(df)} candles for {ticker}: {results['events']} events in "
+            f"{results['seconds']:.2f} s ({results['events_per_second']:,.0f} events/sec)"
+        )
+        if compare_backtest == True:
+            print(
+                f"Entry decisions on {results['signals_compared']} candles where both "
+                f"are flat: {int(results['signals']['live'].sum())} live, "
+                f"{int(results['signals']['backtest'].sum())} backtest, "
+                f"{results['signal_mismatches']} mismatches"
+            )
+            print(
+                f"Trades: {len(results['trades'])} live, {len(backtest_trades)} backtest, "
+                f"{int(trades_compared['entry_match'].sum())} matching entries, "
+                f"{int(trades_compared['exit_match'].sum())} matching exits"
+            )
+    else:
+        pass
+
+    return results
+
+
+if __name__ == "__main__":
+    from settings import config
+
+    # Replay a month of BTC-USD minute candles through the live bot
+    replay_rsi_bot(
+        ticker="BTC-USD",
+        base_directory=config("DATA_DIR"),
+        start_date="2024-01-01",
+        end_date="2024-01-31",
+    )
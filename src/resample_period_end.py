@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+from pathlib import Path
+
+# Period frequency used to group the rows for each resampling rule
+PERIOD_FREQUENCIES = {"W": "W-SUN", "ME": "M", "QE": "Q-DEC", "YE": "Y-DEC"}
+
+
+def _read_source(location: Path) -> pd.DataFrame:
+    """Read a daily data file with 'Date' as a column."""
+
+    if location.suffix == ".pkl":
+        df = pd.read_pickle(location)
+    elif location.suffix == ".parquet":
+        df = pd.read_parquet(location)
+    else:
+        df = pd.read_excel(location, sheet_name="data", engine="calamine")
+
+    # Reset index if 'Date' is column is the index
+    if "Date" not in df.columns:
+        df = df.reset_index()
+
+    return df
+
+
+def _resample_last(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Same result as `df.resample(rule).last()`: the last non-null value of each
+    column in each period, labeled with the period end date, including empty
+    periods.
+    """
+
+    freq = PERIOD_FREQUENCIES[rule]
+    periods = df.index.to_period(freq)
+    labels = periods.end_time.normalize()
+
+    df_period_end = df.groupby(labels).last()
+
+    all_periods = pd.period_range(periods[0], periods[-1], freq=freq)
+    df_period_end = df_period_end.reindex(all_periods.end_time.normalize())
+    df_period_end.index.name = df.index.name
+
+    return df_period_end
+
+
+def _prefix_hash(df: pd.DataFrame, rows: int) -> str:
+    """Hash of the first `rows` rows, used to detect rewritten history."""
+
+    return str(int(pd.util.hash_pandas_object(df.iloc[:rows], index=True).sum()))
+
+
+def select_total_return_column(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep the 'Adj Close' column, or the 'Close' column if there is none. Used
+    as the `transform` of `resample_period_end` for total return data.
+
+    Raises:
+    -------
+    ValueError
+        If the data has neither an 'Adj Close' nor a 'Close' column.
+    """
+
+    # Check if there is an 'Adj_Close' column
+    if "Adj Close" in df.columns:
+        return df[["Date", "Adj Close"]]
+
+    # Check if there is a 'Close' column
+    elif "Close" in df.columns:
+        return df[["Date", "Close"]]
+
+    # If neither is found, raise an error
+    else:
+        raise ValueError("Close or Adj Close not found in columns.")
+
+
+def resample_period_end(
+    location,
+    columns: list = None,
+    rules: list = None,
+    cache_directory=None,
+    transform=None,
+) -> dict:
+    """
+    Resample a daily data file to period-end values for several calendars,
+    updating previously cached results incrementally.
+
+    Every rule is computed in the same pass over the data and matches
+    `df.resample(rule).last()`. If `cache_directory` is given, the results
+    and the state of the series (the source file's size and modification time,
+    and the number and hash of the rows processed) are stored there, and on
+    the next call:
+
+    * if the source file has not changed, the cached results are returned
+      without reading it
+    * if rows were only appended, only the rows from the start of each rule's
+      last (possibly incomplete) period onward are resampled and merged with
+      the cached results
+    * if earlier rows changed (e.g., after a split adjustment), everything is
+      recomputed
+
+    Parameters:
+    -----------
+    location
+        Path to the daily data file ('.pkl', '.parquet', or Excel with a 'data'
+        sheet).
+    columns : list, optional
+        Columns to resample, e.g., ["close"]. If None, every column except
+        'Date' is kept after the transform.
+    rules : list, optional
+        Resampling rules out of 'W', 'ME', 'QE', and 'YE' (default is all four).
+    cache_directory : optional
+        Directory for the cached results and state. If None, the results are
+        always computed from scratch.
+    transform : callable, optional
+        Function applied to the DataFrame read from the file (with 'Date' as a
+        column) before the columns are selected, e.g., to fill dividends.
+
+    Returns:
+    --------
+    dict
+        Dictionary of rule -> DataFrame of period-end values indexed by date.
+
+    Example:
+    --------
+    >>> df_month_end = resample_period_end(
+    ...     f"{DATA_DIR}/Polygon/Equities/day/SPY.pkl",
+    ...     columns=["close"],
+    ...     rules=["ME", "QE"],
+    ...     cache_directory=f"{DATA_DIR}/Cache/Period_End",
+    ... )["ME"]
+    """
+
+    location = Path(location)
+    rules = list(rules) if rules is not None else list(PERIOD_FREQUENCIES)
+    for rule in rules:
+        if rule not in PERIOD_FREQUENCIES:
+            raise Exception(
+                f"Invalid rule: {rule}. Acceptable rules are: {list(PERIOD_FREQUENCIES)}."
+            )
+
+    source_stat = location.stat()
+
+    # ----- Cached state -----
+    state = None
+    cached = {}
+    if cache_directory is not None:
+        key = repr(
+            (
+                str(location.resolve()),
+                columns,
+                getattr(transform, "__qualname__", None),
+            )
+        )
+        cache_name = hashlib.md5(key.encode()).hexdigest()
+        cache_directory = Path(cache_directory)
+        state_path = cache_directory / f"{cache_name}.json"
+
+        if state_path.exists():
+            with open(state_path) as f:
+                state = json.load(f)
+            for rule in state["rules"]:
+                cached[rule] = pd.read_pickle(
+                    cache_directory / f"{cache_name}_{rule}.pkl"
+                )
+
+        # Source unchanged: return the cached results
+        if (
+            state is not None
+            and state["size"] == source_stat.st_size
+            and state["mtime"] == source_stat.st_mtime
+            and all(rule in cached for rule in rules)
+        ):
+            return {rule: cached[rule].copy() for rule in rules}
+
+    # ----- Read and prepare the data -----
+    df = _read_source(location)
+    if transform is not None:
+        df = transform(df)
+    if columns is not None:
+        df = df[["Date"] + [c for c in columns if c != "Date"]]
+    df = df.set_index("Date")
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="mergesort")
+
+    # Only rows appended since the last call: incremental update
+    incremental = (
+        state is not None
+        and len(df) >= state["rows"]
+        and _prefix_hash(df, state["rows"]) == state["prefix_hash"]
+    )
+
+    results = {}
+    for rule in sorted(set(rules) | set(cached)):
+        if len(df) == 0:
+            results[rule] = df.iloc[:0].copy()
+        elif incremental and rule in cached and len(cached[rule]) > 0:
+            # Re-resample from the start of the last cached period onward
+            last_label = cached[rule].index[-1]
+            period_start = last_label.to_period(PERIOD_FREQUENCIES[rule]).start_time
+            new_rows = df[df.index >= period_start]
+            results[rule] = pd.concat(
+                [
+                    cached[rule][cached[rule].index < last_label],
+                    _resample_last(new_rows, rule),
+                ]
+            )
+        else:
+            results[rule] = _resample_last(df, rule)
+
+    # ----- Save the results and state -----
+    if cache_directory is not None:
+        cache_directory.mkdir(parents=True, exist_ok=True)
+        for rule, df_period_end in results.items():
+            df_period_end.to_pickle(cache_directory / f"{cache_name}_{rule}.pkl")
+
+        # Write the state last, through a temporary file and a rename
+        tmp_path = state_path.with_name(f"{state_path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "source": str(location),
+                    "size": source_stat.st_size,
+                    "mtime": source_stat.st_mtime,
+                    "rows": len(df),
+                    "prefix_hash": _prefix_hash(df, len(df)),
+                    "rules": sorted(results),
+                },
+                f,
+            )
+        os.replace(tmp_path, state_path)
+
+    return {rule: results[rule].copy() for rule in rules}
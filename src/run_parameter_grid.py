@@ -0,0 +1,228 @@
+import itertools as it
+import json
+import os
+import pandas as pd
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from tqdm import tqdm
+
+
+def _combo_key(params: dict) -> str:
+    """Stable string key for a parameter combination."""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _json_default(o):
+    """Serialize NumPy scalars and timestamps found in result dicts."""
+    if isinstance(o, (pd.Timestamp, datetime)):
+        return o.isoformat()
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+
+def _run_combo_timed(run_combo, params: dict) -> tuple[dict, float]:
+    """Run a single combination in a worker and time it."""
+    combo_start_time = time.time()
+    try:
+        result = run_combo(params)
+    except Exception as e:
+        result = {"Success": False, "Error": str(e)}
+    return result, time.time() - combo_start_time
+
+
+def run_parameter_grid(
+    param_grid: dict,
+    run_combo,
+    results_path,
+    max_workers: int = None,
+    alpha: float = 0.2,
+    desc: str = "Backtesting",
+) -> pd.DataFrame:
+    """
+    Run every combination of a parameter grid over a process pool with
+    resumable results.
+
+    Each completed combination is appended as one JSON line to `results_path`
+    as soon as it finishes. When the function is started again with the same
+    `results_path`, combinations already present in the file are skipped, so an
+    interrupted or crashed sweep resumes where it stopped.
+
+    Progress is reported with tqdm and an estimated finish time based on an
+    exponential moving average (EMA) of the runtime of successful combinations,
+    falling back to all combinations if none have succeeded yet.
+
+    Parameters:
+    -----------
+    param_grid : dict
+        Dictionary of parameter name to list of values.
+    run_combo : callable
+        Top-level (picklable) function taking a dict of parameters and returning
+        a dict of result fields, or a list of such dicts when one combination
+        produces several results (e.g. one per trailing stop level simulated
+        together). Each dict should contain a boolean 'Success'.
+    results_path
+        Path to the append-only JSON lines results file.
+    max_workers : int, optional
+        Number of worker processes (default is the number of CPUs). With
+        max_workers=1 the combinations are run serially in this process.
+    alpha : float, optional
+        Smoothing factor for the runtime EMA (default is 0.2).
+    desc : str, optional
+        Description for the progress bar (default is "Backtesting").
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame of all results in the results file, including results from
+        previous runs.
+    """
+
+    results_path = Path(results_path)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Build parameter combinations
+    keys = list(param_grid.keys())
+    combos = [dict(zip(keys, combo)) for combo in it.product(*param_grid.values())]
+
+    # Skip combinations already in the results file
+    completed = set()
+    if results_path.exists():
+        with open(results_path) as f:
+            for line in f:
+                try:
+                    completed.add(json.loads(line)["Combo Key"])
+                except (json.JSONDecodeError, KeyError):
+                    # Partially written last line from an interrupted run
+                    pass
+
+    pending = [params for params in combos if _combo_key(params) not in completed]
+    total_combos = len(pending)
+
+    if completed:
+        print(
+            f"Resuming: {len(combos) - total_combos} of {len(combos)} combinations already complete."
+        )
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    overall_start = time.time()
+
+    # Runtime tracking
+    ema_runtime = None  # all runs
+    success_count = 0
+    success_elapsed = 0.0
+    success_ema_runtime = None
+
+    progress = tqdm(total=total_combos, desc=desc, ncols=100)
+
+    def _record(idx, params, result, combo_runtime, results_file):
+        nonlocal ema_runtime, success_count, success_elapsed, success_ema_runtime
+
+        # Timing updates
+        ema_runtime = (
+            combo_runtime
+            if ema_runtime is None
+            else alpha * combo_runtime + (1 - alpha) * ema_runtime
+        )
+        elapsed = time.time() - overall_start
+        avg_runtime_all = elapsed / idx
+
+        # One record per result of the combination
+        results = result if isinstance(result, list) else [result]
+
+        # Update success-only metrics
+        success = any(bool(r.get("Success", False)) for r in results)
+        if success:
+            success_count += 1
+            success_elapsed += combo_runtime
+            success_ema_runtime = (
+                combo_runtime
+                if success_ema_runtime is None
+                else alpha * combo_runtime + (1 - alpha) * success_ema_runtime
+            )
+
+        # --- ETA calculation preferring success-only data ---
+        # Runtimes are per worker, so divide by the number of workers
+        remaining = total_combos - idx
+        if success_count > 0:
+            avg_success = success_elapsed / success_count
+            per_combo = (
+                success_ema_runtime
+                if success_count > 1 and success_ema_runtime is not None
+                else avg_success
+            )
+        else:
+            per_combo = (
+                ema_runtime if idx > 1 and ema_runtime is not None else avg_runtime_all
+            )
+        eta_sec = remaining * per_combo / max_workers
+
+        finish_time = datetime.now() + timedelta(seconds=eta_sec)
+        progress.set_postfix({"finish": finish_time.strftime("%H:%M:%S")})
+        progress.update(1)
+
+        # --- runtime & metadata ---
+        runtime = {
+            "Total Runtime (s)": round(elapsed, 2),
+            "Average Runtime (s)": round(avg_runtime_all, 2),
+            "Runtime (s)": round(combo_runtime, 2),
+            "Runtime EMA (s)": round(ema_runtime, 2),
+            "Success-only Runtime EMA (s)": (
+                round(success_ema_runtime, 2)
+                if success_ema_runtime is not None
+                else None
+            ),
+        }
+
+        # Append all results of the combination in one write and flush so
+        # they survive a crash together
+        lines = [
+            json.dumps(
+                {"Combo Key": _combo_key(params), **r, **runtime},
+                default=_json_default,
+            )
+            + "\n"
+            for r in results
+        ]
+        results_file.write("".join(lines))
+        results_file.flush()
+
+    with open(results_path, "a") as results_file:
+        # Terminate a partially written last line before appending
+        if results_file.tell() > 0:
+            with open(results_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    results_file.write("\n")
+
+        if max_workers == 1:
+            for idx, params in enumerate(pending, start=1):
+                result, combo_runtime = _run_combo_timed(run_combo, params)
+                _record(idx, params, result, combo_runtime, results_file)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_run_combo_timed, run_combo, params): params
+                    for params in pending
+                }
+                for idx, future in enumerate(as_completed(futures), start=1):
+                    result, combo_runtime = future.result()
+                    _record(idx, futures[future], result, combo_runtime, results_file)
+
+    progress.close()
+
+    # Load every result, including those from previous runs
+    with open(results_path) as f:
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+
+    return pd.DataFrame(records)
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+def simulate_rebalancing(
+    prices: np.ndarray,
+    target_weights: np.ndarray,
+    starting_cash: float,
+    cash_contrib,
+    rebal_rows: np.ndarray,
+    rebal_per_high: float,
+    rebal_per_low: float,
+) -> dict:
+    """
+    Simulate a portfolio that is rebalanced to target weights on given rows
+    and whenever any asset's weight leaves the rebalance band.
+
+    Share holdings are carried in arrays. Between two rebalances the holdings
+    only change by the daily contribution, so the holdings of a whole segment
+    are a cumulative sum, and the next rebalance is the first row of the
+    segment that is a scheduled rebalance row or breaches the band. Python
+    only loops over the rebalance events, and each segment ends at the next
+    scheduled rebalance row at the latest, so the total work is linear in the
+    number of rows.
+
+    On the first row the starting cash is invested at the target weights. On
+    every later row, before action (BA) values use the previous row's after
+    action (AA) shares; on a rebalance, the BA total plus the contribution is
+    invested at the target weights, otherwise the contribution is split by
+    the target weights.
+
+    Parameters:
+    -----------
+    prices : np.ndarray
+        Array of shape (rows, funds) with close prices.
+    target_weights : np.ndarray
+        Array of shape (funds,) with target portfolio weights summing to 1.
+    starting_cash : float
+        Starting investment balance.
+    cash_contrib : float or np.ndarray
+        Cash contribution to be made daily, or an array of shape (rows,) with
+        the contribution of each row (a contribution schedule).
+    rebal_rows : np.ndarray
+        Sorted row numbers of the scheduled (e.g., annual) rebalances.
+    rebal_per_high : float
+        High percentage for rebalance.
+    rebal_per_low : float
+        Low percentage for rebalance.
+
+    Returns:
+    --------
+    dict
+        Dictionary with arrays 'BA_Shares' and 'AA_Shares' of shape (rows,
+        funds) and 'Rebalance' of shape (rows,) (True on rebalance rows).
+    """
+
+    prices = np.asarray(prices, dtype="float64")
+    target_weights = np.asarray(target_weights, dtype="float64")
+    rebal_rows = np.asarray(rebal_rows, dtype="int64")
+    n = len(prices)
+
+    ba_shares = np.empty_like(prices)
+    aa_shares = np.empty_like(prices)
+    rebalance = np.zeros(n, dtype=bool)
+    if n == 0:
+        return {"BA_Shares": ba_shares, "AA_Shares": aa_shares, "Rebalance": rebalance}
+
+    # Shares bought each row with the contribution when there is no rebalance
+    cash_contrib = np.broadcast_to(np.asarray(cash_contrib, dtype="float64"), (n,))
+    contrib_shares = cash_contrib[:, None] * target_weights / prices
+
+    ba_shares[0] = starting_cash * target_weights / prices[0]
+    aa_shares[0] = ba_shares[0]
+
+    last = 0
+    while last < n - 1:
+        # The segment runs up to the next scheduled rebalance row
+        next_scheduled = rebal_rows[np.searchsorted(rebal_rows, last, side="right") :]
+        end = next_scheduled[0] if len(next_scheduled) > 0 else n - 1
+
+        # Holdings before action on rows last + 1 ... end, assuming no rebalance
+        seg_ba = aa_shares[last] + np.vstack(
+            [
+                np.zeros((1, prices.shape[1])),
+                np.cumsum(contrib_shares[last + 1 : end], axis=0),
+            ]
+        )
+        seg_value = seg_ba * prices[last + 1 : end + 1]
+        seg_weights = seg_value / seg_value.sum(axis=1, keepdims=True)
+
+        breach = ((seg_weights > rebal_per_high) | (seg_weights < rebal_per_low)).any(
+            axis=1
+        )
+        if len(next_scheduled) > 0:
+            breach[-1] = True
+        hits = np.flatnonzero(breach)
+
+        # Fill the rows up to the event (or the end of the data)
+        stop = hits[0] + 1 if len(hits) > 0 else end - last
+        rows = slice(last + 1, last + 1 + stop)
+        ba_shares[rows] = seg_ba[:stop]
+        aa_shares[rows] = seg_ba[:stop] + contrib_shares[rows]
+
+        if len(hits) == 0:
+            break
+
+        # Rebalance to the target weights on the event row
+        event = last + 1 + hits[0]
+        total_ba = seg_value[hits[0]].sum()
+        aa_shares[event] = (
+            (total_ba + cash_contrib[event]) * target_weights / prices[event]
+        )
+        rebalance[event] = True
+        last = event
+
+    return {"BA_Shares": ba_shares, "AA_Shares": aa_shares, "Rebalance": rebalance}
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from simulate_rebalancing import simulate_rebalancing
+
 
 def strategy_harry_brown_perm_port(
     fund_list: str,
@@ -13,10 +16,16 @@ def strategy_harry_brown_perm_port(
     excel_export: bool,
     pickle_export: bool,
     output_confirmation: bool,
+    target_weights: list = None,
 ) -> pd.DataFrame:
     """
     Execute the re-balance strategy based on specified criteria.
 
+    The portfolio is rebalanced to the target weights on the first trading day
+    on or after rebal_month/rebal_day each year and whenever a fund's weight
+    is above rebal_per_high or below rebal_per_low. The simulation itself runs
+    on price arrays (see `simulate_rebalancing`).
+
     Parameters:
     -----------
     fund_list (str):
@@ -41,6 +50,9 @@ def strategy_harry_brown_perm_port(
         If True, export data to Pickle format.
     output_confirmation : bool
         If True, print confirmation message.
+    target_weights : list, optional
+        Target portfolio weights in the order of fund_list. If None, the funds
+        are equally weighted (default is None).
 
     Returns:
     --------
@@ -50,6 +62,11 @@ def strategy_harry_brown_perm_port(
 
     num_funds = len(fund_list)
 
+    # Equal weights unless target weights are given
+    if target_weights is None:
+        target_weights = [1 / num_funds] * num_funds
+    target_weights = np.asarray(target_weights, dtype="float64")
+
     df = close_prices_df.copy()
     df.reset_index(inplace=True)
 
@@ -68,6 +85,26 @@ def strategy_harry_brown_perm_port(
         rebal_date.groupby(rebal_date["Date"].dt.year).first().reset_index(drop=True)
     )
 
+    # Rows of the annual rebalance dates
+    rebal_rows = np.flatnonzero(df["Date"].isin(rebal_dates_by_year["Date"]).values)
+
+    # Run the strategy on the price arrays
+    prices = df[[fund + "_Close" for fund in fund_list]].to_numpy(dtype="float64")
+    sim = simulate_rebalancing(
+        prices=prices,
+        target_weights=target_weights,
+        starting_cash=starting_cash,
+        cash_contrib=cash_contrib,
+        rebal_rows=rebal_rows,
+        rebal_per_high=rebal_per_high,
+        rebal_per_low=rebal_per_low,
+    )
+
+    ba_invested = sim["BA_Shares"] * prices
+    aa_invested = sim["AA_Shares"] * prices
+    total_ba = ba_invested.sum(axis=1)
+    total_aa = aa_invested.sum(axis=1)
+
     """
     Column order for the dataframe:
     df[fund + "_BA_Shares"]
@@ -82,120 +119,27 @@ def strategy_harry_brown_perm_port(
     df['Total_AA_$_Invested']
     """
 
-    # Calculate the columns and initial values for before action (BA) shares, $ invested, and port %
-    for fund in fund_list:
-        df[fund + "_BA_Shares"] = starting_cash / num_funds / df[fund + "_Close"]
-        df[fund + "_BA_$_Invested"] = df[fund + "_BA_Shares"] * df[fund + "_Close"]
-        df[fund + "_BA_Port_%"] = 0.25
-
-    # Set column values initially
-    df["Total_BA_$_Invested"] = starting_cash
-    df["Contribution"] = cash_contrib
-    df["Rebalance"] = "No"
-
-    # Set columns and values initially for after action (AA) shares, $ invested, and port %
-    for fund in fund_list:
-        df[fund + "_AA_Shares"] = starting_cash / num_funds / df[fund + "_Close"]
-        df[fund + "_AA_$_Invested"] = df[fund + "_AA_Shares"] * df[fund + "_Close"]
-        df[fund + "_AA_Port_%"] = 0.25
-
-    # Set column value for after action (AA) total $ invested
-    df["Total_AA_$_Invested"] = starting_cash
-
-    # Iterate through the dataframe and execute the strategy
-    for index, row in df.iterrows():
-
-        # Ensure there's a previous row to reference by checking the index value
-        if index > 0:
-
-            # Initialize variable
-            Total_BA_Invested = 0
-
-            # Calculate before action (BA) shares and $ invested values
-            for fund in fund_list:
-                df.at[index, fund + "_BA_Shares"] = df.at[
-                    index - 1, fund + "_AA_Shares"
-                ]
-                df.at[index, fund + "_BA_$_Invested"] = (
-                    df.at[index, fund + "_BA_Shares"] * row[fund + "_Close"]
-                )
-
-                # Sum the asset values to find the total
-                Total_BA_Invested = (
-                    Total_BA_Invested + df.at[index, fund + "_BA_$_Invested"]
-                )
-
-            # Calculate before action (BA) port % values
-            for fund in fund_list:
-                df.at[index, fund + "_BA_Port_%"] = (
-                    df.at[index, fund + "_BA_$_Invested"] / Total_BA_Invested
-                )
-
-            # Set column for before action (BA) total $ invested
-            df.at[index, "Total_BA_$_Invested"] = Total_BA_Invested
-
-            # Initialize variables
-            rebalance = "No"
-            date = row["Date"]
-
-            # Check for a specific date annually
-            # Simple if statement to check if date_to_check is in jan_28_or_after_each_year
-            if date in rebal_dates_by_year["Date"].values:
-                rebalance = "Yes"
-            else:
-                pass
-
-            # Check to see if any asset has portfolio percentage of greater than 35% or less than 15% and if so set variable
-            for fund in fund_list:
-                if (
-                    df.at[index, fund + "_BA_Port_%"] > rebal_per_high
-                    or df.at[index, fund + "_BA_Port_%"] < rebal_per_low
-                ):
-                    rebalance = "Yes"
-                else:
-                    pass
-
-            # If rebalance is required, rebalance back to 25% for each asset, else just divide contribution evenly across assets
-            if rebalance == "Yes":
-                df.at[index, "Rebalance"] = rebalance
-                for fund in fund_list:
-                    df.at[index, fund + "_AA_$_Invested"] = (
-                        Total_BA_Invested + df.at[index, "Contribution"]
-                    ) * 0.25
-            else:
-                df.at[index, "Rebalance"] = rebalance
-                for fund in fund_list:
-                    df.at[index, fund + "_AA_$_Invested"] = (
-                        df.at[index, fund + "_BA_$_Invested"]
-                        + df.at[index, "Contribution"] * 0.25
-                    )
-
-            # Initialize variable
-            Total_AA_Invested = 0
-
-            # Set column values for after action (AA) shares and port %
-            for fund in fund_list:
-                df.at[index, fund + "_AA_Shares"] = (
-                    df.at[index, fund + "_AA_$_Invested"] / row[fund + "_Close"]
-                )
-
-                # Sum the asset values to find the total
-                Total_AA_Invested = (
-                    Total_AA_Invested + df.at[index, fund + "_AA_$_Invested"]
-                )
-
-            # Calculate after action (AA) port % values
-            for fund in fund_list:
-                df.at[index, fund + "_AA_Port_%"] = (
-                    df.at[index, fund + "_AA_$_Invested"] / Total_AA_Invested
-                )
-
-            # Set column for after action (AA) total $ invested
-            df.at[index, "Total_AA_$_Invested"] = Total_AA_Invested
-
-        # If this is the first row
-        else:
-            pass
+    columns = {}
+
+    # Before action (BA) shares, $ invested, and port %
+    for i, fund in enumerate(fund_list):
+        columns[fund + "_BA_Shares"] = sim["BA_Shares"][:, i]
+        columns[fund + "_BA_$_Invested"] = ba_invested[:, i]
+        columns[fund + "_BA_Port_%"] = ba_invested[:, i] / total_ba
+
+    columns["Total_BA_$_Invested"] = total_ba
+    columns["Contribution"] = cash_contrib
+    columns["Rebalance"] = np.where(sim["Rebalance"], "Yes", "No")
+
+    # After action (AA) shares, $ invested, and port %
+    for i, fund in enumerate(fund_list):
+        columns[fund + "_AA_Shares"] = sim["AA_Shares"][:, i]
+        columns[fund + "_AA_$_Invested"] = aa_invested[:, i]
+        columns[fund + "_AA_Port_%"] = aa_invested[:, i] / total_aa
+
+    columns["Total_AA_$_Invested"] = total_aa
+
+    df = pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
 
     df["Return"] = df["Total_AA_$_Invested"].pct_change()
     df["Cumulative_Return"] = (1 + df["Return"]).cumprod()
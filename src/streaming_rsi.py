@@ -0,0 +1,198 @@
+import math
+import numpy as np
+import pandas as pd
+
+
+class StreamingRSI:
+    """
+    Relative Strength Index (RSI) updated in O(1) per price.
+
+    Holds the Wilder-smoothed average gain and loss of `calculate_rsi`
+    (an exponential moving average with alpha = 1 / period and adjust=False)
+    instead of recomputing them over the price history, and keeps the most
+    recent closes in a fixed-size ring buffer.
+
+    Prices are grouped into bars by timestamp: an update with the same
+    timestamp as the last one revises that bar (e.g., the in-progress candle
+    sent repeatedly by the candles channel) and an update with a new
+    timestamp starts a new bar, so the RSI always equals `calculate_rsi` on
+    the series of bar closes.
+
+    Parameters:
+    -----------
+    period : int, optional
+        RSI calculation period (default is 14).
+    history : int, optional
+        Number of bar closes kept in the ring buffer (default is 100).
+
+    Example:
+    --------
+    >>> rsi_state = StreamingRSI(period=14)
+    >>> rsi_state.seed(df_minute["close"], df_minute["Date"])
+    >>> rsi = rsi_state.update(price, timestamp)
+    """
+
+    def __init__(self, period: int = 14, history: int = 100):
+        self.period = period
+        self.alpha = 1 / period
+
+        # Ring buffer of bar closes and timestamps
+        self._closes = np.full(history, np.nan)
+        self._times = np.full(history, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self._head = 0
+        self.bars = 0
+
+        # State after the last bar, and before it so the bar can be revised
+        self._state = (np.nan, np.nan, np.nan)
+        self._prev_state = (np.nan, np.nan, np.nan)
+        self._last_time = None
+        self.rsi = np.nan
+
+    def _smooth(self, average: float, value: float) -> float:
+        """One step of pandas' ewm(alpha, adjust=False).mean()."""
+
+        if math.isnan(average):
+            return value
+        old_wt = 1.0 - self.alpha
+        new_wt = self.alpha
+        return (old_wt * average + new_wt * value) / (old_wt + new_wt)
+
+    def _step(self, state: tuple, close: float) -> tuple:
+        """State (previous close, average gain, average loss) after a close."""
+
+        prev_close, avg_gain, avg_loss = state
+        if math.isnan(prev_close):
+            return (close, avg_gain, avg_loss)
+
+        delta = close - prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        return (close, self._smooth(avg_gain, gain), self._smooth(avg_loss, loss))
+
+    def _rsi(self, state: tuple) -> float:
+        """RSI from the state, with the same division rules as pandas."""
+
+        _, avg_gain, avg_loss = state
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return math.nan
+        if avg_loss == 0:
+            # gain / 0 is inf (RSI of 100) and 0 / 0 is NaN
+            return 100.0 if avg_gain > 0 else math.nan
+
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def update(self, close: float, timestamp=None) -> float:
+        """
+        Add a price and return the updated RSI.
+
+        Parameters:
+        -----------
+        close : float
+            Latest close price.
+        timestamp : optional
+            Start time of the bar. A price with the same timestamp as the last
+            one replaces the last bar's close; None always starts a new bar.
+
+        Returns:
+        --------
+        float
+            RSI after the update (NaN until there are two bars).
+        """
+
+        close = float(close)
+        capacity = len(self._closes)
+
+        if timestamp is not None and timestamp == self._last_time:
+            # Revise the last bar
+            self._state = self._step(self._prev_state, close)
+            self._closes[(self._head - 1) % capacity] = close
+        else:
+            # Start a new bar
+            self._prev_state = self._state
+            self._state = self._step(self._state, close)
+            self._closes[self._head] = close
+            self._times[self._head] = (
+                np.datetime64(timestamp, "ns")
+                if timestamp is not None
+                else np.datetime64("NaT")
+            )
+            self._head = (self._head + 1) % capacity
+            self.bars += 1
+            self._last_time = timestamp
+
+        self.rsi = self._rsi(self._state)
+
+        return self.rsi
+
+    def seed(self, closes, timestamps=None) -> float:
+        """
+        Initialize the state from a history of bar closes, e.g., stored minute
+        data, with the same calculation as `calculate_rsi`.
+
+        Parameters:
+        -----------
+        closes : array-like or pd.Series
+            Bar closes in chronological order.
+        timestamps : array-like or pd.Series, optional
+            Start times of the bars. The last one is used to recognize a
+            revision of the last bar by the next update.
+
+        Returns:
+        --------
+        float
+            RSI after the last close.
+        """
+
+        closes = pd.Series(np.asarray(closes, dtype="float64"))
+        if len(closes) == 0:
+            return self.rsi
+
+        delta = closes.diff()
+        avg_gain = delta.clip(lower=0).ewm(alpha=self.alpha, adjust=False).mean()
+        avg_loss = (-delta.clip(upper=0)).ewm(alpha=self.alpha, adjust=False).mean()
+
+        def _state_at(i):
+            return (closes.iloc[i], avg_gain.iloc[i], avg_loss.iloc[i])
+
+        self._state = tuple(float(x) for x in _state_at(-1))
+        self._prev_state = (
+            tuple(float(x) for x in _state_at(-2))
+            if len(closes) > 1
+            else (np.nan, np.nan, np.nan)
+        )
+
+        # Fill the ring buffer with the most recent closes
+        capacity = len(self._closes)
+        recent = closes.to_numpy()[-capacity:]
+        self._closes[:] = np.nan
+        self._closes[: len(recent)] = recent
+        self._times[:] = np.datetime64("NaT")
+        if timestamps is not None:
+            timestamps = pd.to_datetime(pd.Series(timestamps)).to_numpy(
+                dtype="datetime64[ns]"
+            )
+            self._times[: len(recent)] = timestamps[-capacity:]
+            self._last_time = pd.Timestamp(timestamps[-1]).to_pydatetime()
+        self._head = len(recent) % capacity
+        self.bars = len(closes)
+
+        self.rsi = self._rsi(self._state)
+
+        return self.rsi
+
+    @property
+    def ready(self) -> bool:
+        """True once there are more bars than the RSI period."""
+
+        return self.bars > self.period and not np.isnan(self.rsi)
+
+    def history(self) -> pd.DataFrame:
+        """Bar closes in the ring buffer, oldest first."""
+
+        capacity = len(self._closes)
+        count = min(self.bars, capacity)
+        order = (self._head - count + np.arange(count)) % capacity
+
+        return pd.DataFrame({"time": self._times[order], "close": self._closes[order]})
@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+
+# Statistics returned for each column and window, as named by summary_stats
+ROLLING_STATS = [
+    "Annual Mean Return (Arithmetic)",
+    "Annualized Volatility",
+    "Annualized Sharpe Ratio",
+    "CAGR (Geometric)",
+    "Max Drawdown",
+    "Peak",
+    "Trough",
+]
+
+
+def _last_true_position(mask: np.ndarray, col: np.ndarray) -> np.ndarray:
+    """Row-wise position of the last True in mask up to each column."""
+
+    return np.maximum.accumulate(np.where(mask, col, 0), axis=1)
+
+
+def _block_scans(log_wealth: np.ndarray, window: int) -> dict:
+    """
+    Prefix and suffix scans of the running maximum, minimum, and largest drop
+    of the log wealth within consecutive blocks of `window` rows.
+
+    For each row, the prefix scan covers the rows from the start of its block
+    to the row and the suffix scan the rows from the row to the end of its
+    block. A window of `window` rows spans at most the suffix of one block and
+    the prefix of the next, so its largest drop is found by combining two
+    scans (van Herk/Gil-Werman), the array form of a monotonic-deque sliding
+    window.
+    """
+
+    n = len(log_wealth)
+    blocks = -(-n // window)
+    padded = np.concatenate(
+        [log_wealth, np.full(blocks * window - n, log_wealth[-1])]
+    ).reshape(blocks, window)
+    col = np.arange(window)
+    base = (np.arange(blocks) * window)[:, None]
+
+    # ----- Prefix scans (left to right) -----
+    pmax = np.maximum.accumulate(padded, axis=1)
+    pmax_arg = _last_true_position(
+        np.c_[np.ones((blocks, 1), bool), padded[:, 1:] > pmax[:, :-1]], col
+    )
+    pmin = np.minimum.accumulate(padded, axis=1)
+    pmin_arg = _last_true_position(
+        np.c_[np.ones((blocks, 1), bool), padded[:, 1:] < pmin[:, :-1]], col
+    )
+    dd = pmax - padded
+    pdrop = np.maximum.accumulate(dd, axis=1)
+    ptrough = _last_true_position(
+        np.c_[np.ones((blocks, 1), bool), dd[:, 1:] > pdrop[:, :-1]], col
+    )
+    ppeak = np.take_along_axis(pmax_arg, ptrough, axis=1)
+
+    # ----- Suffix scans (right to left, ties go to the earliest row) -----
+    rev = padded[:, ::-1]
+    smax = np.maximum.accumulate(rev, axis=1)
+    smax_arg = _last_true_position(
+        np.c_[np.ones((blocks, 1), bool), rev[:, 1:] >= smax[:, :-1]], col
+    )
+    smin = np.minimum.accumulate(rev, axis=1)
+    smin_arg = _last_true_position(
+        np.c_[np.ones((blocks, 1), bool), rev[:, 1:] <= smin[:, :-1]], col
+    )
+    rise = rev - smin
+    sdrop = np.maximum.accumulate(rise, axis=1)
+    speak = _last_true_position(
+        np.c_[np.ones((blocks, 1), bool), rise[:, 1:] >= sdrop[:, :-1]], col
+    )
+    strough = np.take_along_axis(smin_arg, speak, axis=1)
+
+    def _flat(values, reverse=False, position=False):
+        if reverse:
+            values = values[:, ::-1]
+            if position:
+                values = window - 1 - values
+        if position:
+            values = values + base
+        return values.reshape(-1)[:n]
+
+    return {
+        "pmin": _flat(pmin),
+        "pmin_arg": _flat(pmin_arg, position=True),
+        "pdrop": _flat(pdrop),
+        "ppeak": _flat(ppeak, position=True),
+        "ptrough": _flat(ptrough, position=True),
+        "smax": _flat(smax, reverse=True),
+        "smax_arg": _flat(smax_arg, reverse=True, position=True),
+        "sdrop": _flat(sdrop, reverse=True),
+        "speak": _flat(speak, reverse=True, position=True),
+        "strough": _flat(strough, reverse=True, position=True),
+    }
+
+
+def _rolling_max_drawdown(log_wealth: np.ndarray, window: int) -> tuple:
+    """
+    Largest drop of the log wealth, with its peak and trough rows, in every
+    window of `window` rows ending at rows window - 1, ..., n - 1.
+    """
+
+    scans = _block_scans(log_wealth, window)
+
+    end = np.arange(window - 1, len(log_wealth))
+    start = end - window + 1
+
+    # Candidates: within the start block, across both blocks, within the end block
+    drops = np.vstack(
+        [
+            scans["sdrop"][start],
+            scans["smax"][start] - scans["pmin"][end],
+            scans["pdrop"][end],
+        ]
+    )
+    peaks = np.vstack(
+        [scans["speak"][start], scans["smax_arg"][start], scans["ppeak"][end]]
+    )
+    troughs = np.vstack(
+        [scans["strough"][start], scans["pmin_arg"][end], scans["ptrough"][end]]
+    )
+
+    # A window aligned with a block is its end block's prefix
+    aligned = start % window == 0
+    drops[:2, aligned] = -np.inf
+
+    best = np.argmax(drops, axis=0)
+    pick = (best, np.arange(len(end)))
+
+    return drops[pick], peaks[pick], troughs[pick]
+
+
+def summary_stats_rolling(
+    df: pd.DataFrame,
+    period: str,
+    use_calendar_days: bool,
+    windows: list = None,
+    mode: str = "rolling",
+) -> pd.DataFrame:
+    """
+    Calculate the statistics of summary_stats over rolling or expanding
+    windows for every column and window length at once.
+
+    The value for a window equals `summary_stats` applied to the returns in
+    that window. Mean and volatility use pandas' rolling/expanding windows, the
+    CAGR uses cumulative sums of log returns, and the max drawdown uses block
+    prefix/suffix scans of the log wealth index (see `_block_scans`), so every
+    statistic costs O(n) per column and window length.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe with return data indexed by date, one column per series.
+        Assumes returns are in decimal format (e.g., 0.05 for 5%).
+    period : str
+        Period for which to calculate statistics. Options are "Monthly", "Weekly", "Daily".
+    use_calendar_days : bool
+        If True, use calendar days for calculations. If False, use trading days.
+    windows : list, optional
+        Window lengths in rows, e.g., [21, 63, 252], for the rolling mode.
+    mode : str, optional
+        "rolling" for windows of fixed length, ending on each date, or
+        "expanding" for windows from the first return of each column to each
+        date (default is "rolling").
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame indexed by date with columns (column, window, statistic),
+        where window is the window length or "Expanding" and statistic is one
+        of ROLLING_STATS. Windows that are incomplete or contain a missing
+        return are NaN.
+    """
+
+    # Get the period in proper format
+    period = period.strip().capitalize()
+
+    # Map base timeframes
+    period_to_timeframe = {
+        "Monthly": 12,
+        "Weekly": 52,
+        "Daily": 365 if use_calendar_days else 252,
+    }
+
+    try:
+        timeframe = period_to_timeframe[period]
+    except KeyError:
+        raise ValueError(
+            f"Invalid period: {period}. Must be one of {list(period_to_timeframe.keys())}"
+        )
+
+    if mode == "rolling":
+        if not windows:
+            raise ValueError("At least one window is required for the rolling mode.")
+    elif mode == "expanding":
+        windows = ["Expanding"]
+    else:
+        raise ValueError(f"Invalid mode: {mode}. Must be 'rolling' or 'expanding'.")
+
+    n = len(df)
+    dates = df.index
+    stats = {}
+
+    for column in df.columns:
+        returns = df[column].astype("float64")
+        valid = returns.notna().to_numpy()
+        log_wealth = np.cumsum(np.log1p(returns.fillna(0).to_numpy()))
+
+        for window in windows:
+            if mode == "rolling":
+                mean = returns.rolling(window, min_periods=window).mean()
+                vol = returns.rolling(window, min_periods=window).std()
+                count = np.full(n, float(window))
+
+                # Windows with a missing return are NaN
+                complete = pd.Series(valid).rolling(window).sum().to_numpy() == window
+
+                # Log growth over each window
+                growth = np.full(n, np.nan)
+                if n >= window:
+                    growth[window - 1 :] = (
+                        log_wealth[window - 1 :] - np.r_[0.0, log_wealth[: n - window]]
+                    )
+
+                drop = np.full(n, np.nan)
+                peak = np.zeros(n, dtype="int64")
+                trough = np.zeros(n, dtype="int64")
+                if n >= window:
+                    (
+                        drop[window - 1 :],
+                        peak[window - 1 :],
+                        trough[window - 1 :],
+                    ) = _rolling_max_drawdown(log_wealth, window)
+            else:
+                # From the first return of the column
+                first = int(np.argmax(valid)) if valid.any() else n
+                mean = returns.expanding().mean()
+                vol = returns.expanding().std()
+                count = returns.expanding().count().to_numpy()
+                complete = np.arange(n) >= first
+
+                growth = log_wealth - (log_wealth[first - 1] if first > 0 else 0.0)
+
+                drop = np.full(n, np.nan)
+                peak = np.zeros(n, dtype="int64")
+                trough = np.zeros(n, dtype="int64")
+                if first < n:
+                    scans = _block_scans(log_wealth[first:], n - first)
+                    drop[first:] = scans["pdrop"]
+                    peak[first:] = scans["ppeak"] + first
+                    trough[first:] = scans["ptrough"] + first
+
+            mean = np.where(complete, mean.to_numpy() * timeframe, np.nan)
+            vol = np.where(complete, vol.to_numpy() * np.sqrt(timeframe), np.nan)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                stats[(column, window, "Annual Mean Return (Arithmetic)")] = mean
+                stats[(column, window, "Annualized Volatility")] = vol
+                stats[(column, window, "Annualized Sharpe Ratio")] = mean / vol
+                stats[(column, window, "CAGR (Geometric)")] = np.where(
+                    complete, np.exp(growth * timeframe / count) - 1, np.nan
+                )
+
+            has_drawdown = complete & ~np.isnan(drop)
+            stats[(column, window, "Max Drawdown")] = np.where(
+                has_drawdown, np.exp(-drop) - 1, np.nan
+            )
+            stats[(column, window, "Peak")] = dates[peak].where(has_drawdown)
+            stats[(column, window, "Trough")] = dates[trough].where(has_drawdown)
+
+    df_stats = pd.DataFrame(stats, index=df.index)
+    df_stats.columns.names = ["Column", "Window", "Statistic"]
+
+    return df_stats
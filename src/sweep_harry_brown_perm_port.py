@@ -0,0 +1,187 @@
+import itertools as it
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from simulate_rebalancing import simulate_rebalancing
+from summary_stats import summary_stats
+
+# Statistics from summary_stats included in the results
+SWEEP_STATS = [
+    "CAGR (Geometric)",
+    "Annualized Volatility",
+    "Annualized Sharpe Ratio",
+    "Max Drawdown",
+    "MAR Ratio",
+]
+
+
+def _annual_rebal_rows(dates: pd.Series, rebal_month: int, rebal_day: int):
+    """
+    Rows of the first date on or after rebal_month/rebal_day in each year, as
+    selected by `strategy_harry_brown_perm_port`.
+    """
+
+    rebal_date = dates[(dates.dt.month == rebal_month) & (dates.dt.day >= rebal_day)]
+    first_rows = rebal_date.groupby(rebal_date.dt.year).head(1)
+
+    return np.flatnonzero(dates.isin(first_rows).values)
+
+
+def sweep_harry_brown_perm_port(
+    fund_list: list,
+    starting_cash: int,
+    close_prices_df: pd.DataFrame,
+    rebal_dates: list,
+    rebal_bands: list,
+    cash_contribs: list,
+    target_weights: list = None,
+    period: str = "Daily",
+    use_calendar_days: bool = False,
+    max_workers: int = 8,
+    excel_export: bool = False,
+    pickle_export: bool = False,
+    output_confirmation: bool = True,
+) -> pd.DataFrame:
+    """
+    Evaluate the permanent portfolio strategy over a grid of rebalance dates,
+    rebalance bands, and contribution schedules.
+
+    The prices are converted to arrays once and shared by every combination,
+    the annual rebalance rows are found once per rebalance date, and the
+    combinations are run in a thread pool with `simulate_rebalancing`. Each
+    combination gives the same results as `strategy_harry_brown_perm_port`
+    with the same parameters.
+
+    Parameters:
+    -----------
+    fund_list : list
+        List of funds for data to be combined from. Funds are strings in the form "BTC-USD".
+    starting_cash : int
+        Starting investment balance.
+    close_prices_df : pd.DataFrame
+        DataFrame containing date and close prices for all funds to be included.
+    rebal_dates : list
+        List of (month, day) tuples for the annual rebalance, e.g., [(1, 1), (7, 1)].
+    rebal_bands : list
+        List of (high, low) tuples of rebalance percentages, e.g., [(0.35, 0.15)].
+    cash_contribs : list
+        List of daily cash contributions. Each item is a number, or a
+        pd.Series of contributions indexed by date (a contribution schedule,
+        dates missing from the series contribute nothing) whose name is used
+        in the results.
+    target_weights : list, optional
+        Target portfolio weights in the order of fund_list. If None, the funds
+        are equally weighted (default is None).
+    period : str, optional
+        Period passed to `summary_stats` (default is "Daily").
+    use_calendar_days : bool, optional
+        Passed to `summary_stats` (default is False).
+    max_workers : int, optional
+        Number of combinations run at once (default is 8).
+    excel_export : bool, optional
+        If True, export the results to Excel format (default is False).
+    pickle_export : bool, optional
+        If True, export the results to Pickle format (default is False).
+    output_confirmation : bool, optional
+        If True, print confirmation message (default is True).
+
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame with one row per combination containing the parameters, the
+        number of rebalances, the ending balance, and the statistics in
+        SWEEP_STATS.
+    """
+
+    num_funds = len(fund_list)
+    if target_weights is None:
+        target_weights = [1 / num_funds] * num_funds
+
+    df = close_prices_df.reset_index()
+    dates = df["Date"]
+
+    # Shared arrays
+    prices = df[[fund + "_Close" for fund in fund_list]].to_numpy(dtype="float64")
+    rebal_rows = {
+        (month, day): _annual_rebal_rows(dates, month, day)
+        for month, day in rebal_dates
+    }
+    contribs = []
+    for cash_contrib in cash_contribs:
+        if isinstance(cash_contrib, pd.Series):
+            schedule = cash_contrib.reindex(dates.values).fillna(0)
+            contribs.append((cash_contrib.name, schedule.to_numpy(dtype="float64")))
+        else:
+            contribs.append((cash_contrib, cash_contrib))
+
+    def _run(combo):
+        (month, day), (high, low), (contrib_label, cash_contrib) = combo
+
+        sim = simulate_rebalancing(
+            prices=prices,
+            target_weights=target_weights,
+            starting_cash=starting_cash,
+            cash_contrib=cash_contrib,
+            rebal_rows=rebal_rows[(month, day)],
+            rebal_per_high=high,
+            rebal_per_low=low,
+        )
+        total_aa = (sim["AA_Shares"] * prices).sum(axis=1)
+
+        # Same return series as the strategy, including the NaN return of the
+        # first date, which summary_stats counts when annualizing
+        returns = pd.DataFrame(
+            {"Return": pd.Series(total_aa).pct_change().to_numpy()},
+            index=pd.DatetimeIndex(dates.values, name="Date"),
+        )
+        stats = summary_stats(
+            fund_list=fund_list,
+            df=returns,
+            period=period,
+            use_calendar_days=use_calendar_days,
+            excel_export=False,
+            pickle_export=False,
+            output_confirmation=False,
+        )
+
+        return {
+            "Rebal Month": month,
+            "Rebal Day": day,
+            "Rebal Per High": high,
+            "Rebal Per Low": low,
+            "Cash Contrib": contrib_label,
+            "Rebalances": int(sim["Rebalance"].sum()),
+            "Ending Balance": total_aa[-1],
+            **{stat: stats[stat].iloc[0] for stat in SWEEP_STATS},
+        }
+
+    combos = list(it.product(rebal_dates, rebal_bands, contribs))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_run, combos))
+
+    results_df = pd.DataFrame(results)
+
+    plan_name = "_".join(fund_list)
+
+    # Export to excel
+    if excel_export == True:
+        results_df.to_excel(f"{plan_name}_Strategy_Sweep.xlsx", sheet_name="data")
+    else:
+        pass
+
+    # Export to pickle
+    if pickle_export == True:
+        results_df.to_pickle(f"{plan_name}_Strategy_Sweep.pkl")
+    else:
+        pass
+
+    # Output confirmation
+    if output_confirmation == True:
+        print(
+            f"Strategy sweep complete for {plan_name}: {len(results_df)} combinations"
+        )
+    else:
+        pass
+
+    return results_df
@@ -0,0 +1,405 @@
+import glob
+import gzip
+import heapq
+import os
+import struct
+import time
+import zlib
+
+from datetime import datetime, timezone
+
+# Record header: receive time (ns since epoch, int64) and message length (uint32)
+RECORD_HEADER = struct.Struct("<qI")
+
+# File header identifying the format
+FILE_MAGIC = b"TICKS01\n"
+
+# Number of bytes read from a file at a time
+READ_CHUNK_SIZE = 1 << 20
+
+
+class TickRecorder:
+    """
+    Record raw websocket messages to length-prefixed binary files.
+
+    Each record is the receive time in nanoseconds and the message length
+    (see RECORD_HEADER) followed by the message bytes exactly as received,
+    so messages are not parsed or re-serialized. Records are collected in
+    memory and written in batches to a file that is kept open, and a new file
+    is started for every `rotate_seconds` window of receive times.
+
+    Files are named "{prefix}_{YYYYMMDD_HHMMSS}.ticks" after the start of
+    their window (UTC), with ".gz" appended when compressed. Each write of a
+    compressed file is a separate gzip member, so a file cut off by a crash
+    still reads up to its last complete write. When a file is reopened, e.g.
+    after a restart in the same window, anything after its last complete
+    record is cut off before appending.
+
+    Parameters:
+    -----------
+    directory : str
+        Directory for the recorded files (created if needed).
+    prefix : str, optional
+        Prefix of the file names, e.g., the channel (default is "ticks").
+    rotate_seconds : int, optional
+        Length of the time window covered by each file (default is 3600).
+    flush_messages : int, optional
+        Number of buffered messages that triggers a write (default is 1000).
+    flush_seconds : float, optional
+        Maximum time between writes while messages arrive (default is 1.0).
+    compress : bool, optional
+        If True, gzip compress the files (default is False).
+
+    Example:
+    --------
+    >>> with TickRecorder(directory="ticks", prefix="level2") as recorder:
+    ...     recorder.record(message)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "ticks",
+        rotate_seconds: int = 3600,
+        flush_messages: int = 1000,
+        flush_seconds: float = 1.0,
+        compress: bool = False,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.rotate_ns = int(rotate_seconds * 1e9)
+        self.flush_messages = flush_messages
+        self.flush_ns = int(flush_seconds * 1e9)
+        self.compress = compress
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffer = []
+        self._file = None
+        self._window = None
+        self._last_flush = time.time_ns()
+        self.messages = 0
+
+    def _path(self, window: int) -> str:
+        start = datetime.fromtimestamp(window * self.rotate_ns / 1e9, tz=timezone.utc)
+        name = f"{self.prefix}_{start:%Y%m%d_%H%M%S}.ticks"
+        if self.compress == True:
+            name += ".gz"
+        return os.path.join(self.directory, name)
+
+    def _open(self, window: int):
+        """Close the current file and open the file for a window."""
+
+        self._close_file()
+        path = self._path(window)
+
+        # Cut off a partial record or gzip member left by a crash, since
+        # appending after it would corrupt the file
+        length = 0
+        tail = b""
+        if os.path.exists(path):
+            length, tail = _complete_length(path)
+            if length < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(length)
+
+        self._file = open(path, "ab")
+        self._window = window
+        if length == 0:
+            self._write(FILE_MAGIC)
+            tail = tail[len(FILE_MAGIC) :] if tail.startswith(FILE_MAGIC) else b""
+
+        # Write back the complete records of a cut off gzip member
+        tail = tail[: _records_length(tail)]
+        if tail:
+            self._write(tail)
+
+    def _write(self, data: bytes):
+        """Write bytes to the current file, as one gzip member if compressed."""
+
+        if self.compress == True:
+            data = gzip.compress(data)
+        self._file.write(data)
+        self._file.flush()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, message, timestamp_ns: int = None):
+        """
+        Add a message to the buffer, writing the buffer when it is full or
+        the flush interval has passed.
+
+        Parameters:
+        -----------
+        message : str or bytes
+            Raw message as received.
+        timestamp_ns : int, optional
+            Receive time in nanoseconds since the epoch. If None, the current
+            time is used (default is None).
+        """
+
+        now = time.time_ns()
+        if timestamp_ns is None:
+            timestamp_ns = now
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+
+        # Write the previous window's messages before starting a new file
+        window = timestamp_ns // self.rotate_ns
+        if window != self._window:
+            self.flush()
+            self._open(window)
+
+        self._buffer.append(RECORD_HEADER.pack(timestamp_ns, len(message)))
+        self._buffer.append(message)
+        self.messages += 1
+
+        if (
+            len(self._buffer) >= 2 * self.flush_messages
+            or now - self._last_flush >= self.flush_ns
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write the buffered messages to the current file."""
+
+        if self._buffer and self._file is not None:
+            self._write(b"".join(self._buffer))
+        self._buffer = []
+        self._last_flush = time.time_ns()
+
+    def close(self):
+        """Write the buffered messages and close the file."""
+
+        self.flush()
+        self._close_file()
+        self._window = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _gunzip_chunks(f):
+    """
+    Decompressed chunks of a gzip file with any number of members, stopping
+    at a member that is cut off or corrupt instead of raising.
+    """
+
+    decompressor = zlib.decompressobj(31)
+    while True:
+        data = f.read(READ_CHUNK_SIZE)
+        if not data:
+            return
+        while data:
+            try:
+                chunk = decompressor.decompress(data)
+            except zlib.error:
+                return
+            if chunk:
+                yield chunk
+
+            # Next member
+            if decompressor.eof:
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(31)
+            else:
+                data = b""
+
+
+def _records_length(data: bytes) -> int:
+    """Length of the complete records at the start of data."""
+
+    pos = 0
+    end = len(data)
+    while pos + RECORD_HEADER.size <= end:
+        _, length = RECORD_HEADER.unpack_from(data, pos)
+        if pos + RECORD_HEADER.size + length > end:
+            break
+        pos += RECORD_HEADER.size + length
+
+    return pos
+
+
+def _complete_length(file: str) -> tuple:
+    """
+    Length in bytes of the part of a recorded file that ends with its last
+    complete record (compressed files: its last complete gzip member), or 0
+    if not even the file header is complete, and the data decompressed from
+    a gzip member cut off at the end (empty if there is none).
+    """
+
+    with open(file, "rb") as f:
+        if file.endswith(".gz"):
+            length = 0
+            position = 0
+            member = bytearray()
+            decompressor = zlib.decompressobj(31)
+            while True:
+                data = f.read(READ_CHUNK_SIZE)
+                if not data:
+                    return length, bytes(member)
+                position += len(data)
+                while data:
+                    try:
+                        member += decompressor.decompress(data)
+                    except zlib.error:
+                        return length, bytes(member)
+                    if decompressor.eof:
+                        data = decompressor.unused_data
+                        length = position - len(data)
+                        member = bytearray()
+                        decompressor = zlib.decompressobj(31)
+                    else:
+                        data = b""
+
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            return 0, b""
+        length = len(FILE_MAGIC)
+        size = os.fstat(f.fileno()).st_size
+        while length + RECORD_HEADER.size <= size:
+            f.seek(length)
+            _, message_length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            if length + RECORD_HEADER.size + message_length > size:
+                break
+            length += RECORD_HEADER.size + message_length
+
+        return length, b""
+
+
+def _read_file(file: str):
+    """
+    Records of one recorded file, read a chunk at a time and skipping a
+    record or gzip member cut off at the end.
+    """
+
+    with open(file, "rb") as f:
+        if file.endswith(".gz"):
+            chunks = _gunzip_chunks(f)
+        else:
+            chunks = iter(lambda: f.read(READ_CHUNK_SIZE), b"")
+
+        data = b""
+        header_checked = False
+        for chunk in chunks:
+            data += chunk
+
+            if not header_checked:
+                if len(data) < len(FILE_MAGIC):
+                    continue
+                if not data.startswith(FILE_MAGIC):
+                    raise ValueError(f"Not a recorded tick file: {file}")
+                data = data[len(FILE_MAGIC) :]
+                header_checked = True
+
+            pos = 0
+            end = len(data)
+            while pos + RECORD_HEADER.size <= end:
+                timestamp_ns, length = RECORD_HEADER.unpack_from(data, pos)
+                if pos + RECORD_HEADER.size + length > end:
+                    break
+                pos += RECORD_HEADER.size
+                yield timestamp_ns, data[pos : pos + length]
+                pos += length
+
+            # Keep the incomplete record for the next chunk
+            data = data[pos:]
+
+
+def read_ticks(path: str, prefix: str = None):
+    """
+    Read the messages recorded by TickRecorder.
+
+    Parameters:
+    -----------
+    path : str
+        Recorded file or directory of recorded files.
+    prefix : str, optional
+        Only read the files with this prefix in a directory. If None, the
+        files of all prefixes are read and merged by receive time (default
+        is None).
+
+    Yields:
+    -------
+    tuple
+        (timestamp_ns, message) with the receive time in nanoseconds and the
+        raw message bytes, in the order they were received.
+    """
+
+    if not os.path.isdir(path):
+        yield from _read_file(path)
+        return
+
+    files = sorted(
+        glob.glob(os.path.join(path, "*.ticks"))
+        + glob.glob(os.path.join(path, "*.ticks.gz"))
+    )
+
+    # Files of each prefix in time order ("{prefix}_{YYYYMMDD}_{HHMMSS}.ticks")
+    streams = {}
+    for file in files:
+        file_prefix = os.path.basename(file).rsplit("_", 2)[0]
+        if prefix is None or file_prefix == prefix:
+            streams.setdefault(file_prefix, []).append(file)
+
+    yield from heapq.merge(
+        *(
+            (record for file in stream for record in _read_file(file))
+            for stream in streams.values()
+        ),
+        key=lambda record: record[0],
+    )
+
+
+def replay_ticks(
+    path: str,
+    on_message,
+    prefix: str = None,
+    speed: float = None,
+) -> int:
+    """
+    Replay recorded messages through a message handler, e.g., the bot's
+    `on_message`.
+
+    Parameters:
+    -----------
+    path : str
+        Recorded file or directory of recorded files.
+    on_message : callable
+        Function called with each message as a string.
+    prefix : str, optional
+        Only replay the files with this prefix in a directory (default is None).
+    speed : float, optional
+        Replay speed relative to the recorded time, e.g., 1.0 for real time
+        or 10.0 for ten times faster. If None, replay at full speed (default
+        is None).
+
+    Returns:
+    --------
+    int
+        Number of messages replayed.
+    """
+
+    count = 0
+    first_recorded = None
+    start = time.perf_counter()
+
+    for timestamp_ns, message in read_ticks(path, prefix=prefix):
+        if speed is not None:
+            if first_recorded is None:
+                first_recorded = timestamp_ns
+            delay = (timestamp_ns - first_recorded) / 1e9 / speed - (
+                time.perf_counter() - start
+            )
+            if delay > 0:
+                time.sleep(delay)
+
+        on_message(message.decode("utf-8"))
+        count += 1
+
+    return count
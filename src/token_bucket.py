@@ -0,0 +1,112 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens are added continuously at `rate` tokens per second up to `capacity`.
+    Each call to `acquire` takes one token; if none is available, the token is
+    reserved and the caller sleeps only until it has been refilled. Because
+    tokens are reserved under the lock, concurrent callers are served in the
+    order they arrive and never sleep longer than the bucket requires.
+
+    Parameters:
+    -----------
+    rate : float
+        Number of tokens added per second, e.g., 5 / 60 for 5 requests per minute.
+    capacity : float, optional
+        Maximum number of tokens held, i.e., the largest burst allowed
+        (default is one second of tokens, and at least 1).
+
+    Example:
+    --------
+    >>> limiter = TokenBucket(rate=5 / 60, capacity=5)
+    >>> limiter.acquire()  # call before each API request
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}. Rate must be positive.")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Take `tokens` from the bucket, sleeping until they are available.
+
+        Returns:
+        --------
+        float
+            Number of seconds slept.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+
+            # Reserve the tokens now; a negative balance is the wait in tokens
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    Token bucket whose rate adapts to throttling by the server.
+
+    The rate starts at `rate` and is cut by `decrease` every time the server
+    throttles a request (e.g., an HTTP 429 response), and is raised again by
+    `increase` after every successful request, up to the starting rate
+    (additive increase, multiplicative decrease).
+
+    Parameters:
+    -----------
+    rate : float
+        Starting and maximum number of tokens added per second.
+    capacity : float, optional
+        Maximum number of tokens held (default is one second of tokens).
+    min_rate : float, optional
+        Lowest rate the bucket is cut to (default is rate / 16).
+    decrease : float, optional
+        Factor the rate is multiplied by on throttling (default is 0.5).
+    increase : float, optional
+        Amount the rate is raised by on success (default is rate / 100).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = None,
+        min_rate: float = None,
+        decrease: float = 0.5,
+        increase: float = None,
+    ):
+        super().__init__(rate=rate, capacity=capacity)
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.decrease = decrease
+        self.increase = increase if increase is not None else rate / 100
+
+    def on_success(self) -> None:
+        """Raise the rate after a successful request."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self) -> None:
+        """Cut the rate and drop any saved burst after a throttled request."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
@@ -2,6 +2,7 @@ import os
 import pandas as pd
 
 from IPython.display import display
+from resample_period_end import resample_period_end
 
 
 def yf_quarter_end(
@@ -42,17 +43,12 @@ def yf_quarter_end(
     # Set location from where to read existing excel file
     location = f"{base_directory}/{source}/{asset_class}/Daily/{ticker}.xlsx"
 
-    # Read data from excel
-    df = pd.read_excel(location, sheet_name="data", engine="calamine")
-
-    # Keep only required columns
-    df = df[["Date", "Close"]]
-
-    # Set index to date column
-    df.set_index("Date", inplace=True)
-
-    # Resample data to month end
-    df_quarter_end = df.resample("QE").last()
+    # Resample data to quarter end, updating the cached results incrementally
+    df_quarter_end = resample_period_end(
+        location=location,
+        columns=["Close"],
+        cache_directory=f"{base_directory}/Cache/Period_End",
+    )["QE"]
 
     # Create directory
     directory = f"{base_directory}/{source}/{asset_class}/Quarter_End"